@@ -0,0 +1,326 @@
+"""
+Adversarial placement of the ships: fleets which a given strategy needs many shots to sink.
+
+BoardAutomatic places the ships uniformly at random, whatever the strategy of the opponent. optimize_fleet searches
+the placements with simulated annealing instead, to maximize the mean number of shots a Player strategy needs to sink
+the fleet. At each step, a batch of neighbours of the current fleet (one ship moved) is evaluated in a pool of
+processes. All the candidates play the same seeded games (see battleship.sweep.play_solo_game), so the comparisons
+are not blurred by the luck of the draws. The best fleet found is then evaluated on other games, since its score on
+the games of the search is optimistic.
+
+The best fleets are kept per (strategy, config) in a PlacementCache (a JSON file), so that a BoardAdversarial is
+created with a lookup rather than a search.
+
+Usage:
+    python -m battleship.adversary --player automatic --cache fleets.json --steps 200 --games 200
+"""
+import argparse
+import json
+import math
+import os
+import random
+from multiprocessing import Pool
+from typing import Dict, List, Tuple, Type
+
+from battleship.board import Board
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.placement import Placement, get_placement_table
+from battleship.player import Player, PlayerAutomatic
+from battleship.rng import KIND_RNG_NUMPY, KIND_RNG_PYTHON, get_rng_game
+from battleship.ship import Ship
+from battleship.sweep import DICT_CLASSES_PLAYERS, play_solo_game
+
+# probability that a neighbour moves a ship to a cell next to its position, rather than anywhere on the board
+PROBABILITY_LOCAL_MOVE = 0.7
+
+# number of fleets kept per (strategy, config) in a PlacementCache
+MAX_NUMBER_FLEETS_PER_KEY = 8
+
+# a fleet, as the tuple (coord_start, coord_end) of each ship
+FleetCoordinates = Tuple[Tuple[Tuple[int, int], Tuple[int, int]], ...]
+
+
+def get_fleet_coordinates(fleet: Tuple[Placement, ...]) -> FleetCoordinates:
+    return tuple((placement.coord_start, placement.coord_end) for placement in fleet)
+
+
+def get_new_ships(fleet_coordinates: FleetCoordinates) -> List[Ship]:
+    return [Ship(coord_start=coord_start, coord_end=coord_end) for coord_start, coord_end in fleet_coordinates]
+
+
+def evaluate_fleet(fleet_coordinates: FleetCoordinates,
+                   class_player: Type[Player],
+                   config: GameConfig = None,
+                   seed: int = 0,
+                   number_games: int = 100,
+                   kind_rng: str = KIND_RNG_PYTHON) -> float:
+    """
+    :return: the mean number of shots class_player needs to sink the fleet, over the seeded games
+    [0, number_games) of seed
+    """
+    return _evaluate_candidate((0, fleet_coordinates, class_player, config, seed, number_games, kind_rng))[1] \
+        / number_games
+
+
+def _evaluate_candidate(arguments: tuple) -> Tuple[int, int]:
+    """
+    :return: a tuple (index of the candidate, total number of shots over the games)
+    """
+    index_candidate, fleet_coordinates, class_player, config, seed, number_games, kind_rng = arguments
+
+    sum_shots = 0
+    for index_game in range(number_games):
+        sum_shots += play_solo_game(get_rng_game(seed, index_game, kind_rng), class_player, {}, config,
+                                    get_new_ships(fleet_coordinates))
+    return index_candidate, sum_shots
+
+
+def get_neighbour_fleet(fleet: Tuple[Placement, ...], config: GameConfig, rng=random) -> Tuple[Placement, ...]:
+    """
+    :param fleet: placement of each ship
+    :return: the same fleet with one ship moved: next to its position with probability PROBABILITY_LOCAL_MOVE,
+    anywhere on the board otherwise (the fleet itself if no ship can move)
+    """
+    placement_table = get_placement_table(config.size_x, config.size_y)
+    list_indices_ships = list(range(len(fleet)))
+    rng.shuffle(list_indices_ships)
+    is_local_move = rng.random() < PROBABILITY_LOCAL_MOVE
+
+    for index_ship in list_indices_ships:
+        placement_moved = fleet[index_ship]
+        mask_blocked = 0
+        for placement in fleet:
+            if placement is not placement_moved:
+                mask_blocked |= placement.mask_halo
+
+        (x_start, y_start) = placement_moved.coord_start
+        list_placements = [placement for placement in placement_table.get_placements(placement_moved.length)
+                           if placement is not placement_moved and placement.is_compatible_with(mask_blocked)]
+        if is_local_move:
+            list_placements_near = [placement for placement in list_placements
+                                    if abs(placement.coord_start[0] - x_start) <= 1
+                                    and abs(placement.coord_start[1] - y_start) <= 1]
+            list_placements = list_placements_near or list_placements
+
+        if list_placements:
+            return fleet[:index_ship] + (rng.choice(list_placements),) + fleet[index_ship + 1:]
+
+    return fleet
+
+
+def optimize_fleet(class_player: Type[Player],
+                   config: GameConfig = None,
+                   number_steps: int = 200,
+                   number_candidates_per_step: int = 8,
+                   number_games: int = 200,
+                   temperature_start: float = 2.,
+                   temperature_end: float = 0.05,
+                   seed: int = 0,
+                   number_games_validation: int = 1000,
+                   number_workers: int = None,
+                   kind_rng: str = KIND_RNG_PYTHON,
+                   verbose: bool = False) -> Tuple[Tuple[Placement, ...], float]:
+    """
+    Simulated annealing over the fleets, starting from a random one.
+
+    :param class_player: strategy of the opponent, constructible from a config and a random generator
+    (must be importable, so that it can be sent to the workers)
+    :param config: config of the boards, DEFAULT_CONFIG if None
+    :param number_steps: number of steps of the annealing
+    :param number_candidates_per_step: number of neighbours evaluated per step, the best one is the candidate move
+    :param number_games: number of games played by each candidate (the same ones for all the candidates)
+    :param temperature_start: temperature of the first step, in shots: a move losing that many shots on average is
+    accepted with probability 1/e
+    :param temperature_end: temperature of the last step, it decreases geometrically
+    :param seed: seed of the search, it gives the random fleet it starts from and the games
+    :param number_games_validation: number of other games evaluating the best fleet found
+    :param number_workers: number of processes. None uses all the cores, 1 plays everything in this process.
+    :param kind_rng: kind of the random generator of each game (see battleship.rng)
+    :param verbose: if True, the progress of the search is printed
+    :return: a tuple (best fleet found, mean number of shots to sink it over the validation games)
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+    rng = random.Random(f"{seed}:search")
+    seed_games = f"{seed}:games"
+    pool = Pool(processes=number_workers) if number_workers != 1 else None
+
+    def get_scores(list_fleets: List[Tuple[Placement, ...]], seed_evaluation, number_games_evaluation) -> List[float]:
+        list_arguments = [(index_candidate, get_fleet_coordinates(fleet), class_player, config, seed_evaluation,
+                           number_games_evaluation, kind_rng)
+                          for index_candidate, fleet in enumerate(list_fleets)]
+        list_scores = [0.] * len(list_fleets)
+        iterator_results = pool.imap_unordered(_evaluate_candidate, list_arguments) if pool is not None \
+            else map(_evaluate_candidate, list_arguments)
+        for index_candidate, sum_shots in iterator_results:
+            list_scores[index_candidate] = sum_shots / number_games_evaluation
+        return list_scores
+
+    try:
+        fleet_current = get_placement_table(config.size_x, config.size_y).sample_fleet(
+            config.dict_number_ships_per_length, rng)
+        score_current, = get_scores([fleet_current], seed_games, number_games)
+        fleet_best, score_best = fleet_current, score_current
+        ratio_temperature = (temperature_end / temperature_start) ** (1 / max(number_steps - 1, 1))
+
+        for index_step in range(number_steps):
+            temperature = temperature_start * ratio_temperature ** index_step
+            list_candidates = [get_neighbour_fleet(fleet_current, config, rng)
+                               for _ in range(number_candidates_per_step)]
+            list_scores = get_scores(list_candidates, seed_games, number_games)
+            score_candidate, index_candidate = max((score, index) for index, score in enumerate(list_scores))
+
+            if score_candidate >= score_current \
+                    or rng.random() < math.exp((score_candidate - score_current) / temperature):
+                fleet_current, score_current = list_candidates[index_candidate], score_candidate
+                if score_current > score_best:
+                    fleet_best, score_best = fleet_current, score_current
+
+            if verbose:
+                print(f"step {index_step + 1}/{number_steps}  temperature: {temperature:.3f}  "
+                      f"current: {score_current:.2f}  best: {score_best:.2f}")
+
+        score_validation, = get_scores([fleet_best], f"{seed}:validation", number_games_validation)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return fleet_best, score_validation
+
+
+def get_key_cache(class_player: Type[Player], config: GameConfig) -> str:
+    lengths = ','.join(f"{length}x{number_ships}" for length, number_ships in config.tuple_number_ships_per_length)
+    return f"{class_player.__module__}.{class_player.__qualname__}|{config.size_x}x{config.size_y}|{lengths}"
+
+
+class PlacementCache(object):
+    """
+    Best fleets found per (strategy, config), saved in a JSON file:
+    key (see get_key_cache) -> list of {"score": mean shots to sink, "ships": [[x_start, y_start, x_end, y_end]...]},
+    best fleets first.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        :param path: JSON file of the cache, read if it exists. If None, the cache is only kept in memory.
+        """
+        self.path = path
+        self.dict_fleets_per_key = {}  # type: Dict[str, List[dict]]
+
+        if path is not None and os.path.exists(path):
+            with open(path) as file_cache:
+                self.dict_fleets_per_key = json.load(file_cache)
+
+    def get_list_fleets(self, class_player: Type[Player], config: GameConfig) -> List[FleetCoordinates]:
+        """
+        :return: the fleets hard for class_player on the boards of config, best first (empty if there are none)
+        """
+        return [tuple(((x_start, y_start), (x_end, y_end)) for x_start, y_start, x_end, y_end in entry['ships'])
+                for entry in self.dict_fleets_per_key.get(get_key_cache(class_player, config), [])]
+
+    def add_fleet(self,
+                  class_player: Type[Player],
+                  config: GameConfig,
+                  fleet_coordinates: FleetCoordinates,
+                  score: float) -> None:
+        """
+        Keeps the fleet if it is among the MAX_NUMBER_FLEETS_PER_KEY best ones of (class_player, config).
+        """
+        list_entries = self.dict_fleets_per_key.setdefault(get_key_cache(class_player, config), [])
+        list_ships = [[x_start, y_start, x_end, y_end]
+                      for (x_start, y_start), (x_end, y_end) in fleet_coordinates]
+        if any(entry['ships'] == list_ships for entry in list_entries):
+            return
+
+        list_entries.append({'score': score, 'ships': list_ships})
+        list_entries.sort(key=lambda entry: entry['score'], reverse=True)
+        del list_entries[MAX_NUMBER_FLEETS_PER_KEY:]
+
+    def save(self) -> None:
+        """
+        Writes the cache to its file, atomically. Does nothing if the cache is only kept in memory.
+        """
+        if self.path is None:
+            return
+
+        path_temporary = self.path + '.tmp'
+        with open(path_temporary, 'w') as file_cache:
+            json.dump(self.dict_fleets_per_key, file_cache, indent=1)
+        os.replace(path_temporary, self.path)
+
+
+class BoardAdversarial(Board):
+    """
+    Board with a fleet of the cache hard for the strategy of the opponent, randomly mirrored so that the opponent
+    does not always face the same board. The ships are randomly placed (as on a BoardAutomatic) if the cache has no
+    fleet for that strategy and config.
+    """
+
+    def __init__(self,
+                 cache: PlacementCache,
+                 class_player_opponent: Type[Player] = PlayerAutomatic,
+                 config: GameConfig = None,
+                 rng=random):
+        """
+        :param cache: fleets found by optimize_fleet
+        :param class_player_opponent: strategy of the opponent
+        :param config: size of the board and number of ships per length, DEFAULT_CONFIG if None
+        :param rng: random generator choosing the fleet (see battleship.rng)
+        """
+        self.config = config if config is not None else DEFAULT_CONFIG
+        list_fleets = cache.get_list_fleets(class_player_opponent, self.config)
+
+        if list_fleets:
+            list_ships = get_new_ships(self._get_fleet_mirrored(rng.choice(list_fleets), rng.random() < 0.5,
+                                                                rng.random() < 0.5))
+        else:
+            placement_table = get_placement_table(self.config.size_x, self.config.size_y)
+            list_ships = [placement.get_ship()
+                          for placement in placement_table.sample_fleet(self.config.dict_number_ships_per_length, rng)]
+
+        super().__init__(list_ships=list_ships, config=self.config)
+
+    def _get_fleet_mirrored(self,
+                            fleet_coordinates: FleetCoordinates,
+                            is_mirrored_x: bool,
+                            is_mirrored_y: bool) -> FleetCoordinates:
+        def get_coordinates_mirrored(coord_x: int, coord_y: int) -> Tuple[int, int]:
+            return (self.config.size_x + 1 - coord_x if is_mirrored_x else coord_x,
+                    self.config.size_y + 1 - coord_y if is_mirrored_y else coord_y)
+
+        return tuple((get_coordinates_mirrored(*coord_start), get_coordinates_mirrored(*coord_end))
+                     for coord_start, coord_end in fleet_coordinates)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Searches fleets hard to sink for a battleship strategy, and keeps "
+                                                 "the best ones in a cache.")
+    parser.add_argument('--player', choices=sorted(DICT_CLASSES_PLAYERS), default='automatic')
+    parser.add_argument('--cache', required=True, help="JSON file of the fleets found, created if it does not exist")
+    parser.add_argument('--runs', type=int, default=1, help="number of searches, from different random fleets")
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--candidates', type=int, default=8, help="number of neighbours evaluated per step")
+    parser.add_argument('--games', type=int, default=200, help="number of games evaluating each candidate")
+    parser.add_argument('--games-validation', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rng', choices=[KIND_RNG_PYTHON, KIND_RNG_NUMPY], default=KIND_RNG_PYTHON,
+                        help="kind of the random generator of each game")
+    arguments = parser.parse_args()
+
+    class_player = DICT_CLASSES_PLAYERS[arguments.player]
+    cache = PlacementCache(arguments.cache)
+    for index_run in range(arguments.runs):
+        fleet, score = optimize_fleet(class_player, number_steps=arguments.steps,
+                                      number_candidates_per_step=arguments.candidates, number_games=arguments.games,
+                                      seed=arguments.seed + index_run,
+                                      number_games_validation=arguments.games_validation,
+                                      number_workers=arguments.workers, kind_rng=arguments.rng, verbose=True)
+        print(f"{fleet}  mean shots to sink: {score:.2f}")
+        cache.add_fleet(class_player, DEFAULT_CONFIG, get_fleet_coordinates(fleet), score)
+        cache.save()
+
+
+if __name__ == '__main__':
+    main()
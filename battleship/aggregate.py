@@ -0,0 +1,353 @@
+"""
+Statistics over many finished games, in a memory which does not grow with the number of games.
+
+A GameStatistics is an event sink (see battleship.events): it is given to the games (Game(..., list_sinks=[...])),
+and it aggregates:
+- the wins of each player, and of the player who started the game (first-mover advantage)
+- the mean, the variance and the quantiles of the number of shots of each player and of the winner
+- the mean and the variance of the number of hits of each player
+- the lengths of the ships sunk by each player, per rank in the order of the sinks
+- per-cell heatmaps of the shots and the hits of each player
+
+Every aggregate can be merged with the one of another process, so a tournament played by several workers is reduced
+to a single report by merging the statistics of each worker (in any order).
+The quantiles are estimated by a sketch with a relative accuracy (see QuantileSketch).
+"""
+import math
+from collections import Counter
+from typing import Dict, List, NamedTuple
+
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.events import EventSink, GameStartEvent, ShotEvent, WinEvent
+from battleship.placement import get_index_cell
+
+TUPLE_INDICES_PLAYERS = (1, 2)
+
+TUPLE_QUANTILES_REPORT = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class RunningMoments(object):
+    """
+    Count, mean, variance, minimum and maximum of a stream of values (Welford's algorithm, merged with Chan's
+    formula).
+    """
+
+    def __init__(self):
+        self.number_values = 0
+        self.mean = 0.
+        self.sum_squares_deviations = 0.
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __repr__(self):
+        return f"RunningMoments(number_values={self.number_values}, mean={self.mean:.4f}, " \
+               f"std={self.std():.4f})"
+
+    def add(self, value: float) -> None:
+        self.number_values += 1
+        delta = value - self.mean
+        self.mean += delta / self.number_values
+        self.sum_squares_deviations += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'RunningMoments') -> None:
+        """
+        Adds the values of other to the values of this object.
+        """
+        if not other.number_values:
+            return
+
+        number_values = self.number_values + other.number_values
+        delta = other.mean - self.mean
+        self.sum_squares_deviations += other.sum_squares_deviations \
+            + delta ** 2 * self.number_values * other.number_values / number_values
+        self.mean += delta * other.number_values / number_values
+        self.number_values = number_values
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self) -> float:
+        """
+        :return: the sample variance, nan if there are less than 2 values
+        """
+        if self.number_values < 2:
+            return math.nan
+        return self.sum_squares_deviations / (self.number_values - 1)
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+
+class QuantileSketch(object):
+    """
+    Sketch of the distribution of a stream of non-negative values, answering quantile queries with a relative
+    accuracy (DDSketch): the values are counted in buckets whose bounds grow geometrically, so the number of
+    buckets only grows with the logarithm of the range of the values. Two sketches with the same accuracy merge by
+    adding their counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        :param relative_accuracy: each quantile returned is within this relative distance of a value of the stream
+        of the right rank
+        :raise ValueError if the accuracy is not in (0, 1)
+        """
+        if not 0. < relative_accuracy < 1.:
+            raise ValueError("The relative accuracy of a sketch should be in (0, 1).")
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+
+        self.number_values = 0
+        self.number_zeros = 0
+        # index of a bucket -> number of values in it, the bucket i holds the values in (gamma^(i-1), gamma^i]
+        self.counter_buckets = Counter()  # type: Dict[int, int]
+
+    def __len__(self):
+        return self.number_values
+
+    def add(self, value: float) -> None:
+        """
+        :raise ValueError if the value is negative
+        """
+        if value < 0:
+            raise ValueError(f"A quantile sketch only holds non-negative values: {value}")
+
+        self.number_values += 1
+        if value == 0:
+            self.number_zeros += 1
+        else:
+            self.counter_buckets[math.ceil(math.log(value) / self.log_gamma)] += 1
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """
+        Adds the values of other to the values of this object.
+        :raise ValueError if the sketches do not have the same accuracy
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only the sketches with the same relative accuracy can be merged.")
+
+        self.number_values += other.number_values
+        self.number_zeros += other.number_zeros
+        self.counter_buckets.update(other.counter_buckets)
+
+    def quantile(self, q: float) -> float:
+        """
+        :param q: in [0, 1], 0.5 for the median
+        :return: the estimated quantile, nan if the sketch is empty
+        """
+        if not self.number_values:
+            return math.nan
+
+        rank = q * (self.number_values - 1)
+        number_values_below = self.number_zeros
+        if rank < number_values_below:
+            return 0.
+
+        for index_bucket in sorted(self.counter_buckets):
+            number_values_below += self.counter_buckets[index_bucket]
+            if rank < number_values_below:
+                return 2 * self.gamma ** index_bucket / (self.gamma + 1)
+
+        return 2 * self.gamma ** max(self.counter_buckets) / (self.gamma + 1)
+
+
+class _GameInProgress(object):
+    """
+    What a GameStatistics remembers of the game it is receiving the events of.
+    """
+
+    def __init__(self, index_player_starting: int):
+        self.index_player_starting = index_player_starting
+        # index of a player -> set of the indices of the cells where its attacks hit a ship
+        self.dict_cells_hit_per_player = {index_player: set() for index_player in TUPLE_INDICES_PLAYERS}
+        # index of a player -> lengths of the ships it sank, in the order of the sinks
+        self.dict_lengths_sunk_per_player = {index_player: [] for index_player in TUPLE_INDICES_PLAYERS}
+
+
+class PlayerStatistics(object):
+    """
+    Aggregates of the games of one of the players (1 or 2).
+    """
+
+    def __init__(self, number_cells: int, relative_accuracy: float):
+        self.number_wins = 0
+        self.moments_shots = RunningMoments()  # shots fired during each game
+        self.sketch_shots = QuantileSketch(relative_accuracy)
+        self.moments_hits = RunningMoments()  # attacks which hit a ship during each game
+        # rank of a sink in a game (0 for the first ship sunk) -> length of the ship -> number of games
+        self.dict_lengths_per_rank_sink = {}  # type: Dict[int, Counter]
+        # index of a cell (see get_index_cell) -> number of shots, number of hits, over all the games
+        self.list_numbers_shots_per_cell = [0] * number_cells
+        self.list_numbers_hits_per_cell = [0] * number_cells
+
+    def merge(self, other: 'PlayerStatistics') -> None:
+        self.number_wins += other.number_wins
+        self.moments_shots.merge(other.moments_shots)
+        self.sketch_shots.merge(other.sketch_shots)
+        self.moments_hits.merge(other.moments_hits)
+        for rank_sink, counter_lengths in other.dict_lengths_per_rank_sink.items():
+            self.dict_lengths_per_rank_sink.setdefault(rank_sink, Counter()).update(counter_lengths)
+        self.list_numbers_shots_per_cell = [number_shots + number_shots_other for number_shots, number_shots_other
+                                            in zip(self.list_numbers_shots_per_cell,
+                                                   other.list_numbers_shots_per_cell)]
+        self.list_numbers_hits_per_cell = [number_hits + number_hits_other for number_hits, number_hits_other
+                                           in zip(self.list_numbers_hits_per_cell, other.list_numbers_hits_per_cell)]
+
+
+class GameStatistics(EventSink):
+    """
+    Sink aggregating the games whose events it receives. The events of a game should all be received before the ones
+    of the next game, which is the case when the games are played one after the other.
+    """
+
+    def __init__(self, config: GameConfig = None, relative_accuracy: float = 0.01):
+        """
+        :param config: config of all the games, DEFAULT_CONFIG if None
+        :param relative_accuracy: of the quantile sketches
+        """
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.relative_accuracy = relative_accuracy
+
+        self.number_games = 0
+        self.number_wins_player_starting = 0
+        self.moments_shots_winner = RunningMoments()
+        self.sketch_shots_winner = QuantileSketch(relative_accuracy)
+
+        self.dict_statistics_per_player = {index_player: PlayerStatistics(self.config.size_x * self.config.size_y,
+                                                                          relative_accuracy)
+                                           for index_player in TUPLE_INDICES_PLAYERS}
+
+        self.game_in_progress = None  # type: _GameInProgress
+
+    def handle(self, event: NamedTuple) -> None:
+        """
+        :raise ValueError if the game does not have the config of the statistics
+        """
+        if isinstance(event, ShotEvent):
+            self._add_shot(event)
+        elif isinstance(event, GameStartEvent):
+            if event.config != self.config:
+                raise ValueError(f"The game has the config {event.config}, the statistics are for {self.config}.")
+            self.game_in_progress = _GameInProgress(event.index_player_starting)
+        elif isinstance(event, WinEvent):
+            self._add_game(event)
+
+    def _add_shot(self, event: ShotEvent) -> None:
+        statistics_player = self.dict_statistics_per_player[event.index_player]
+        size_x = self.config.size_x
+        if not (1 <= event.coord_x <= size_x and 1 <= event.coord_y <= self.config.size_y):
+            return
+        index_cell = get_index_cell(event.coord_x, event.coord_y, size_x)
+
+        statistics_player.list_numbers_shots_per_cell[index_cell] += 1
+        if not event.is_ship_hit:
+            return
+        statistics_player.list_numbers_hits_per_cell[index_cell] += 1
+
+        set_cells_hit = self.game_in_progress.dict_cells_hit_per_player[event.index_player]
+        set_cells_hit.add(index_cell)
+
+        if event.has_ship_sunk:
+            # the ships are never next to each other, so the ship sunk is made of the cells hit in line with this one
+            length = 1
+            for step_x, step_y in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                coord_x, coord_y = event.coord_x + step_x, event.coord_y + step_y
+                while 1 <= coord_x <= size_x and 1 <= coord_y <= self.config.size_y \
+                        and get_index_cell(coord_x, coord_y, size_x) in set_cells_hit:
+                    length += 1
+                    coord_x, coord_y = coord_x + step_x, coord_y + step_y
+            self.game_in_progress.dict_lengths_sunk_per_player[event.index_player].append(length)
+
+    def _add_game(self, event: WinEvent) -> None:
+        game = self.game_in_progress
+
+        self.number_games += 1
+        if event.index_player == game.index_player_starting:
+            self.number_wins_player_starting += 1
+        number_shots_winner = event.dict_number_shots_per_player[event.index_player]
+        self.moments_shots_winner.add(number_shots_winner)
+        self.sketch_shots_winner.add(number_shots_winner)
+
+        self.dict_statistics_per_player[event.index_player].number_wins += 1
+        for index_player, statistics_player in self.dict_statistics_per_player.items():
+            number_shots = event.dict_number_shots_per_player[index_player]
+            statistics_player.moments_shots.add(number_shots)
+            statistics_player.sketch_shots.add(number_shots)
+            statistics_player.moments_hits.add(len(game.dict_cells_hit_per_player[index_player]))
+
+            for rank_sink, length in enumerate(game.dict_lengths_sunk_per_player[index_player]):
+                statistics_player.dict_lengths_per_rank_sink.setdefault(rank_sink, Counter())[length] += 1
+
+        self.game_in_progress = None
+
+    def merge(self, other: 'GameStatistics') -> None:
+        """
+        Adds the games of other to the games of this object.
+        :raise ValueError if the statistics are not for the same config, or do not have the same accuracy
+        """
+        if other.config != self.config:
+            raise ValueError(f"Statistics for {other.config} cannot be merged with statistics for {self.config}.")
+
+        self.number_games += other.number_games
+        self.number_wins_player_starting += other.number_wins_player_starting
+        self.moments_shots_winner.merge(other.moments_shots_winner)
+        self.sketch_shots_winner.merge(other.sketch_shots_winner)
+
+        for index_player, statistics_player in self.dict_statistics_per_player.items():
+            statistics_player.merge(other.dict_statistics_per_player[index_player])
+
+    def get_win_rate_player_starting(self) -> float:
+        """
+        :return: the proportion of the games won by the player who started them
+        """
+        return self.number_wins_player_starting / self.number_games if self.number_games else math.nan
+
+    def get_heatmap_hits(self, index_player: int) -> List[List[float]]:
+        """
+        :return: for each line of the board, for each cell of the line, the mean number of times per game the
+        player's attacks hit a ship there
+        """
+        list_numbers_hits_per_cell = self.dict_statistics_per_player[index_player].list_numbers_hits_per_cell
+        size_x = self.config.size_x
+        return [[number_hits / self.number_games if self.number_games else math.nan
+                 for number_hits in list_numbers_hits_per_cell[index_first_cell:index_first_cell + size_x]]
+                for index_first_cell in range(0, len(list_numbers_hits_per_cell), size_x)]
+
+    def print_report(self) -> None:
+        print(f"games: {self.number_games}")
+        print(f"win rate of the player starting: {self.get_win_rate_player_starting():.4f}")
+        print(f"shots of the winner: {self._get_str_distribution(self.moments_shots_winner, self.sketch_shots_winner)}")
+
+        for index_player, statistics_player in self.dict_statistics_per_player.items():
+            print(f"\nplayer {index_player}")
+            print(f"  wins: {statistics_player.number_wins}")
+            print(f"  shots: "
+                  f"{self._get_str_distribution(statistics_player.moments_shots, statistics_player.sketch_shots)}")
+            print(f"  hits: mean {statistics_player.moments_hits.mean:.2f} std {statistics_player.moments_hits.std():.2f}")
+            for rank_sink, counter_lengths in sorted(statistics_player.dict_lengths_per_rank_sink.items()):
+                print(f"  ship sunk #{rank_sink + 1}: "
+                      + ", ".join(f"length {length}: {number_games}"
+                                  for length, number_games in sorted(counter_lengths.items())))
+            print("  hits per game and per cell:")
+            for line in self.get_heatmap_hits(index_player):
+                print("   " + " ".join(f"{frequency:4.2f}" for frequency in line))
+
+    @staticmethod
+    def _get_str_distribution(moments: RunningMoments, sketch: QuantileSketch) -> str:
+        return f"mean {moments.mean:.2f} std {moments.std():.2f} " \
+               + " ".join(f"q{round(100 * q)} {sketch.quantile(q):.1f}" for q in TUPLE_QUANTILES_REPORT)
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+
+    from battleship.player import PlayerAutomatic, PlayerProbabilistic
+    from battleship.tournament import run_tournament
+
+    tournament_results = run_tournament(number_games=1000, class_player_1=PlayerAutomatic,
+                                        class_player_2=PlayerProbabilistic, size_chunk=100,
+                                        is_collecting_statistics=True)
+    tournament_results.statistics.print_report()
@@ -0,0 +1,464 @@
+"""
+Vectorized simulation of many games at once with NumPy.
+
+The strategies of PlayerRandom and PlayerAutomatic do not depend on what the opponent does, only on the outcomes
+of their own shots. So each player shoots at all the opponent boards of the batch in parallel (one shot per game
+per step), and the winner of every game is deduced afterwards from the turns at which each player sinks the last
+ship of the opponent (with the rule that a player who hits a ship plays another time).
+"""
+from functools import partial
+
+import numpy as np
+
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.tournament import TournamentResults
+
+POLICY_RANDOM = 'random'  # equivalent to PlayerRandom
+POLICY_HUNT_TARGET = 'hunt_target'  # equivalent to PlayerAutomatic
+POLICY_HUNT_TARGET_SUNK_HALOS = 'hunt_target_sunk_halos'  # equivalent to PlayerAutomatic(is_excluding_sunk_halos=True)
+
+# maximum number of times a ship is randomly placed on the boards where it does not fit yet
+MAX_NUMBER_ATTEMPTS_PLACEMENT = 10000
+
+NEIGHBOURS_DX = np.array([1, -1, 0, 0])
+NEIGHBOURS_DY = np.array([0, 0, 1, -1])
+DIAGONALS_DX = np.array([1, 1, -1, -1])
+DIAGONALS_DY = np.array([1, -1, 1, -1])
+
+
+class BatchBoards(object):
+    """
+    K boards stored as a (K, size_y, size_x) array of ship indices (-1 where there is no ship), with the number of
+    hits remaining before each ship sinks stored as a (K, number_ships) array.
+    All the coordinates used by this class start at 0.
+    """
+
+    def __init__(self,
+                 number_boards: int,
+                 rng: np.random.Generator,
+                 config: GameConfig = DEFAULT_CONFIG):
+        """
+        Creates number_boards boards with randomly placed ships (respecting the rule of Ship.is_near_ship).
+        :raise ValueError if the ships do not fit on the boards
+        """
+        self.number_boards = number_boards
+        self.size_x = config.size_x
+        self.size_y = config.size_y
+
+        # biggest ships first, they are the hardest to place
+        self.lengths_ships = np.array(config.get_list_lengths_ships())
+
+        self.array_ships = np.full((number_boards, self.size_y, self.size_x), -1, dtype=np.int16)
+        self.array_shots = np.zeros((number_boards, self.size_y, self.size_x), dtype=bool)
+        self.remaining_hits_per_ship = np.tile(self.lengths_ships, (number_boards, 1))
+        self.remaining_hits = np.full(number_boards, self.lengths_ships.sum())
+
+        self._place_ships(rng)
+
+    def _place_ships(self, rng: np.random.Generator) -> None:
+        # cells taken by a ship or near a ship, padded with one cell on each side so that halos never go out of bounds
+        array_blocked = np.zeros((self.number_boards, self.size_y + 2, self.size_x + 2), dtype=bool)
+
+        for index_ship, length in enumerate(self.lengths_ships):
+            offsets = np.arange(length)
+            indices_pending = np.arange(self.number_boards)
+
+            for _ in range(MAX_NUMBER_ATTEMPTS_PLACEMENT):
+                if not indices_pending.size:
+                    break
+
+                number_pending = indices_pending.size
+                is_vertical = rng.random(number_pending) < 0.5
+                xs_start = rng.integers(0, self.size_x - np.where(is_vertical, 0, length - 1))
+                ys_start = rng.integers(0, self.size_y - np.where(is_vertical, length - 1, 0))
+
+                xs = xs_start[:, None] + np.where(is_vertical[:, None], 0, offsets)
+                ys = ys_start[:, None] + np.where(is_vertical[:, None], offsets, 0)
+
+                is_free = ~array_blocked[indices_pending[:, None], ys + 1, xs + 1].any(axis=1)
+
+                indices_placed = indices_pending[is_free][:, None]
+                xs, ys = xs[is_free], ys[is_free]
+
+                self.array_ships[indices_placed, ys, xs] = index_ship
+                for dy in (-1, 0, 1):
+                    for dx in (-1, 0, 1):
+                        array_blocked[indices_placed, ys + 1 + dy, xs + 1 + dx] = True
+
+                indices_pending = indices_pending[~is_free]
+
+            if indices_pending.size:
+                raise ValueError(f"Could not place a ship of length {length} on some of the boards.")
+
+    def are_attacked_at(self,
+                        indices_boards: np.ndarray,
+                        xs: np.ndarray,
+                        ys: np.ndarray) -> tuple:
+        """
+        Each board indices_boards[i] receives an attack at the position (xs[i], ys[i]).
+        :return: a tuple of arrays of bool (is_ship_hit, has_ship_sunk), same meaning as in Board.is_attacked_at
+        """
+        self.array_shots[indices_boards, ys, xs] = True
+        indices_ships = self.array_ships[indices_boards, ys, xs]
+
+        is_ship_hit = indices_ships >= 0
+        indices_boards_hit = indices_boards[is_ship_hit]
+        indices_ships_hit = indices_ships[is_ship_hit]
+
+        self.remaining_hits_per_ship[indices_boards_hit, indices_ships_hit] -= 1
+        self.remaining_hits[indices_boards_hit] -= 1
+
+        has_ship_sunk = np.zeros_like(is_ship_hit)
+        has_ship_sunk[is_ship_hit] = self.remaining_hits_per_ship[indices_boards_hit, indices_ships_hit] == 0
+
+        return is_ship_hit, has_ship_sunk
+
+    def get_halos_ships(self, indices_boards: np.ndarray, indices_ships: np.ndarray) -> np.ndarray:
+        """
+        :param indices_boards: indices of the boards
+        :param indices_ships: index of a ship on each of these boards
+        :return: array of bool of shape (number of boards, size_y + 2, size_x + 2), True on the cells of the ship and
+        on the cells near it (corners included), padded with one cell on each side
+        """
+        is_ship = self.array_ships[indices_boards] == indices_ships[:, None, None]
+
+        halos = np.zeros((indices_boards.size, self.size_y + 2, self.size_x + 2), dtype=bool)
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                halos[:, dy:dy + self.size_y, dx:dx + self.size_x] |= is_ship
+        return halos
+
+    def have_no_ships_left(self, indices_boards: np.ndarray) -> np.ndarray:
+        """
+        :return: array of bool, True for the boards on which all the ships have sunk
+        """
+        return self.remaining_hits[indices_boards] == 0
+
+
+class BatchPolicy(object):
+    """
+    Abstract strategy choosing one cell to attack on each of the boards of a BatchBoards.
+    """
+
+    def __init__(self, boards: BatchBoards, rng: np.random.Generator):
+        self.boards = boards
+        self.rng = rng
+
+        # untried positions, padded with one cell on each side (always False) so that neighbours never go out of bounds
+        self.array_available = np.zeros((boards.number_boards, boards.size_y + 2, boards.size_x + 2), dtype=bool)
+        self.array_available[:, 1:-1, 1:-1] = True
+
+    def select_coordinates_to_attack(self, indices_boards: np.ndarray) -> tuple:
+        """
+        :param indices_boards: indices of the boards under attack
+        :return: a tuple of arrays (xs, ys) of the coordinates of the attacks
+        """
+        raise NotImplementedError
+
+    def update(self,
+               indices_boards: np.ndarray,
+               xs: np.ndarray,
+               ys: np.ndarray,
+               is_ship_hit: np.ndarray,
+               has_ship_sunk: np.ndarray) -> None:
+        """
+        Informs the policy of the outcome of the attacks it selected.
+        """
+        pass
+
+    def _discard_near_ships_sunk(self,
+                                 indices_boards: np.ndarray,
+                                 xs: np.ndarray,
+                                 ys: np.ndarray,
+                                 has_ship_sunk: np.ndarray) -> None:
+        """
+        The positions near the ships which have just sunk are not available anymore (no ship can be there).
+        """
+        if not has_ship_sunk.any():
+            return
+
+        indices_sunk = indices_boards[has_ship_sunk]
+        indices_ships = self.boards.array_ships[indices_sunk, ys[has_ship_sunk], xs[has_ship_sunk]]
+        self.array_available[indices_sunk] &= ~self.boards.get_halos_ships(indices_sunk, indices_ships)
+
+
+class BatchPolicyRandom(BatchPolicy):
+    """
+    Batched equivalent of PlayerRandom: attacks uniformly at random a position which has not been attacked yet and is
+    not near a ship previously sunk.
+    The order of the attacks is drawn for all the boards at once, the positions near the ships sunk are skipped.
+    """
+
+    def __init__(self, boards: BatchBoards, rng: np.random.Generator):
+        super().__init__(boards, rng)
+
+        number_cells = boards.size_x * boards.size_y
+        self.array_order_cells = np.argsort(rng.random((boards.number_boards, number_cells)), axis=1)
+        self.number_shots = np.zeros(boards.number_boards, dtype=np.int64)
+
+    def select_coordinates_to_attack(self, indices_boards: np.ndarray) -> tuple:
+        size_x = self.boards.size_x
+        cells = self.array_order_cells[indices_boards, self.number_shots[indices_boards]]
+        self.number_shots[indices_boards] += 1
+
+        # skips the positions of the order which are not available anymore
+        is_skipped = ~self.array_available[indices_boards, cells // size_x + 1, cells % size_x + 1]
+        while is_skipped.any():
+            indices_skipped = indices_boards[is_skipped]
+            cells[is_skipped] = self.array_order_cells[indices_skipped, self.number_shots[indices_skipped]]
+            self.number_shots[indices_skipped] += 1
+            is_skipped[is_skipped] = ~self.array_available[indices_skipped, cells[is_skipped] // size_x + 1,
+                                                           cells[is_skipped] % size_x + 1]
+
+        return cells % size_x, cells // size_x
+
+    def update(self,
+               indices_boards: np.ndarray,
+               xs: np.ndarray,
+               ys: np.ndarray,
+               is_ship_hit: np.ndarray,
+               has_ship_sunk: np.ndarray) -> None:
+        self.array_available[indices_boards, ys + 1, xs + 1] = False
+        self._discard_near_ships_sunk(indices_boards, xs, ys, has_ship_sunk)
+
+
+class BatchPolicyHuntTarget(BatchPolicy):
+    """
+    Batched equivalent of PlayerAutomatic:
+    - the diagonal neighbours of a hit are never attacked (no ship can be there)
+    - after a hit that did not sink a ship, attacks one of the untried neighbours of that hit, or a random untried
+    position, all these choices being equally likely
+    - otherwise, attacks a random untried position
+    - if is_excluding_sunk_halos, the positions near a ship sunk are never attacked
+    """
+
+    def __init__(self, boards: BatchBoards, rng: np.random.Generator, is_excluding_sunk_halos: bool = False):
+        super().__init__(boards, rng)
+
+        self.is_excluding_sunk_halos = is_excluding_sunk_halos
+        self.is_targeting = np.zeros(boards.number_boards, dtype=bool)
+        self.xs_last_hit = np.zeros(boards.number_boards, dtype=np.int64)
+        self.ys_last_hit = np.zeros(boards.number_boards, dtype=np.int64)
+
+    def _select_random_available_cells(self, indices_boards: np.ndarray) -> tuple:
+        array_available = self.array_available[indices_boards, 1:-1, 1:-1].reshape(indices_boards.size, -1)
+
+        keys = self.rng.random(array_available.shape)
+        keys[~array_available] = -1.
+        cells = keys.argmax(axis=1)
+
+        return cells % self.boards.size_x, cells // self.boards.size_x
+
+    def select_coordinates_to_attack(self, indices_boards: np.ndarray) -> tuple:
+        xs, ys = self._select_random_available_cells(indices_boards)
+
+        is_targeting = self.is_targeting[indices_boards]
+        if not is_targeting.any():
+            return xs, ys
+
+        indices_targeting = indices_boards[is_targeting]
+        xs_hit = self.xs_last_hit[indices_targeting]
+        ys_hit = self.ys_last_hit[indices_targeting]
+
+        # 4 neighbours of the last hit + 1 slot for the random position, which is always valid
+        is_valid = np.ones((indices_targeting.size, 5), dtype=bool)
+        is_valid[:, :4] = self.array_available[indices_targeting[:, None],
+                                               ys_hit[:, None] + 1 + NEIGHBOURS_DY,
+                                               xs_hit[:, None] + 1 + NEIGHBOURS_DX]
+
+        keys = self.rng.random(is_valid.shape)
+        keys[~is_valid] = -1.
+        slots = keys.argmax(axis=1)
+
+        is_neighbour = slots < 4
+        slots_neighbours = slots[is_neighbour]
+
+        xs_targeting, ys_targeting = xs[is_targeting], ys[is_targeting]
+        xs_targeting[is_neighbour] = xs_hit[is_neighbour] + NEIGHBOURS_DX[slots_neighbours]
+        ys_targeting[is_neighbour] = ys_hit[is_neighbour] + NEIGHBOURS_DY[slots_neighbours]
+        xs[is_targeting], ys[is_targeting] = xs_targeting, ys_targeting
+
+        return xs, ys
+
+    def update(self,
+               indices_boards: np.ndarray,
+               xs: np.ndarray,
+               ys: np.ndarray,
+               is_ship_hit: np.ndarray,
+               has_ship_sunk: np.ndarray) -> None:
+        self.array_available[indices_boards, ys + 1, xs + 1] = False
+
+        indices_hit = indices_boards[is_ship_hit][:, None]
+        self.array_available[indices_hit,
+                             ys[is_ship_hit][:, None] + 1 + DIAGONALS_DY,
+                             xs[is_ship_hit][:, None] + 1 + DIAGONALS_DX] = False
+        if self.is_excluding_sunk_halos:
+            self._discard_near_ships_sunk(indices_boards, xs, ys, has_ship_sunk)
+
+        self.is_targeting[indices_boards] = is_ship_hit & ~has_ship_sunk
+        self.xs_last_hit[indices_boards] = xs
+        self.ys_last_hit[indices_boards] = ys
+
+
+DICT_POLICIES = {
+    POLICY_RANDOM: BatchPolicyRandom,
+    POLICY_HUNT_TARGET: BatchPolicyHuntTarget,
+    POLICY_HUNT_TARGET_SUNK_HALOS: partial(BatchPolicyHuntTarget, is_excluding_sunk_halos=True),
+}
+
+
+class BatchShootingRecord(object):
+    """
+    Result of a policy shooting at all the boards of a BatchBoards until all their ships have sunk.
+    """
+
+    def __init__(self, number_boards: int, number_cells: int):
+        self.number_shots = np.zeros(number_boards, dtype=np.int64)
+        self.number_misses = np.zeros(number_boards, dtype=np.int64)
+
+        # [k, j] -> number of shots fired on board k when the j-th miss (starting at 0) happened
+        self.shots_at_miss = np.zeros((number_boards, number_cells), dtype=np.int64)
+
+    def get_number_shots_after_turns(self, indices_boards: np.ndarray, number_turns: np.ndarray) -> np.ndarray:
+        """
+        :return: the number of shots fired on the boards indices_boards when number_turns complete turns were
+        played. Every complete turn ends with a miss.
+        """
+        number_shots = self.shots_at_miss[indices_boards, np.maximum(number_turns - 1, 0)]
+        return np.where(number_turns > 0, number_shots, 0)
+
+
+def shoot_until_no_ships_left(boards: BatchBoards, policy: BatchPolicy) -> BatchShootingRecord:
+    """
+    Every step, the policy attacks each of the boards that still have ships, until no ships are left.
+    :return: the record of the number of shots and misses on each board
+    """
+    record = BatchShootingRecord(boards.number_boards, boards.size_x * boards.size_y)
+    indices_active = np.arange(boards.number_boards)
+
+    while indices_active.size:
+        xs, ys = policy.select_coordinates_to_attack(indices_active)
+        is_ship_hit, has_ship_sunk = boards.are_attacked_at(indices_active, xs, ys)
+        policy.update(indices_active, xs, ys, is_ship_hit, has_ship_sunk)
+
+        record.number_shots[indices_active] += 1
+
+        indices_missed = indices_active[~is_ship_hit]
+        record.shots_at_miss[indices_missed, record.number_misses[indices_missed]] = record.number_shots[indices_missed]
+        record.number_misses[indices_missed] += 1
+
+        indices_active = indices_active[~boards.have_no_ships_left(indices_active)]
+
+    return record
+
+
+class BatchResults(object):
+    """
+    Results of the games of a BatchGame, as arrays with one element per game.
+    """
+
+    def __init__(self,
+                 is_player_1_starting: np.ndarray,
+                 is_player_1_winner: np.ndarray,
+                 number_shots_player_1: np.ndarray,
+                 number_shots_player_2: np.ndarray):
+        self.is_player_1_starting = is_player_1_starting
+        self.is_player_1_winner = is_player_1_winner
+        self.number_shots_player_1 = number_shots_player_1
+        self.number_shots_player_2 = number_shots_player_2
+
+    def get_tournament_results(self) -> TournamentResults:
+        """
+        :return: the same aggregates as the ones computed by battleship.tournament.run_tournament
+        """
+        results = TournamentResults()
+        number_shots_winner = np.where(self.is_player_1_winner, self.number_shots_player_1, self.number_shots_player_2)
+
+        results.number_games = int(self.is_player_1_winner.size)
+        results.number_wins_player_1 = int(self.is_player_1_winner.sum())
+        results.number_wins_player_2 = results.number_games - results.number_wins_player_1
+
+        for is_player_1_winner, histogram in ((True, results.histogram_shots_to_win_player_1),
+                                              (False, results.histogram_shots_to_win_player_2)):
+            counts = np.bincount(number_shots_winner[self.is_player_1_winner == is_player_1_winner])
+            histogram.update({int(number_shots): int(count)
+                              for number_shots, count in enumerate(counts) if count})
+
+        return results
+
+
+class BatchGame(object):
+    """
+    K games simulated at once between two batched policies (see DICT_POLICIES).
+    The general rules are the same as in Game: the first player is chosen randomly, and a player who hits a ship
+    plays another time.
+    """
+
+    def __init__(self,
+                 number_games: int,
+                 policy_player_1: str = POLICY_HUNT_TARGET,
+                 policy_player_2: str = POLICY_RANDOM,
+                 seed: int = None,
+                 config: GameConfig = DEFAULT_CONFIG):
+        """
+        :param number_games: number of games K simulated at once
+        :param policy_player_1: name of the policy of the first player (key of DICT_POLICIES)
+        :param policy_player_2: name of the policy of the second player
+        :param seed: seed of the NumPy generator, the results only depend on it
+        :param config: config of the boards of both players
+        :raise ValueError if a policy does not exist
+        """
+        for policy in (policy_player_1, policy_player_2):
+            if policy not in DICT_POLICIES:
+                raise ValueError(f"Unknown policy '{policy}', it should be one of {sorted(DICT_POLICIES)}")
+
+        self.number_games = number_games
+        self.policy_player_1 = policy_player_1
+        self.policy_player_2 = policy_player_2
+        self.rng = np.random.default_rng(seed)
+
+        self.boards_player_1 = BatchBoards(number_games, self.rng, config)
+        self.boards_player_2 = BatchBoards(number_games, self.rng, config)
+
+    def play(self) -> BatchResults:
+        """
+        Simulates all the games.
+        :return: the results of each game
+        """
+        record_player_1 = shoot_until_no_ships_left(self.boards_player_2,
+                                                    DICT_POLICIES[self.policy_player_1](self.boards_player_2, self.rng))
+        record_player_2 = shoot_until_no_ships_left(self.boards_player_1,
+                                                    DICT_POLICIES[self.policy_player_2](self.boards_player_1, self.rng))
+
+        is_player_1_starting = self.rng.random(self.number_games) < 0.5
+
+        # a player sinks the last ship during its turn number (number of misses), turns being counted from 0
+        turn_end_player_1 = record_player_1.number_misses
+        turn_end_player_2 = record_player_2.number_misses
+        is_player_1_winner = np.where(is_player_1_starting,
+                                      turn_end_player_1 <= turn_end_player_2,
+                                      turn_end_player_1 < turn_end_player_2)
+
+        # number of complete turns played by the loser before the end of the game
+        number_turns_loser = np.where(is_player_1_winner, turn_end_player_1, turn_end_player_2) \
+                             + (is_player_1_winner != is_player_1_starting)
+
+        indices_games = np.arange(self.number_games)
+        number_shots_player_1 = np.where(is_player_1_winner,
+                                         record_player_1.number_shots,
+                                         record_player_1.get_number_shots_after_turns(indices_games,
+                                                                                      number_turns_loser))
+        number_shots_player_2 = np.where(is_player_1_winner,
+                                         record_player_2.get_number_shots_after_turns(indices_games,
+                                                                                      number_turns_loser),
+                                         record_player_2.number_shots)
+
+        return BatchResults(is_player_1_starting, is_player_1_winner, number_shots_player_1, number_shots_player_2)
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+
+    batch_game = BatchGame(number_games=10000, seed=42)
+    batch_results = batch_game.play()
+    print(batch_results.get_tournament_results())
@@ -0,0 +1,301 @@
+"""
+Benchmarks of the hot paths of the game, on several board sizes and fleet compositions.
+
+Usage:
+    python -m battleship.benchmark --output results.json
+    python -m battleship.benchmark --output results.json --baseline baseline.json
+    python -m battleship.benchmark --memory --benchmark board_automatic_generation
+
+Each benchmark is run several times, each run being seeded, so that the same work is measured from one run of the
+suite to the next. The results are written as JSON, and compared to a baseline file (produced by a previous run of
+the suite) if one is given: the change of each benchmark is reported as a percentage.
+With --memory, the memory used per board kept alive (new, or after all its ships have sunk) is measured as well.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from itertools import combinations
+from typing import Callable, Dict, List, Tuple
+
+from battleship.board import Board, BoardAutomatic
+from battleship.config import GameConfig
+from battleship.game import Game
+from battleship.player import PlayerAutomatic, PlayerProbabilistic, PlayerRandom
+
+DICT_CONFIGS = {
+    '10x10': GameConfig(10, 10, {1: 1, 2: 1, 3: 1, 4: 1, 5: 1}),
+    '20x20': GameConfig(20, 20, {2: 3, 3: 2, 4: 2, 5: 1}),
+    '30x30': GameConfig(30, 30, {1: 4, 2: 4, 3: 3, 4: 2, 5: 2}),
+}
+
+# number of times the work of a benchmark is repeated inside a single run, so that a run lasts long enough
+NUMBER_ITERATIONS_PER_RUN = 20
+
+# number of boards kept alive at the same time to measure the memory used per board
+NUMBER_BOARDS_MEMORY = 2000
+
+# a benchmark gets a config, plays with the random module (already seeded) and returns
+# the tuple (time spent in the measured code in seconds, number of operations measured)
+Benchmark = Callable[[GameConfig], Tuple[float, int]]
+
+
+def benchmark_ship_get_all_coordinates(config: GameConfig) -> Tuple[float, int]:
+    list_ships = BoardAutomatic(config).list_ships
+
+    time_start = time.perf_counter()
+    for _ in range(NUMBER_ITERATIONS_PER_RUN):
+        for ship in list_ships:
+            ship.get_all_coordinates()
+    return time.perf_counter() - time_start, NUMBER_ITERATIONS_PER_RUN * len(list_ships)
+
+
+def benchmark_ship_is_near_ship(config: GameConfig) -> Tuple[float, int]:
+    list_pairs_ships = list(combinations(BoardAutomatic(config).list_ships, 2))
+
+    time_start = time.perf_counter()
+    for _ in range(NUMBER_ITERATIONS_PER_RUN):
+        for ship, other_ship in list_pairs_ships:
+            ship.is_near_ship(other_ship)
+    return time.perf_counter() - time_start, NUMBER_ITERATIONS_PER_RUN * len(list_pairs_ships)
+
+
+def benchmark_board_are_some_ships_too_close(config: GameConfig) -> Tuple[float, int]:
+    board = BoardAutomatic(config)
+
+    time_start = time.perf_counter()
+    for _ in range(NUMBER_ITERATIONS_PER_RUN):
+        board.are_some_ships_too_close_from_each_other()
+    return time.perf_counter() - time_start, NUMBER_ITERATIONS_PER_RUN
+
+
+def benchmark_board_automatic_generation(config: GameConfig) -> Tuple[float, int]:
+    time_start = time.perf_counter()
+    for _ in range(NUMBER_ITERATIONS_PER_RUN):
+        BoardAutomatic(config)
+    return time.perf_counter() - time_start, NUMBER_ITERATIONS_PER_RUN
+
+
+def benchmark_board_is_attacked_at(config: GameConfig) -> Tuple[float, int]:
+    list_boards = [Board(BoardAutomatic(config).list_ships, config) for _ in range(NUMBER_ITERATIONS_PER_RUN)]
+    list_coordinates = [(coord_x, coord_y)
+                        for coord_x in range(1, config.size_x + 1)
+                        for coord_y in range(1, config.size_y + 1)]
+    random.shuffle(list_coordinates)
+
+    time_start = time.perf_counter()
+    for board in list_boards:
+        for coord_x, coord_y in list_coordinates:
+            board.is_attacked_at(coord_x, coord_y)
+    return time.perf_counter() - time_start, len(list_boards) * len(list_coordinates)
+
+
+def _get_benchmark_select_coordinates_to_attack(class_player) -> Benchmark:
+    def benchmark_select_coordinates_to_attack(config: GameConfig) -> Tuple[float, int]:
+        player = class_player(config=config)
+        opponent = PlayerRandom(config=config)
+
+        duration = 0.
+        number_attacks = 0
+        while not opponent.has_lost():
+            time_start = time.perf_counter()
+            coord_x, coord_y = player.select_coordinates_to_attack(opponent)
+            duration += time.perf_counter() - time_start
+
+            player.update_after_attack(coord_x, coord_y, *opponent.is_attacked_at(coord_x, coord_y))
+            number_attacks += 1
+
+        return duration, number_attacks
+
+    return benchmark_select_coordinates_to_attack
+
+
+def benchmark_game_play_silent(config: GameConfig) -> Tuple[float, int]:
+    list_games = [Game(PlayerAutomatic(config=config), PlayerRandom(config=config), verbose=False)
+                  for _ in range(max(NUMBER_ITERATIONS_PER_RUN // 4, 1))]
+
+    time_start = time.perf_counter()
+    for game in list_games:
+        game.play()
+    return time.perf_counter() - time_start, len(list_games)
+
+
+DICT_BENCHMARKS = {
+    'ship_get_all_coordinates': benchmark_ship_get_all_coordinates,
+    'ship_is_near_ship': benchmark_ship_is_near_ship,
+    'board_are_some_ships_too_close_from_each_other': benchmark_board_are_some_ships_too_close,
+    'board_automatic_generation': benchmark_board_automatic_generation,
+    'board_is_attacked_at': benchmark_board_is_attacked_at,
+    'player_random_select_coordinates_to_attack': _get_benchmark_select_coordinates_to_attack(PlayerRandom),
+    'player_automatic_select_coordinates_to_attack': _get_benchmark_select_coordinates_to_attack(PlayerAutomatic),
+    'player_probabilistic_select_coordinates_to_attack':
+        _get_benchmark_select_coordinates_to_attack(PlayerProbabilistic),
+    'game_play_silent': benchmark_game_play_silent,
+}
+
+
+def run_benchmark(benchmark: Benchmark, config: GameConfig, number_runs: int, seed: int) -> Dict[str, float]:
+    """
+    :return: the statistics over the runs of the time per operation, in nanoseconds
+    """
+    list_ns_per_operation = []
+    for index_run in range(number_runs):
+        random.seed(f"{seed}:{index_run}")
+        duration, number_operations = benchmark(config)
+        list_ns_per_operation.append(duration * 1e9 / max(number_operations, 1))
+
+    return {
+        'median_ns_per_operation': statistics.median(list_ns_per_operation),
+        'min_ns_per_operation': min(list_ns_per_operation),
+        'number_runs': number_runs,
+    }
+
+
+def measure_bytes_per_board(config: GameConfig, number_boards: int, are_boards_played: bool) -> float:
+    """
+    :param are_boards_played: if True, all the ships of each board are sunk before measuring
+    :return: the number of bytes allocated per board kept alive, measured with tracemalloc
+    """
+    BoardAutomatic(config)  ## the tables shared by all the boards of that config are built before measuring
+    list_coordinates = [(coord_x, coord_y)
+                        for coord_x in range(1, config.size_x + 1)
+                        for coord_y in range(1, config.size_y + 1)]
+    random.shuffle(list_coordinates)
+
+    tracemalloc.start()
+    size_before, _ = tracemalloc.get_traced_memory()
+
+    list_boards = [BoardAutomatic(config) for _ in range(number_boards)]
+    if are_boards_played:
+        for board in list_boards:
+            for coord_x, coord_y in list_coordinates:
+                board.is_attacked_at(coord_x, coord_y)
+                if board.has_no_ships_left():
+                    break
+
+    size_after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (size_after - size_before) / number_boards
+
+
+def run_memory_suite(seed: int = 0, list_names_configs: List[str] = None) -> Dict[str, dict]:
+    """
+    :return: dict: name of the measure -> {'bytes_per_board': ...}
+    """
+    dict_results = {}
+    for name_config in list_names_configs or DICT_CONFIGS:
+        for name_measure, are_boards_played in (('memory_board_new', False), ('memory_board_played', True)):
+            random.seed(f"{seed}:{name_measure}")
+            dict_results[f"{name_measure}[{name_config}]"] = {
+                'bytes_per_board': measure_bytes_per_board(DICT_CONFIGS[name_config], NUMBER_BOARDS_MEMORY,
+                                                           are_boards_played),
+            }
+    return dict_results
+
+
+def run_suite(number_runs: int = 5,
+              seed: int = 0,
+              list_names_benchmarks: List[str] = None,
+              list_names_configs: List[str] = None) -> dict:
+    """
+    :param number_runs: number of seeded runs of each benchmark
+    :param seed: seed of the suite
+    :param list_names_benchmarks: names of the benchmarks to run (keys of DICT_BENCHMARKS), all of them if None
+    :param list_names_configs: names of the configs to use (keys of DICT_CONFIGS), all of them if None
+    :return: the results of the suite, as a dict that can be serialized as JSON
+    """
+    results = {
+        'metadata': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'number_runs': number_runs,
+        },
+        'benchmarks': {},
+    }
+
+    for name_benchmark in list_names_benchmarks or DICT_BENCHMARKS:
+        for name_config in list_names_configs or DICT_CONFIGS:
+            results['benchmarks'][f"{name_benchmark}[{name_config}]"] = run_benchmark(DICT_BENCHMARKS[name_benchmark],
+                                                                                     DICT_CONFIGS[name_config],
+                                                                                     number_runs,
+                                                                                     seed)
+
+    return results
+
+
+def compare_to_baseline(results: dict, results_baseline: dict) -> Dict[str, float]:
+    """
+    :return: dict: name of the benchmark -> change of the median time per operation (or of the memory per board)
+    compared to the baseline, in percent (positive means slower, or bigger). Benchmarks missing from the baseline are
+    ignored.
+    """
+    dict_changes = {}
+    for name_section, name_value in (('benchmarks', 'median_ns_per_operation'), ('memory', 'bytes_per_board')):
+        dict_results_baseline = results_baseline.get(name_section, {})
+        for name, result in results.get(name_section, {}).items():
+            if name not in dict_results_baseline:
+                continue
+            value_baseline = dict_results_baseline[name][name_value]
+            dict_changes[name] = 100. * (result[name_value] - value_baseline) / value_baseline
+    return dict_changes
+
+
+def print_results(results: dict, dict_changes: Dict[str, float] = None) -> None:
+    list_lines = [(name, f"{result['median_ns_per_operation']:>14.0f} ns/op")
+                  for name, result in results['benchmarks'].items()]
+    list_lines += [(name, f"{result['bytes_per_board']:>14.0f} B/board")
+                   for name, result in results.get('memory', {}).items()]
+
+    width_name = max(len(name) for name, _ in list_lines)
+    for name, value in list_lines:
+        line = f"{name:<{width_name}}  {value}"
+        if dict_changes is not None and name in dict_changes:
+            line += f"  {dict_changes[name]:>+8.1f}%"
+        print(line)
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the hot paths of the battleship game.")
+    parser.add_argument('--output', help="path of the JSON file where the results are written")
+    parser.add_argument('--baseline', help="path of a JSON file of results to compare to")
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help="exit with an error if a benchmark is slower than the baseline by more than this "
+                             "percentage")
+    parser.add_argument('--runs', type=int, default=5, help="number of seeded runs of each benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--benchmark', action='append', choices=sorted(DICT_BENCHMARKS),
+                        help="benchmark to run (can be repeated), all of them by default")
+    parser.add_argument('--config', action='append', choices=sorted(DICT_CONFIGS),
+                        help="config to use (can be repeated), all of them by default")
+    parser.add_argument('--memory', action='store_true', help="also measure the memory used per board")
+    arguments = parser.parse_args(arguments)
+
+    results = run_suite(arguments.runs, arguments.seed, arguments.benchmark, arguments.config)
+    if arguments.memory:
+        results['memory'] = run_memory_suite(arguments.seed, arguments.config)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file_output:
+            json.dump(results, file_output, indent=2, sort_keys=True)
+
+    dict_changes = None
+    if arguments.baseline:
+        with open(arguments.baseline) as file_baseline:
+            dict_changes = compare_to_baseline(results, json.load(file_baseline))
+
+    print_results(results, dict_changes)
+
+    if arguments.max_regression is not None and dict_changes \
+            and max(dict_changes.values()) > arguments.max_regression:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
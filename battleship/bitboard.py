@@ -0,0 +1,165 @@
+from typing import List, Tuple
+
+from battleship.board import Board, BoardAutomatic
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.placement import get_index_cell, get_mask_from_coordinates
+from battleship.ship import Ship
+
+
+class ShipBitboard(Ship):
+    """
+    Ship storing its positions and its damages as bitboards, so that hit tests and sink checks are O(1).
+    The damages of Ship are kept up to date for the callers that use them (e.g. printing the board).
+    """
+    __slots__ = ('size_x', 'mask', 'mask_damages')
+
+    def __init__(self,
+                 coord_start: tuple,
+                 coord_end: tuple,
+                 size_x: int = DEFAULT_CONFIG.size_x):
+        """
+        :param coord_start: tuple of 2 positive integers representing the starting position of the Ship on the board
+        :param coord_end: tuple of 2 positive integers representing the ending position of the Ship on the board
+        :param size_x: width of the board the ship is placed on (needed to compute the bitboards)
+        :raise ValueError: if the ship is neither horizontal nor vertical
+        """
+        super().__init__(coord_start, coord_end)
+
+        self.size_x = size_x
+        self.mask = get_mask_from_coordinates(self.set_all_coordinates, size_x)
+        self.mask_damages = 0
+
+    @classmethod
+    def get_ship_bitboard_from_ship(cls, ship: Ship, size_x: int = DEFAULT_CONFIG.size_x) -> 'ShipBitboard':
+        """
+        :return: a ShipBitboard at the same position as ship, with the same damages
+        """
+        ship_bitboard = cls(coord_start=(ship.x_start, ship.y_start),
+                            coord_end=(ship.x_end, ship.y_end),
+                            size_x=size_x)
+
+        for coord_x, coord_y in ship.set_coordinates_damages:
+            ship_bitboard.gets_damage_at(coord_x, coord_y)
+
+        return ship_bitboard
+
+    def gets_damage_at(self,
+                       coord_damage_x: int,
+                       coord_damage_y: int
+                       ) -> None:
+        """
+        The ship gets damaged at the point (coord_damage_x, coord_damage_y)
+        :param coord_damage_x: integer representing the projection of a coordinate on the x-axis
+        :param coord_damage_y: integer representing the projection of a coordinate on the y-axis
+        """
+        if self.is_on_coordinate(coord_damage_x, coord_damage_y):
+            self.mask_damages |= 1 << get_index_cell(coord_damage_x, coord_damage_y, self.size_x)
+            super().gets_damage_at(coord_damage_x, coord_damage_y)
+
+    def has_sunk(self) -> bool:
+        """
+        :return: True if and only if ship is damaged at all its positions
+        """
+        return self.mask_damages == self.mask
+
+
+class BoardBitboard(Board):
+    """
+    Board storing the occupancy, the hits and the misses as bitboards (one bit per cell).
+    It has the same interface as Board, hit tests, sink checks and "all ships sunk" are O(1).
+    """
+
+    def __init__(self,
+                 list_ships: List[Ship],
+                 config: GameConfig = None):
+        """
+        :param list_ships: list of ships for the board. The ships which are not ShipBitboard are converted.
+        :param config: size of the board and number of ships per length, DEFAULT_CONFIG if None
+        :raise ValueError if the list of ships is in contradiction with config.dict_number_ships_per_length.
+        :raise ValueError if there are some ships that are too close from each other
+        """
+        if config is None:
+            config = DEFAULT_CONFIG
+
+        list_ships = [ship if isinstance(ship, ShipBitboard) and ship.size_x == config.size_x
+                      else ShipBitboard.get_ship_bitboard_from_ship(ship, size_x=config.size_x)
+                      for ship in list_ships]
+
+        super().__init__(list_ships, config)
+
+        self.mask_hits = 0
+        self.mask_misses = 0
+        self.mask_occupancy = 0
+
+        # index of a cell -> ship at that cell (None if there is no ship)
+        self.list_ships_per_cell = [None] * (self.config.size_x * self.config.size_y)
+
+        for ship in self.list_ships:
+            self.mask_occupancy |= ship.mask
+            self.mask_hits |= ship.mask_damages
+            for coord_x, coord_y in ship.set_all_coordinates:
+                self.list_ships_per_cell[get_index_cell(coord_x, coord_y, self.config.size_x)] = ship
+
+    def has_no_ships_left(self) -> bool:
+        """
+        :return: True if and only if all the ships on the board have sunk.
+        """
+        return (self.mask_hits & self.mask_occupancy) == self.mask_occupancy
+
+    def is_attacked_at(self, coord_x: int, coord_y: int) -> Tuple[bool, bool]:
+        """
+        The board receives an attack at the position (coord_x, coord_y).
+        - if there is no ship at that position -> nothing happens
+        - if there is a ship at that position -> it is damaged at that coordinate
+
+        :param coord_x: integer representing the projection of a coordinate on the x-axis
+        :param coord_y: integer representing the projection of a coordinate on the y-axis
+        :return: a tuple of bool variables (is_ship_hit, has_ship_sunk) where:
+                    - is_ship_hit is True if and only if the attack was performed at a set of coordinates where an
+                    opponent's ship is.
+                    - has_ship_sunk is True if and only if that attack made the ship sink.
+        """
+        self.record_shot(coord_x, coord_y)
+
+        if not (1 <= coord_x <= self.config.size_x and 1 <= coord_y <= self.config.size_y):
+            return False, False
+
+        index_cell = get_index_cell(coord_x, coord_y, self.config.size_x)
+        ship = self.list_ships_per_cell[index_cell]
+
+        if ship is None:
+            self.mask_misses |= 1 << index_cell
+            return False, False
+
+        self.mask_hits |= 1 << index_cell
+        ship.gets_damage_at(coord_x, coord_y)
+
+        return True, ship.has_sunk()
+
+
+class BoardBitboardAutomatic(BoardAutomatic, BoardBitboard):
+    """
+    Bitboard board whose ships are automatically (randomly) generated, like BoardAutomatic.
+    """
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+
+    list_ships = [
+        Ship(coord_start=(1, 1), coord_end=(1, 1)),
+        Ship(coord_start=(3, 3), coord_end=(3, 4)),
+        Ship(coord_start=(5, 3), coord_end=(5, 5)),
+        Ship(coord_start=(7, 1), coord_end=(7, 4)),
+        Ship(coord_start=(9, 3), coord_end=(9, 7)),
+    ]
+
+    board = BoardBitboard(list_ships)
+    print(f'is attacked at (1, 1)?  {board.is_attacked_at(1, 1)}')
+    print(f'is attacked at (3, 3)?  {board.is_attacked_at(3, 3)}')
+    print(f'is attacked at (10, 9)?  {board.is_attacked_at(10, 9)}')
+    print(f'no ships left? {board.has_no_ships_left()}')
+    board.print_board_with_ships_positions()
+
+    board_automatic = BoardBitboardAutomatic()
+    board_automatic.print_board_with_ships_positions()
@@ -1,45 +1,42 @@
+import random
 from typing import List, Tuple
 
+from battleship.config import GameConfig, DEFAULT_CONFIG
 from battleship.ship import Ship
+from battleship.placement import get_placement_table
+from battleship.render import BoardRenderer, OFFSET_UPPER_CASE_CHAR_CONVERSION
 
-from itertools import combinations, permutations
-
-from random import randint, choice
-
-OFFSET_UPPER_CASE_CHAR_CONVERSION = 64
+from itertools import combinations
 
 class Board(object):
     """
     Class representing the board of the player. Interface between the player and its ships.
+    The size of the board and the ships expected on it are given by its GameConfig.
     """
-    SIZE_X = 10  # length of the rectangular board, along the x axis
-    SIZE_Y = 10  # length of the rectangular board, along the y axis
-
-    # dict: length -> number of ships of that length
-    DICT_NUMBER_SHIPS_PER_LENGTH = {1: 1,
-                                    2: 1,
-                                    3: 1,
-                                    4: 1,
-                                    5: 1}
 
     def __init__(self,
-                 list_ships: List[Ship]):
+                 list_ships: List[Ship],
+                 config: GameConfig = None):
         """
         :param list_ships: list of ships for the board.
-        :raise ValueError if the list of ships is in contradiction with Board.DICT_NUMBER_SHIPS_PER_LENGTH.
+        :param config: size of the board and number of ships per length, DEFAULT_CONFIG if None
+        :raise ValueError if the list of ships is in contradiction with config.dict_number_ships_per_length.
         :raise ValueError if there are some ships that are too close from each other
         """
 
+        self.config = config if config is not None else DEFAULT_CONFIG
         self.list_ships = list_ships
         self.set_coordinates_previous_shots = set()
+        self.list_coordinates_previous_shots = []  # same shots, in the order they were received
+        self.dict_renderers = {}
         self.ship_lengths = [ship.length() for ship in self.list_ships]
 
         if not self.lengths_of_ships_correct():
-            total_number_of_ships = sum(self.DICT_NUMBER_SHIPS_PER_LENGTH.values())
+            total_number_of_ships = sum(self.config.dict_number_ships_per_length.values())
 
             error_message = f"There should be {total_number_of_ships} ships in total:\n"
 
-            for length_ship, number_ships in self.DICT_NUMBER_SHIPS_PER_LENGTH.items():
+            for length_ship, number_ships in self.config.dict_number_ships_per_length.items():
                 error_message += f" - {number_ships} of length {length_ship}\n"
 
             raise ValueError(error_message)
@@ -47,6 +44,27 @@ class Board(object):
         if self.are_some_ships_too_close_from_each_other():
             raise ValueError("There are some ships that are too close from each other.")
 
+    @property
+    def SIZE_X(self) -> int:
+        """
+        :return: length of the rectangular board, along the x axis
+        """
+        return self.config.size_x
+
+    @property
+    def SIZE_Y(self) -> int:
+        """
+        :return: length of the rectangular board, along the y axis
+        """
+        return self.config.size_y
+
+    @property
+    def DICT_NUMBER_SHIPS_PER_LENGTH(self) -> dict:
+        """
+        :return: dict: length -> number of ships of that length
+        """
+        return self.config.dict_number_ships_per_length
+
     def has_no_ships_left(self) -> bool:
         """
         :return: True if and only if all the ships on the board have sunk.
@@ -67,6 +85,8 @@ class Board(object):
                     - has_ship_sunk is True if and only if that attack made the ship sink.
         """
 
+        self.record_shot(coord_x, coord_y)
+
         is_ship_hit = False
         has_ship_sunk = False
         for ship in self.list_ships:
@@ -78,75 +98,39 @@ class Board(object):
 
         return(is_ship_hit, has_ship_sunk)
 
+    def record_shot(self, coord_x: int, coord_y: int) -> None:
+        """
+        Remembers that the board received an attack at the position (coord_x, coord_y).
+        """
+        self.set_coordinates_previous_shots.add((coord_x, coord_y))
+        self.list_coordinates_previous_shots.append((coord_x, coord_y))
 
-    def print_board_with_ships_positions(self) -> None:
-        array_board = [[' ' for _ in range(self.SIZE_X)] for _ in range(self.SIZE_Y)]
-
-        for x_shot, y_shot in self.set_coordinates_previous_shots:
-            array_board[y_shot - 1][x_shot - 1] = 'O'
-
-        for ship in self.list_ships:
-            if ship.has_sunk():
-                for x_ship, y_ship in ship.set_all_coordinates:
-                    array_board[y_ship - 1][x_ship - 1] = '$'
-                continue
-
-            for x_ship, y_ship in ship.set_all_coordinates:
-                array_board[y_ship - 1][x_ship - 1] = 'S'
-
-            for x_ship, y_ship in ship.set_coordinates_damages:
-                array_board[y_ship - 1][x_ship - 1] = 'X'
-
-        board_str = self._get_board_string_from_array_chars(array_board)
 
-        print(board_str)
+    def print_board_with_ships_positions(self) -> None:
+        print(self._get_renderer(with_ships_positions=True).render())
 
     def print_board_without_ships_positions(self) -> None:
-        array_board = [[' ' for _ in range(self.SIZE_X)] for _ in range(self.SIZE_Y)]
-
-        for x_shot, y_shot in self.set_coordinates_previous_shots:
-            array_board[y_shot - 1][x_shot - 1] = 'O'
-
-        for ship in self.list_ships:
-            if ship.has_sunk():
-                for x_ship, y_ship in ship.set_all_coordinates:
-                    array_board[y_ship - 1][x_ship - 1] = '$'
-                continue
-
-            for x_ship, y_ship in ship.set_coordinates_damages:
-                array_board[y_ship - 1][x_ship - 1] = 'X'
-
-        board_str = self._get_board_string_from_array_chars(array_board)
-
-        print(board_str)
-
-    def _get_board_string_from_array_chars(self, array_board: List[List[str]]) -> str:
-        list_lines = []
+        print(self._get_renderer(with_ships_positions=False).render())
 
-        array_first_line = [chr(code + OFFSET_UPPER_CASE_CHAR_CONVERSION) for code in range(1, self.SIZE_X + 1)]
-        first_line = ' ' * 6 + (' ' * 5).join(array_first_line) + ' \n'
-
-        for index_line, array_line in enumerate(array_board, 1):
-            number_spaces_before_line = 2 - len(str(index_line))
-            space_before_line = number_spaces_before_line * ' '
-            list_lines.append(f'{space_before_line}{index_line} |  ' + '  |  '.join(array_line) + '  |\n')
-
-        line_dashes = '   ' + '-' * 6 * self.SIZE_X + '-\n'
-
-        board_str = first_line + line_dashes + line_dashes.join(list_lines) + line_dashes
-
-        return board_str
+    def _get_renderer(self, with_ships_positions: bool) -> BoardRenderer:
+        """
+        :return: the renderer of the board, created the first time it is needed and reused afterwards so that only
+        the cells attacked since the previous print are redrawn
+        """
+        if with_ships_positions not in self.dict_renderers:
+            self.dict_renderers[with_ships_positions] = BoardRenderer(self, with_ships_positions)
+        return self.dict_renderers[with_ships_positions]
 
     def lengths_of_ships_correct(self) -> bool:
         """
         :return: True if and only if there is the right number of ships of each length, according to
-        Board.DICT_NUMBER_SHIPS_PER_LENGTH
+        config.dict_number_ships_per_length
         """
         keys = sorted(list(set(self.ship_lengths))) ## set removes duplicates
 
         dict_number_ships_per_length = {key: self.ship_lengths.count(key) for key in keys}
 
-        return dict_number_ships_per_length == self.DICT_NUMBER_SHIPS_PER_LENGTH
+        return dict_number_ships_per_length == self.config.dict_number_ships_per_length
 
         ##  this method is robust to changes in the number of ships and new ship lengths
 
@@ -155,39 +139,32 @@ class Board(object):
         """
         :return: True if and only if there are at least 2 ships on the board that are near each other.
         """
+        try:
+            placement_table = get_placement_table(self.config.size_x, self.config.size_y)
+            return placement_table.are_some_ships_near_each_other(self.list_ships)  ##  one mask test per ship
+        except ValueError:
+            pass  ##  some ships are not entirely on the board, they have no placement: compare all the pairs
+
         all_ship_combination_pairs = combinations(self.list_ships, 2)  ## returns a list of tuples of all ship pairs
         return any(ship.is_near_ship(other_ship) for (ship, other_ship) in all_ship_combination_pairs)  ##  checks if any two ships are near eachother
 
 class BoardAutomatic(Board):
-    def __init__(self):
-        super().__init__(list_ships=self.generate_ships_automatically())
+    def __init__(self, config: GameConfig = None, rng=random):
+        """
+        :param config: size of the board and number of ships per length, DEFAULT_CONFIG if None
+        :param rng: random generator placing the ships (see battleship.rng)
+        """
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.rng = rng
+        super().__init__(list_ships=self.generate_ships_automatically(), config=self.config)
 
     def generate_ships_automatically(self) -> List[Ship]:
         """
         :return: A list of automatically (randomly) generated ships for the board
         """
-        free_coords = set(permutations(range(1,11), 2))  ## all the coords in a 10x10 board
-        list_ships = []
-        first_ship = True
-        for length in list(self.DICT_NUMBER_SHIPS_PER_LENGTH.keys())[::-1]:  ## reverse slice to create big ships first
-            for number_of_ships_of_length in range(self.DICT_NUMBER_SHIPS_PER_LENGTH[length]):
-                ship_created_successfully = False
-                while not ship_created_successfully:
-                    start_coord = choice(tuple(free_coords))  ## random start coord
-                    end_coord = choice([(start_coord[0] + (length - 1), start_coord[1]), (start_coord[0], start_coord[1] + (length - 1)), (start_coord[0] - (length - 1), start_coord[1]),  (start_coord[0], start_coord[1] - (length - 1))])  ## randomly chooses between vertical or horizontal via choice of end_coord
-                    new_ship = Ship(coord_start = start_coord, coord_end = end_coord)  ##  create the new ship
-                    if not new_ship.get_all_coordinates().issubset(free_coords): ## if any of the ship coords are not valid
-                        continue
-                    elif first_ship:
-                        list_ships.append(new_ship)
-                        first_ship = False
-                        free_coords.difference_update(new_ship.get_all_coordinates())  ##  remove all taken coords
-                        ship_created_successfully = True
-                    elif not any(new_ship.is_near_ship(other_ship) for other_ship in list_ships):  ##  checks if new ship is near any other ships
-                        list_ships.append(new_ship)
-                        free_coords.difference_update(new_ship.get_all_coordinates())
-                        ship_created_successfully = True
-        return list_ships
+        placement_table = get_placement_table(self.config.size_x, self.config.size_y)
+        fleet = placement_table.sample_fleet(self.config.dict_number_ships_per_length, self.rng)  ##  biggest ships first
+        return [placement.get_ship() for placement in fleet]
 
 
 
@@ -0,0 +1,82 @@
+from typing import Dict, List
+
+
+class GameConfig(object):
+    """
+    Geometry of the boards and composition of the fleets of a game.
+    A config is immutable and hashable: all the lookup tables depending on it are cached per config, so games with
+    different configs can be simulated side by side in the same process.
+    """
+    __slots__ = ('size_x', 'size_y', 'tuple_number_ships_per_length')
+
+    def __init__(self,
+                 size_x: int = 10,
+                 size_y: int = 10,
+                 dict_number_ships_per_length: Dict[int, int] = None):
+        """
+        :param size_x: length of the rectangular board, along the x axis
+        :param size_y: length of the rectangular board, along the y axis
+        :param dict_number_ships_per_length: dict: length -> number of ships of that length.
+        By default, there is one ship of each length from 1 to 5.
+        :raise ValueError if the board is empty or if a ship cannot fit on the board
+        """
+        if dict_number_ships_per_length is None:
+            dict_number_ships_per_length = {1: 1,
+                                            2: 1,
+                                            3: 1,
+                                            4: 1,
+                                            5: 1}
+
+        if size_x < 1 or size_y < 1:
+            raise ValueError("The board should have at least one cell.")
+
+        if any(not 1 <= length <= max(size_x, size_y) for length in dict_number_ships_per_length):
+            raise ValueError(f"Some ships of {dict_number_ships_per_length} "
+                             f"cannot fit on a board of size {size_x}x{size_y}.")
+
+        object.__setattr__(self, 'size_x', size_x)
+        object.__setattr__(self, 'size_y', size_y)
+        object.__setattr__(self, 'tuple_number_ships_per_length',
+                           tuple(sorted(dict_number_ships_per_length.items())))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("A GameConfig cannot be modified.")
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and self._get_key() == other._get_key()
+
+    def __hash__(self):
+        return hash(self._get_key())
+
+    def __repr__(self):
+        return f"GameConfig(size_x={self.size_x}, size_y={self.size_y}, " \
+               f"dict_number_ships_per_length={self.dict_number_ships_per_length})"
+
+    def __reduce__(self):
+        return GameConfig, (self.size_x, self.size_y, self.dict_number_ships_per_length)
+
+    def _get_key(self) -> tuple:
+        return self.size_x, self.size_y, self.tuple_number_ships_per_length
+
+    @property
+    def dict_number_ships_per_length(self) -> Dict[int, int]:
+        """
+        :return: dict: length -> number of ships of that length (a new dict, modifying it does not change the config)
+        """
+        return dict(self.tuple_number_ships_per_length)
+
+    @property
+    def number_cells(self) -> int:
+        return self.size_x * self.size_y
+
+    def get_list_lengths_ships(self) -> List[int]:
+        """
+        :return: the length of each ship of the fleet, biggest ships first
+        """
+        return sorted((length
+                       for length, number_ships in self.tuple_number_ships_per_length
+                       for _ in range(number_ships)),
+                      reverse=True)
+
+
+DEFAULT_CONFIG = GameConfig()
@@ -1,29 +1,152 @@
-from typing import Tuple
+"""
+Conversions between the positions written by the users ('J9', 'AB12'...) and the coordinates of the cells.
 
-from battleship.board import Board, OFFSET_UPPER_CASE_CHAR_CONVERSION
+The columns are named like the columns of a spreadsheet: 'A' to 'Z', then 'AA', 'AB'... so boards can have more
+than 26 columns. A CoordinateCodec holds the lookup tables of a board size (the name of each cell, and the index of
+each name), so converting a position is a single lookup. It also converts whole transcripts of shots
+('A1 B7 J10 ...') in one pass, to and from arrays of cell indices (see battleship.placement.get_index_cell), which
+is the compact form of large logs of moves.
+"""
+from array import array
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.placement import get_index_cell
+from battleship.render import OFFSET_UPPER_CASE_CHAR_CONVERSION, NUMBER_LETTERS, get_str_column
 
 
 def get_str_coordinates_from_tuple(coord_x: int,
                                    coord_y: int):
-    return chr(coord_x + OFFSET_UPPER_CASE_CHAR_CONVERSION) + str(coord_y)
+    return get_str_column(coord_x) + str(coord_y)
+
+
+def get_tuple_coordinates_from_str(coord_str: str, config: GameConfig = DEFAULT_CONFIG) -> Tuple[int, int]:
+    """
+    :param coord_str: position on the board, such as 'J9'
+    :param config: config of the board, the position has to be on it
+    :raise ValueError if the position is not valid
+    """
+    return get_codec(config.size_x, config.size_y).get_tuple_coordinates_from_str(coord_str)
 
 
-def get_tuple_coordinates_from_str(coord_str: str) -> Tuple[int, int]:
+def parse_coordinates(coord_str: str) -> Tuple[int, int]:
+    """
+    :param coord_str: position such as 'J9' or 'AB12', which may not be on the board
+    :return: the coordinates (coord_x, coord_y) of the position
+    :raise ValueError if the text is not a position
+    """
     coord_str = coord_str.strip()
 
-    if not 2 <= len(coord_str) <= 3:
+    number_letters = 0
+    while number_letters < len(coord_str) and 'A' <= coord_str[number_letters] <= 'Z':
+        number_letters += 1
+
+    str_line = coord_str[number_letters:]
+    if not number_letters or not str_line.isdigit():
         raise ValueError(f"The position provided '{coord_str}' is not valid")
 
-    coord_1, coord_2 = coord_str[0], coord_str[1:]
+    coord_x = 0
+    for letter in coord_str[:number_letters]:
+        coord_x = coord_x * NUMBER_LETTERS + ord(letter) - OFFSET_UPPER_CASE_CHAR_CONVERSION
 
-    coord_1 = ord(coord_1) - OFFSET_UPPER_CASE_CHAR_CONVERSION
-    coord_2 = int(coord_2)
+    return coord_x, int(str_line)
 
-    if not (0 < coord_1 <= Board.SIZE_X and 0 < coord_2 <= Board.SIZE_Y):
-        raise ValueError(f"The position provided '{coord_str}' is not valid")
 
-    return coord_1, coord_2
+class CoordinateCodec(object):
+    """
+    Lookup tables of the positions of the cells of a board size.
+    Use get_codec to get the codecs.
+    """
+
+    def __init__(self, size_x: int, size_y: int):
+        self.size_x = size_x
+        self.size_y = size_y
+
+        # index of a cell -> its position, its coordinates
+        self.tuple_str_cells = tuple(get_str_column(coord_x) + str(coord_y)
+                                     for coord_y in range(1, size_y + 1)
+                                     for coord_x in range(1, size_x + 1))
+        self.tuple_coordinates_cells = tuple((coord_x, coord_y)
+                                             for coord_y in range(1, size_y + 1)
+                                             for coord_x in range(1, size_x + 1))
+        # position of a cell -> its index
+        self.dict_indices_cells_per_str = {str_cell: index_cell
+                                           for index_cell, str_cell in enumerate(self.tuple_str_cells)}
+
+        # type of the items of the arrays of cell indices
+        self.typecode_indices = 'H' if size_x * size_y <= 1 << 16 else 'I'
+
+    def get_index_cell_from_str(self, coord_str: str) -> int:
+        """
+        :param coord_str: position on the board, such as 'J9'
+        :raise ValueError if the position is not valid
+        """
+        index_cell = self.dict_indices_cells_per_str.get(coord_str)
+        if index_cell is not None:
+            return index_cell
+
+        # written differently from the tables (spaces around, zeros before the line...)
+        coord_x, coord_y = parse_coordinates(coord_str)
+        if not (0 < coord_x <= self.size_x and 0 < coord_y <= self.size_y):
+            raise ValueError(f"The position provided '{coord_str.strip()}' is not valid")
+        return get_index_cell(coord_x, coord_y, self.size_x)
+
+    def get_tuple_coordinates_from_str(self, coord_str: str) -> Tuple[int, int]:
+        """
+        :param coord_str: position on the board, such as 'J9'
+        :raise ValueError if the position is not valid
+        """
+        return self.tuple_coordinates_cells[self.get_index_cell_from_str(coord_str)]
+
+    def get_str_coordinates_from_tuple(self, coord_x: int, coord_y: int) -> str:
+        """
+        :raise ValueError if the cell is not on the board
+        """
+        if not (0 < coord_x <= self.size_x and 0 < coord_y <= self.size_y):
+            raise ValueError(f"The cell {(coord_x, coord_y)} is not on the board.")
+        return self.tuple_str_cells[get_index_cell(coord_x, coord_y, self.size_x)]
+
+    def parse_transcript(self, str_transcript: str, array_indices: array = None) -> array:
+        """
+        :param str_transcript: positions separated by spaces, such as 'A1 B7 J10'
+        :param array_indices: array the indices of the cells are appended to, a new array if None
+        :return: the array of the indices of the cells of the transcript, in order
+        :raise ValueError if a position is not valid, the array is then left as it was
+        """
+        if array_indices is None:
+            array_indices = array(self.typecode_indices)
+
+        list_str_cells = str_transcript.split()
+        length_before = len(array_indices)
+        try:
+            array_indices.extend(map(self.dict_indices_cells_per_str.__getitem__, list_str_cells))
+        except KeyError:
+            # some positions are written differently from the tables, the array is only extended if all are valid
+            del array_indices[length_before:]
+            array_indices.extend([self.get_index_cell_from_str(str_cell) for str_cell in list_str_cells])
+
+        return array_indices
+
+    def format_transcript(self, indices_cells: Iterable[int]) -> str:
+        """
+        :param indices_cells: indices of cells, such as an array returned by parse_transcript
+        :return: the positions of the cells separated by spaces, such as 'A1 B7 J10'
+        """
+        return ' '.join(map(self.tuple_str_cells.__getitem__, indices_cells))
+
+
+@lru_cache(maxsize=None)
+def get_codec(size_x: int, size_y: int) -> CoordinateCodec:
+    """
+    :return: the codec of the boards of that size (the same object is returned for the same size)
+    """
+    return CoordinateCodec(size_x, size_y)
 
 
 if __name__ == '__main__':
     print(get_tuple_coordinates_from_str('J9'))
+
+    codec = get_codec(30, 30)
+    array_transcript = codec.parse_transcript('A1 B7 J10 AD30')
+    print(array_transcript, codec.format_transcript(array_transcript))
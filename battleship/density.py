@@ -0,0 +1,253 @@
+"""
+Probability density of the positions of the opponent's ships, updated incrementally after each attack.
+
+The density of a cell is the number of placements (see battleship.placement) of the remaining ships that cover
+that cell and are still possible given what is known about the opponent's board, each placement of a length
+being counted once per ship of that length which has not sunk yet.
+After a miss, only the placements covering the missed cell are removed (and their cells updated), instead of
+recounting all the placements.
+"""
+from functools import lru_cache
+from typing import List, Tuple
+
+from battleship.config import GameConfig
+from battleship.placement import get_index_cell, get_placement_table
+
+OFFSETS_SIDES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+OFFSETS_DIAGONALS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+# subtracted from the density of a cell once it is known, so that it is never selected again
+OFFSET_KNOWN_CELL = 1 << 40
+
+
+class PlacementIndex(object):
+    """
+    Static tables of the placements of the ships of a config, shared by all the PlacementDensity of that config.
+    Use get_placement_index to get them.
+    """
+
+    def __init__(self, config: GameConfig):
+        placement_table = get_placement_table(config.size_x, config.size_y)
+
+        # all the placements of all the lengths, identified by their index in these lists
+        self.list_lengths_placements = []  # type: List[int]
+        self.list_cells_placements = []  # type: List[Tuple[int, ...]]
+        # length -> range of the indices of the placements of that length
+        self.dict_range_placements_per_length = {}
+        for length, _ in config.tuple_number_ships_per_length:
+            index_first_placement = len(self.list_lengths_placements)
+            for placement in placement_table.get_placements(length):
+                self.list_lengths_placements.append(length)
+                (x_start, y_start), (x_end, y_end) = placement.coord_start, placement.coord_end
+                self.list_cells_placements.append(tuple(get_index_cell(coord_x, coord_y, config.size_x)
+                                                        for coord_x in range(x_start, x_end + 1)
+                                                        for coord_y in range(y_start, y_end + 1)))
+            self.dict_range_placements_per_length[length] = range(index_first_placement,
+                                                                  len(self.list_lengths_placements))
+
+        # index of a cell -> indices of the placements covering that cell
+        self.list_placements_per_cell = [[] for _ in range(config.number_cells)]
+        for index_placement, cells in enumerate(self.list_cells_placements):
+            for index_cell in cells:
+                self.list_placements_per_cell[index_cell].append(index_placement)
+
+        # density when nothing is known about the opponent's board
+        dict_number_ships_per_length = config.dict_number_ships_per_length
+        self.list_density_initial = [0] * config.number_cells
+        for index_placement, cells in enumerate(self.list_cells_placements):
+            weight = dict_number_ships_per_length[self.list_lengths_placements[index_placement]]
+            for index_cell in cells:
+                self.list_density_initial[index_cell] += weight
+
+
+@lru_cache(maxsize=None)
+def get_placement_index(config: GameConfig) -> PlacementIndex:
+    """
+    :return: the placement index of that config (the same object is returned for the same config)
+    """
+    return PlacementIndex(config)
+
+
+class PlacementDensity(object):
+    """
+    Density of the placements of the opponent's ships, with the knowledge (hits, misses, sunk ships) gathered so far.
+    Cells are identified by their index, see battleship.placement.get_index_cell.
+    """
+
+    def __init__(self, config: GameConfig):
+        """
+        :param config: config of the opponent's board
+        """
+        self.size_x = config.size_x
+        self.size_y = config.size_y
+
+        # length -> number of ships of that length which have not sunk yet
+        self.dict_number_ships_remaining_per_length = config.dict_number_ships_per_length
+
+        placement_index = get_placement_index(config)
+        self.list_lengths_placements = placement_index.list_lengths_placements
+        self.list_cells_placements = placement_index.list_cells_placements
+        self.dict_range_placements_per_length = placement_index.dict_range_placements_per_length
+        self.list_placements_per_cell = placement_index.list_placements_per_cell
+
+        self.list_is_placement_possible = [True] * len(self.list_lengths_placements)
+        self.list_density = list(placement_index.list_density_initial)
+
+        self.list_is_cell_known = [False] * config.number_cells
+        self.mask_cells_known = 0  # same information as list_is_cell_known, as a bitboard
+        self.set_cells_hit_not_sunk = set()
+
+    def get_index_cell(self, coord_x: int, coord_y: int) -> int:
+        return get_index_cell(coord_x, coord_y, self.size_x)
+
+    def get_coordinates(self, index_cell: int) -> Tuple[int, int]:
+        """
+        :return: the coordinates (coord_x, coord_y) of the cell
+        """
+        return index_cell % self.size_x + 1, index_cell // self.size_x + 1
+
+    def _get_neighbours(self, index_cell: int, offsets: Tuple[Tuple[int, int], ...]) -> List[int]:
+        coord_x, coord_y = self.get_coordinates(index_cell)
+
+        return [self.get_index_cell(coord_x + dx, coord_y + dy)
+                for dx, dy in offsets
+                if 1 <= coord_x + dx <= self.size_x and 1 <= coord_y + dy <= self.size_y]
+
+    def _mark_cell_known(self, index_cell: int) -> None:
+        if not self.list_is_cell_known[index_cell]:
+            self.list_is_cell_known[index_cell] = True
+            self.mask_cells_known |= 1 << index_cell
+            self.list_density[index_cell] -= OFFSET_KNOWN_CELL
+
+    def _remove_placement(self, index_placement: int) -> None:
+        if not self.list_is_placement_possible[index_placement]:
+            return
+
+        self.list_is_placement_possible[index_placement] = False
+
+        weight = self.dict_number_ships_remaining_per_length[self.list_lengths_placements[index_placement]]
+        for index_cell in self.list_cells_placements[index_placement]:
+            self.list_density[index_cell] -= weight
+
+    def _mark_cell_without_ship(self, index_cell: int) -> None:
+        """
+        No ship can be on that cell: all the placements covering it are removed.
+        """
+        self._mark_cell_known(index_cell)
+        for index_placement in self.list_placements_per_cell[index_cell]:
+            self._remove_placement(index_placement)
+
+    def _get_cells_ship_sunk(self, index_cell: int) -> List[int]:
+        # the ships are never near each other, so the ship is the group of adjacent hits containing the cell
+        list_cells_ship = [index_cell]
+        set_cells_to_visit = {index_cell}
+        while set_cells_to_visit:
+            for index_neighbour in self._get_neighbours(set_cells_to_visit.pop(), OFFSETS_SIDES):
+                if index_neighbour in self.set_cells_hit_not_sunk and index_neighbour not in list_cells_ship:
+                    list_cells_ship.append(index_neighbour)
+                    set_cells_to_visit.add(index_neighbour)
+        return list_cells_ship
+
+    def _sink_ship(self, list_cells_ship: List[int]) -> None:
+        length = len(list_cells_ship)
+        self.set_cells_hit_not_sunk.difference_update(list_cells_ship)
+
+        # one ship less of that length: each of its remaining placements counts once less
+        if self.dict_number_ships_remaining_per_length.get(length, 0) > 0:
+            self.dict_number_ships_remaining_per_length[length] -= 1
+            for index_placement in self.dict_range_placements_per_length[length]:
+                if self.list_is_placement_possible[index_placement]:
+                    for index_cell in self.list_cells_placements[index_placement]:
+                        self.list_density[index_cell] -= 1
+
+        # no other ship can be on the sunk ship or near it
+        for index_cell in list_cells_ship:
+            self._mark_cell_without_ship(index_cell)
+            for index_neighbour in self._get_neighbours(index_cell, OFFSETS_SIDES + OFFSETS_DIAGONALS):
+                self._mark_cell_without_ship(index_neighbour)
+
+    def is_outcome_possible(self,
+                            coord_x: int,
+                            coord_y: int,
+                            is_ship_hit: bool,
+                            has_ship_sunk: bool) -> bool:
+        """
+        Only the cells known and the lengths of the ships remaining are checked, not whether the ships still fit.
+        :return: False if the outcome of an attack at (coord_x, coord_y) contradicts what is known, e.g. a ship sunk
+        while no ship of its length remains
+        """
+        index_cell = self.get_index_cell(coord_x, coord_y)
+        if not is_ship_hit:
+            return True
+        if self.list_is_cell_known[index_cell]:
+            return False
+
+        length = len(self._get_cells_ship_sunk(index_cell))
+        if has_ship_sunk:
+            return self.dict_number_ships_remaining_per_length.get(length, 0) > 0
+        return any(number_ships > 0 and length_remaining > length
+                   for length_remaining, number_ships in self.dict_number_ships_remaining_per_length.items())
+
+    def update(self,
+               coord_x: int,
+               coord_y: int,
+               is_ship_hit: bool,
+               has_ship_sunk: bool) -> None:
+        """
+        Updates the density with the outcome of an attack at (coord_x, coord_y).
+        """
+        index_cell = self.get_index_cell(coord_x, coord_y)
+
+        if not is_ship_hit:
+            self._mark_cell_without_ship(index_cell)
+            return
+
+        self._mark_cell_known(index_cell)
+        self.set_cells_hit_not_sunk.add(index_cell)
+
+        # the diagonal neighbours of a hit cannot belong to any ship
+        for index_neighbour in self._get_neighbours(index_cell, OFFSETS_DIAGONALS):
+            self._mark_cell_without_ship(index_neighbour)
+
+        if has_ship_sunk:
+            self._sink_ship(self._get_cells_ship_sunk(index_cell))
+
+    def get_index_best_cell(self) -> int:
+        """
+        :return: the index of the unknown cell most likely to contain a ship.
+        When a ship has been hit but has not sunk, only the placements going through the hits are considered.
+        Ties are broken by choosing the lowest index, so the choice is deterministic.
+        """
+        if not self.set_cells_hit_not_sunk:
+            return self.list_density.index(max(self.list_density))
+
+        dict_scores = {}
+        for index_cell_hit in self.set_cells_hit_not_sunk:
+            for index_placement in self.list_placements_per_cell[index_cell_hit]:
+                if not self.list_is_placement_possible[index_placement]:
+                    continue
+
+                weight = self.dict_number_ships_remaining_per_length[self.list_lengths_placements[index_placement]]
+                for index_cell in self.list_cells_placements[index_placement]:
+                    if not self.list_is_cell_known[index_cell]:
+                        dict_scores[index_cell] = dict_scores.get(index_cell, 0) + weight
+
+        if not dict_scores:
+            return self.list_density.index(max(self.list_density))
+
+        return min(dict_scores, key=lambda index_cell: (-dict_scores[index_cell], index_cell))
+
+    def get_mask_cells_hit_not_sunk(self) -> int:
+        """
+        :return: the bitboard of the cells where a ship has been hit but has not sunk yet
+        """
+        mask_cells_hit_not_sunk = 0
+        for index_cell in self.set_cells_hit_not_sunk:
+            mask_cells_hit_not_sunk |= 1 << index_cell
+        return mask_cells_hit_not_sunk
+
+    def get_best_coordinates(self) -> Tuple[int, int]:
+        """
+        :return: the coordinates (coord_x, coord_y) of the unknown cell most likely to contain a ship
+        """
+        return self.get_coordinates(self.get_index_best_cell())
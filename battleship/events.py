@@ -0,0 +1,84 @@
+"""
+Structured events produced during a game, delivered to pluggable sinks.
+
+The players of a game are identified by their index (1 for Game.player_1, 2 for Game.player_2), so the events
+do not hold references to the Player objects and can be stored or sent to another process.
+"""
+from typing import Dict, List, NamedTuple
+
+from battleship.config import GameConfig
+
+
+class GameStartEvent(NamedTuple):
+    config: GameConfig
+    name_player_1: str
+    name_player_2: str
+    index_player_starting: int
+
+
+class ShotEvent(NamedTuple):
+    index_player: int  # player attacking
+    coord_x: int
+    coord_y: int
+    is_ship_hit: bool
+    has_ship_sunk: bool
+
+
+class HitEvent(NamedTuple):
+    index_player: int  # player whose attack hit a ship
+    coord_x: int
+    coord_y: int
+
+
+class SinkEvent(NamedTuple):
+    index_player: int  # player whose attack sank a ship
+    coord_x: int
+    coord_y: int
+
+
+class TurnChangeEvent(NamedTuple):
+    index_player: int  # player whose turn starts
+
+
+class WinEvent(NamedTuple):
+    index_player: int  # winner
+    dict_number_shots_per_player: Dict[int, int]  # index of player -> number of shots fired during the game
+
+
+class EventSink(object):
+    """
+    Abstract receiver of the events of one or several games.
+    """
+
+    def handle(self, event: NamedTuple) -> None:
+        """
+        Receives an event of a game, the events of a game are received in the order they happen.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Releases the resources of the sink, once no events will be received anymore.
+        """
+        pass
+
+
+class ListSink(EventSink):
+    """
+    Sink keeping all the events it receives in a list.
+    """
+
+    def __init__(self):
+        self.list_events = []  # type: List[NamedTuple]
+
+    def handle(self, event: NamedTuple) -> None:
+        self.list_events.append(event)
+
+
+class PrintSink(EventSink):
+    """
+    Sink printing a line per event.
+    """
+
+    def handle(self, event: NamedTuple) -> None:
+        print(event)
@@ -1,6 +1,11 @@
 import random
+from typing import List, Tuple
 
+from battleship.board import Board
+from battleship.events import EventSink, GameStartEvent, HitEvent, ShotEvent, SinkEvent, TurnChangeEvent, WinEvent
 from battleship.player import Player
+from battleship.profiling import PHASE_EVENTS, PHASE_GAME, PHASE_RENDER, PHASE_TURN, Profiler
+from battleship.snapshot import GameState
 
 
 class Game(object):
@@ -13,48 +18,247 @@ class Game(object):
 
     def __init__(self,
                  player_1: Player,
-                 player_2: Player):
+                 player_2: Player,
+                 verbose: bool = True,
+                 list_sinks: List[EventSink] = None,
+                 rng=random,
+                 profiler: Profiler = None):
         """
         :param player_1: First competitor (Player object)
         :param player_2: Second competitor (Player object)
+        :param verbose: if False, the game is simulated silently (nothing is printed), which is what
+        batch simulations and tournaments use.
+        :param list_sinks: sinks receiving the events of the game (see battleship.events)
+        :param rng: random generator choosing the player starting (see battleship.rng)
+        :param profiler: if not None, the phases of the games played with play are timed (see battleship.profiling)
+        :raise ValueError if the boards of the players do not have the same config
         """
+        if player_1.board.config != player_2.board.config:
+            raise ValueError(f"The boards of {player_1} and {player_2} should have the same config.")
+
         self.player_1 = player_1
         self.player_2 = player_2
+        self.config = player_1.board.config
+        self.verbose = verbose
+        self.list_sinks = list_sinks if list_sinks is not None else []
+        self.rng = rng
+        self.profiler = profiler
+
+        self.player_starting = None
+        self.player_turn = None  # player attacking next, None until the game starts
+        self.dict_number_shots_per_player = {player_1: 0, player_2: 0}
+        # shots fired before the game was resumed (see from_state), sent to the sinks when the game starts again
+        self.list_shots_previous = []  # type: List[Tuple[int, int, int, bool, bool]]
+
+    @classmethod
+    def from_state(cls,
+                   state: GameState,
+                   player_1: Player,
+                   player_2: Player,
+                   class_board=Board,
+                   **kwargs) -> 'Game':
+        """
+        Resumes a game from a snapshot: the players get new boards in the state of the snapshot, and learn the
+        outcomes of the attacks they fired (with update_after_attack), in order. The game then continues from the
+        player whose turn it is.
+        :param state: snapshot of the game (see battleship.snapshot)
+        :param player_1: new player, whose board is replaced by the board of the first player of the snapshot
+        :param player_2: same for the second player
+        :param class_board: class of the new boards, Board or a subclass with the same constructor
+        :param kwargs: other arguments of the constructor (verbose, list_sinks...). When the game is played, the
+        sinks first receive the events of the shots of the snapshot, as if the whole game was played.
+        :return: the game, ready to be played
+        """
+        for index_player, player in ((1, player_1), (2, player_2)):
+            player.board = state.get_board(index_player, class_board)
+
+        for index_player_opponent, player in ((2, player_1), (1, player_2)):
+            for coord_x, coord_y, is_ship_hit, has_ship_sunk in state.get_list_shots_received(index_player_opponent):
+                player.coord_last_attack = coord_x, coord_y
+                player.update_after_attack(coord_x, coord_y, is_ship_hit, has_ship_sunk)
 
-    def play(self) -> None:
+        game = cls(player_1, player_2, **kwargs)
+        game.player_starting = player_1 if state.index_player_starting == 1 else player_2
+        game.player_turn = player_1 if state.index_player_turn == 1 else player_2
+        game.dict_number_shots_per_player = {player_1: state.get_number_shots_fired(1),
+                                             player_2: state.get_number_shots_fired(2)}
+        game.list_shots_previous = state.get_list_shots_in_order()
+        return game
+
+    def play(self) -> Player:
         """
         Simulates an entire game. Prints necessary information (boards without ships, positions under attack... )
+        unless the game is silent.
+        :return: the player who won the game
         """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start(PHASE_GAME, 0)
 
-        # Chooses position first turn
-        if random.choice([True, False]):
-            print(f"{self.player_1} starts the game.")
-            player_turn = self.player_1
-            player_opponent = self.player_2
-        else:
-            print(f"{self.player_2} starts the game.")
-            player_turn = self.player_2
-            player_opponent = self.player_1
+        player_turn, player_opponent = self._start()
 
         # Simulates the game, until a player has lost
-        while not self.player_1.has_lost() and not self.player_2.has_lost():
-            print("-" * 75 + "\n"* 5 + "-" * 75 + "\n")
+        while not self.is_over():
+            if profiler is not None:
+                profiler.start(PHASE_TURN, self.get_index_player(player_turn))
+            if self.verbose:
+                print("-" * 75 + "\n"* 5 + "-" * 75 + "\n")
             is_ship_hit = None
 
             # if an opponent's ship is hit, the player is allowed to play another time.
             while is_ship_hit is None or is_ship_hit:
 
-                is_ship_hit, _ = player_turn.attacks(player_opponent)
+                is_ship_hit, has_ship_sunk = player_turn.attacks(player_opponent, verbose=self.verbose,
+                                                                 profiler=profiler)
+                self._record_attack(player_turn, is_ship_hit, has_ship_sunk)
 
-                if self.player_1.has_lost() or self.player_2.has_lost():
+                if self.is_over():
                     break
 
-                if is_ship_hit:
+                if is_ship_hit and self.verbose:
                     print("-" * 75)
 
-            player_turn, player_opponent = player_opponent, player_turn  # Now it's the opponent's turn
+            if profiler is not None:
+                profiler.stop()
+            player_turn, player_opponent = self._change_turn(player_turn, player_opponent)
+
+        if self.verbose:
+            if profiler is not None:
+                profiler.start(PHASE_RENDER, 0)
+            self._print_results()
+            if profiler is not None:
+                profiler.stop()
+
+        winner = self._end()
+        if profiler is not None:
+            profiler.stop()
 
-        self._print_results()
+        return winner
+
+    async def play_async(self) -> Player:
+        """
+        Simulates an entire game silently, waiting for the moves of the players with
+        Player.select_coordinates_to_attack_async, so that many games can be played concurrently in an event loop.
+        The game can be followed through its event sinks.
+        :return: the player who won the game
+        """
+        player_turn, player_opponent = self._start()
+
+        while not self.is_over():
+            is_ship_hit = None
+
+            # if an opponent's ship is hit, the player is allowed to play another time.
+            while is_ship_hit is None or is_ship_hit:
+                is_ship_hit, has_ship_sunk = await player_turn.attacks_async(player_opponent)
+                self._record_attack(player_turn, is_ship_hit, has_ship_sunk)
+
+                if self.is_over():
+                    break
+
+            player_turn, player_opponent = self._change_turn(player_turn, player_opponent)
+
+        return self._end()
+
+    def is_over(self) -> bool:
+        """
+        :return: True if and only if one of the players has lost
+        """
+        return self.player_1.has_lost() or self.player_2.has_lost()
+
+    def _start(self) -> Tuple[Player, Player]:
+        if self.player_turn is not None:
+            # resumed from a snapshot (see from_state)
+            if self.list_sinks:
+                self._emit_shots_previous()
+            return self.player_turn, self.player_1 if self.player_turn is self.player_2 else self.player_2
+
+        # Chooses position first turn
+        if self.rng.choice([True, False]):
+            player_turn = self.player_1
+            player_opponent = self.player_2
+        else:
+            player_turn = self.player_2
+            player_opponent = self.player_1
+
+        self.player_starting = self.player_turn = player_turn
+        if self.verbose:
+            print(f"{player_turn} starts the game.")
+        if self.list_sinks:
+            self._emit(GameStartEvent(self.config, str(self.player_1), str(self.player_2),
+                                      self.get_index_player(player_turn)))
+
+        return player_turn, player_opponent
+
+    def _emit_shots_previous(self) -> None:
+        index_player_turn = self.get_index_player(self.player_starting)
+        self._emit(GameStartEvent(self.config, str(self.player_1), str(self.player_2), index_player_turn))
+
+        for index_player, coord_x, coord_y, is_ship_hit, has_ship_sunk in self.list_shots_previous:
+            if index_player != index_player_turn:
+                index_player_turn = index_player
+                self._emit(TurnChangeEvent(index_player_turn))
+            self._emit_attack_events(index_player, coord_x, coord_y, is_ship_hit, has_ship_sunk)
+
+        if self.get_index_player(self.player_turn) != index_player_turn and not self.is_over():
+            self._emit(TurnChangeEvent(self.get_index_player(self.player_turn)))
+
+    def _record_attack(self, player: Player, is_ship_hit: bool, has_ship_sunk: bool) -> None:
+        self.dict_number_shots_per_player[player] += 1
+        if self.list_sinks:
+            coord_x, coord_y = player.coord_last_attack
+            self._emit_attack_events(self.get_index_player(player), coord_x, coord_y, is_ship_hit, has_ship_sunk)
+
+    def _change_turn(self, player_turn: Player, player_opponent: Player) -> Tuple[Player, Player]:
+        self.player_turn = player_opponent
+        if self.list_sinks and not self.is_over():
+            self._emit(TurnChangeEvent(self.get_index_player(player_opponent)))
+
+        return player_opponent, player_turn  # Now it's the opponent's turn
+
+    def _end(self) -> Player:
+        winner = self.get_winner()
+        if self.list_sinks:
+            self._emit(WinEvent(self.get_index_player(winner),
+                                {self.get_index_player(player): number_shots
+                                 for player, number_shots in self.dict_number_shots_per_player.items()}))
+
+        return winner
+
+    def get_index_player(self, player: Player) -> int:
+        """
+        :return: 1 if player is the first player of the game, 2 if it is the second one
+        """
+        return 1 if player is self.player_1 else 2
+
+    def _emit(self, event) -> None:
+        if self.profiler is not None:
+            self.profiler.start(PHASE_EVENTS)
+        for sink in self.list_sinks:
+            sink.handle(event)
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def _emit_attack_events(self,
+                            index_player: int,
+                            coord_x: int,
+                            coord_y: int,
+                            is_ship_hit: bool,
+                            has_ship_sunk: bool) -> None:
+        self._emit(ShotEvent(index_player, coord_x, coord_y, is_ship_hit, has_ship_sunk))
+        if is_ship_hit:
+            self._emit(HitEvent(index_player, coord_x, coord_y))
+        if has_ship_sunk:
+            self._emit(SinkEvent(index_player, coord_x, coord_y))
+
+    def get_winner(self) -> Player:
+        """
+        :return: the player who won the game, None if the game is not over yet
+        """
+        if self.player_1.has_lost():
+            return self.player_2
+        if self.player_2.has_lost():
+            return self.player_1
+        return None
 
     def _print_results(self):
         print("-" * 75 + "\n" * 5 + "-" * 75 + "\n")
@@ -0,0 +1,144 @@
+"""
+Load test of the game server (see battleship.server): many simulated users play concurrently against the bots.
+
+Usage:
+    python -m battleship.server --port 8765 &
+    python -m battleship.load_test --port 8765 --sessions 2000 --concurrency 500
+
+Each simulated user answers each TURN with random coordinates it has not tried yet. The latency of a move is the time
+between sending the coordinates and receiving the SHOT line telling its outcome. The server runs all its sessions in
+a single thread, so the number of sessions per second it sustains is also its number of sessions per core.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+
+from battleship.convert import get_str_coordinates_from_tuple
+
+
+class LoadTestResults(object):
+
+    def __init__(self):
+        self.number_sessions_completed = 0
+        self.number_sessions_failed = 0
+        self.duration = 0.
+        self.list_latencies_moves = []  # type: List[float]
+
+    def get_latency_quantile(self, quantile: float) -> float:
+        """
+        :param quantile: between 0 and 1
+        :return: the latency of the moves at that quantile, in seconds
+        """
+        if not self.list_latencies_moves:
+            return float('nan')
+        list_latencies_sorted = sorted(self.list_latencies_moves)
+        return list_latencies_sorted[min(int(quantile * len(list_latencies_sorted)), len(list_latencies_sorted) - 1)]
+
+    def get_sessions_per_second(self) -> float:
+        return self.number_sessions_completed / self.duration if self.duration else 0.
+
+    def print_results(self) -> None:
+        print(f"sessions completed: {self.number_sessions_completed} (failed: {self.number_sessions_failed})")
+        print(f"duration:           {self.duration:.2f} s")
+        print(f"sessions / s:       {self.get_sessions_per_second():.1f}")
+        print(f"moves:              {len(self.list_latencies_moves)}")
+        if self.list_latencies_moves:
+            print(f"latency mean:       {statistics.mean(self.list_latencies_moves) * 1e3:.2f} ms")
+        print(f"latency p50:        {self.get_latency_quantile(0.5) * 1e3:.2f} ms")
+        print(f"latency p99:        {self.get_latency_quantile(0.99) * 1e3:.2f} ms")
+
+
+async def simulate_user(results: LoadTestResults,
+                        rng: random.Random,
+                        host: str,
+                        port: int,
+                        path_unix_socket: str = None) -> None:
+    """
+    Plays a whole game with the server, as a user attacking at random.
+    """
+    if path_unix_socket is not None:
+        reader, writer = await asyncio.open_unix_connection(path_unix_socket)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    list_coordinates_not_tried = []
+    time_move_sent = None
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("The server closed the connection before the end of the game.")
+            list_words = line.decode().split()
+
+            if list_words[0] == 'TURN':
+                coord_x, coord_y = list_coordinates_not_tried.pop()
+                writer.write(f"{get_str_coordinates_from_tuple(coord_x, coord_y)}\n".encode())
+                time_move_sent = time.perf_counter()
+            elif list_words[0] == 'SHOT':
+                if list_words[1] == 'you' and time_move_sent is not None:
+                    results.list_latencies_moves.append(time.perf_counter() - time_move_sent)
+                    time_move_sent = None
+            elif list_words[0] == 'WELCOME':
+                size_x, size_y = int(list_words[1]), int(list_words[2])
+                list_coordinates_not_tried = [(coord_x, coord_y)
+                                              for coord_x in range(1, size_x + 1)
+                                              for coord_y in range(1, size_y + 1)]
+                rng.shuffle(list_coordinates_not_tried)
+            elif list_words[0] == 'WIN':
+                results.number_sessions_completed += 1
+                return
+            elif list_words[0] == 'ERROR':
+                raise ValueError(f"Unexpected answer of the server: {line.decode().strip()}")
+    finally:
+        writer.close()
+
+
+async def run_load_test(number_sessions: int,
+                        concurrency: int,
+                        host: str = '127.0.0.1',
+                        port: int = 8765,
+                        path_unix_socket: str = None,
+                        seed: int = 0) -> LoadTestResults:
+    """
+    :param number_sessions: number of games played in total
+    :param concurrency: maximum number of games played at the same time
+    :return: the results of the load test
+    """
+    results = LoadTestResults()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_session(index_session: int) -> None:
+        async with semaphore:
+            try:
+                await simulate_user(results, random.Random(f"{seed}:{index_session}"), host, port, path_unix_socket)
+            except (ConnectionError, ValueError):
+                results.number_sessions_failed += 1
+
+    time_start = time.perf_counter()
+    await asyncio.gather(*(run_session(index_session) for index_session in range(number_sessions)))
+    results.duration = time.perf_counter() - time_start
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test of the battleship server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="path of the Unix socket of the server, instead of TCP")
+    parser.add_argument('--sessions', type=int, default=1000, help="number of games played in total")
+    parser.add_argument('--concurrency', type=int, default=200, help="number of games played at the same time")
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+
+    results = asyncio.run(run_load_test(arguments.sessions, arguments.concurrency, arguments.host, arguments.port,
+                                        arguments.unix, arguments.seed))
+    results.print_results()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Opening books: the first shots of a strategy, precomputed for a config and read from a memory-mapped file.
+
+For strategies whose choice only depends on the outcomes of their previous attacks (e.g. PlayerProbabilistic), the
+shots are entirely determined by the sequence of the outcomes received so far. A book is the tree of these sequences,
+up to a depth: each node holds the cell to attack after the sequence of outcomes leading to it, and the index of
+its child for each outcome of that attack (miss, hit, sunk).
+
+Format of a book (little-endian):
+- the 4 bytes MAGIC_BOOK
+- a header (see STRUCT_HEADER_BOOK): size_x, size_y, depth, number of nodes, number of lengths of ships
+- for each length of ship: (length, number of ships of that length), see STRUCT_LENGTH_SHIPS
+- the nodes (see STRUCT_NODE), the root (no attack yet) first: index of the cell to attack (see
+  battleship.placement.get_index_cell), then the index of the child for each outcome, 0 if it is not in the book
+"""
+import argparse
+import mmap
+import struct
+from collections import deque
+from typing import Callable, List, Tuple
+
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.density import PlacementDensity
+from battleship.placement import get_index_cell
+from battleship.player import Player, PlayerProbabilistic, PlayerSolver
+
+MAGIC_BOOK = b'BSB1'
+
+STRUCT_HEADER_BOOK = struct.Struct('<HHHIH')
+STRUCT_LENGTH_SHIPS = struct.Struct('<HH')
+STRUCT_NODE = struct.Struct('<HIII')
+
+OUTCOME_MISS = 0
+OUTCOME_HIT = 1
+OUTCOME_SUNK = 2
+TUPLE_OUTCOMES = ((OUTCOME_MISS, (False, False)), (OUTCOME_HIT, (True, False)), (OUTCOME_SUNK, (True, True)))
+
+NO_CHILD = 0  # the root is never a child
+
+
+def get_outcome(is_ship_hit: bool, has_ship_sunk: bool) -> int:
+    return OUTCOME_SUNK if has_ship_sunk else OUTCOME_HIT if is_ship_hit else OUTCOME_MISS
+
+
+def build_opening_book(path: str,
+                       get_new_player: Callable[[], Player],
+                       depth: int) -> int:
+    """
+    Explores all the sequences of outcomes of the first depth attacks of a strategy, and writes the book.
+
+    The state of a node is rebuilt by giving the outcomes leading to it to a new player (with update_after_attack),
+    the player is then asked for the cell to attack. So the strategy should only learn through update_after_attack,
+    and it is asked for a cell only once per node, even if it is not deterministic.
+    The outcomes which cannot happen in a game (see PlacementDensity.is_outcome_possible), and the attacks after
+    the last ship sank, have no node: the child of such an outcome is NO_CHILD.
+
+    :param path: path of the book written
+    :param get_new_player: function returning a new player, ready to play its first attack
+    :param depth: number of attacks in the book
+    :return: the number of nodes of the book
+    """
+    config = get_new_player().board.config
+
+    # node -> (index of the cell to attack, list of the indices of the children)
+    list_cells_nodes = []  # type: List[int]
+    list_children_nodes = []  # type: List[List[int]]
+    # nodes to explore, with the list of the (coordinates, outcome) of the attacks leading to them
+    # (breadth first: the nodes are numbered in the order they are created)
+    deque_nodes_to_explore = deque([[]])  # type: deque[List[Tuple[Tuple[int, int], Tuple[bool, bool]]]]
+
+    while deque_nodes_to_explore:
+        history = deque_nodes_to_explore.popleft()
+
+        player = get_new_player()
+        density = PlacementDensity(config)
+        for (coord_x, coord_y), (is_ship_hit, has_ship_sunk) in history:
+            player.update_after_attack(coord_x, coord_y, is_ship_hit, has_ship_sunk)
+            density.update(coord_x, coord_y, is_ship_hit, has_ship_sunk)
+        coordinates = player.select_coordinates_to_attack(None)
+
+        list_cells_nodes.append(get_index_cell(*coordinates, config.size_x))
+        list_children_nodes.append([NO_CHILD] * len(TUPLE_OUTCOMES))
+
+        if len(history) + 1 < depth:
+            index_node = len(list_cells_nodes) - 1
+            number_ships_remaining = sum(density.dict_number_ships_remaining_per_length.values())
+            for outcome, is_ship_hit_has_ship_sunk in TUPLE_OUTCOMES:
+                if not density.is_outcome_possible(*coordinates, *is_ship_hit_has_ship_sunk) \
+                        or (outcome == OUTCOME_SUNK and number_ships_remaining == 1):
+                    continue
+                list_children_nodes[index_node][outcome] = len(list_cells_nodes) + len(deque_nodes_to_explore)
+                deque_nodes_to_explore.append(history + [(coordinates, is_ship_hit_has_ship_sunk)])
+
+    with open(path, 'wb') as file_book:
+        file_book.write(MAGIC_BOOK)
+        file_book.write(STRUCT_HEADER_BOOK.pack(config.size_x, config.size_y, depth, len(list_cells_nodes),
+                                                len(config.tuple_number_ships_per_length)))
+        for length, number_ships in config.tuple_number_ships_per_length:
+            file_book.write(STRUCT_LENGTH_SHIPS.pack(length, number_ships))
+        for index_cell, list_children in zip(list_cells_nodes, list_children_nodes):
+            file_book.write(STRUCT_NODE.pack(index_cell, *list_children))
+
+    return len(list_cells_nodes)
+
+
+class OpeningBook(object):
+    """
+    Book read from a memory-mapped file, a node is read in O(1) when it is needed.
+    """
+
+    def __init__(self, path: str):
+        """
+        :raise ValueError if the file is not an opening book
+        """
+        self.file = open(path, 'rb')
+        try:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self.file.close()
+            raise ValueError(f"{path} is not an opening book.")
+
+        if self.mmap[:len(MAGIC_BOOK)] != MAGIC_BOOK:
+            self.close()
+            raise ValueError(f"{path} is not an opening book.")
+
+        offset = len(MAGIC_BOOK)
+        size_x, size_y, self.depth, self.number_nodes, number_lengths = \
+            STRUCT_HEADER_BOOK.unpack_from(self.mmap, offset)
+        offset += STRUCT_HEADER_BOOK.size
+
+        dict_number_ships_per_length = {}
+        for _ in range(number_lengths):
+            length, number_ships = STRUCT_LENGTH_SHIPS.unpack_from(self.mmap, offset)
+            dict_number_ships_per_length[length] = number_ships
+            offset += STRUCT_LENGTH_SHIPS.size
+
+        self.config = GameConfig(size_x, size_y, dict_number_ships_per_length)
+        self.offset_nodes = offset
+
+    def get_coordinates(self, index_node: int) -> Tuple[int, int]:
+        """
+        :return: the coordinates (coord_x, coord_y) of the cell to attack at that node
+        """
+        index_cell = STRUCT_NODE.unpack_from(self.mmap, self.offset_nodes + index_node * STRUCT_NODE.size)[0]
+        return index_cell % self.config.size_x + 1, index_cell // self.config.size_x + 1
+
+    def get_index_child(self, index_node: int, outcome: int) -> int:
+        """
+        :return: the index of the node reached after the attack of that node had that outcome, NO_CHILD if the
+        book does not go further
+        """
+        return STRUCT_NODE.unpack_from(self.mmap, self.offset_nodes + index_node * STRUCT_NODE.size)[1 + outcome]
+
+    def close(self) -> None:
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OpeningBookMixin(object):
+    """
+    Mixin making a player follow an opening book for its first attacks, then choose its attacks itself.
+    It goes before the class of the player, e.g. class PlayerProbabilisticBook(OpeningBookMixin, PlayerProbabilistic).
+    The player still learns from all its attacks, so that it is ready when the book ends.
+    """
+
+    def __init__(self, *args, opening_book: OpeningBook = None, **kwargs):
+        """
+        :param opening_book: book built for the same config as the board of the player, and for the same strategy
+        :raise ValueError if the book was built for another config
+        """
+        super().__init__(*args, **kwargs)
+
+        if opening_book is not None and opening_book.config != self.board.config:
+            raise ValueError(f"The opening book was built for {opening_book.config}, not {self.board.config}.")
+
+        self.opening_book = opening_book
+        # node of the book of the next attack, None once the book does not go further
+        self.index_node_book = 0 if opening_book is not None else None
+
+    def is_in_opening_book(self) -> bool:
+        """
+        :return: True if and only if the next attack is read from the book
+        """
+        return self.index_node_book is not None
+
+    def select_coordinates_to_attack(self, opponent) -> Tuple[int, int]:
+        if self.is_in_opening_book():
+            return self.opening_book.get_coordinates(self.index_node_book)
+        return super().select_coordinates_to_attack(opponent)
+
+    def update_after_attack(self,
+                            coord_x: int,
+                            coord_y: int,
+                            is_ship_hit: bool,
+                            has_ship_sunk: bool) -> None:
+        if self.is_in_opening_book():
+            index_child = self.opening_book.get_index_child(self.index_node_book,
+                                                            get_outcome(is_ship_hit, has_ship_sunk))
+            self.index_node_book = index_child if index_child != NO_CHILD else None
+        super().update_after_attack(coord_x, coord_y, is_ship_hit, has_ship_sunk)
+
+
+class PlayerProbabilisticBook(OpeningBookMixin, PlayerProbabilistic):
+    pass
+
+
+class PlayerSolverBook(OpeningBookMixin, PlayerSolver):
+    pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Builds the opening book of a strategy.")
+    parser.add_argument('--player', choices=['probabilistic', 'solver'], default='probabilistic')
+    parser.add_argument('--depth', type=int, default=8, help="number of attacks in the book")
+    parser.add_argument('--duration-budget', type=float, default=1.,
+                        help="time budget of the solver per attack, in seconds (only for --player solver)")
+    parser.add_argument('--output', required=True, help="path of the book written")
+    arguments = parser.parse_args()
+
+    if arguments.player == 'solver':
+        def get_new_player() -> Player:
+            return PlayerSolver(config=DEFAULT_CONFIG, duration_budget=arguments.duration_budget)
+    else:
+        def get_new_player() -> Player:
+            return PlayerProbabilistic(config=DEFAULT_CONFIG)
+
+    number_nodes = build_opening_book(arguments.output, get_new_player, arguments.depth)
+    print(f"{number_nodes} positions written in {arguments.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+Precomputed tables of all the legal placements of a ship on a board, as bitboards.
+
+A placement is legal if the ship fits on the board. Two placements are compatible if the ship of the first one
+is not near the ship of the second one (see Ship.is_near_ship), which is tested with a single bitwise AND between
+the mask of one and the halo mask (the ship and all its neighbouring cells, corners included) of the other.
+"""
+import random
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from battleship.ship import Ship
+
+# number of random placements tried for a ship before listing all the placements still compatible with the board
+MAX_NUMBER_REJECTIONS = 20
+
+# number of times the generation of a fleet is restarted when a ship cannot be placed anymore
+MAX_NUMBER_RESTARTS = 1000
+
+
+def get_index_cell(coord_x: int, coord_y: int, size_x: int) -> int:
+    """
+    :return: the index of the bit representing the cell (coord_x, coord_y) in a bitboard of width size_x.
+    The cells are numbered line by line: (1, 1) -> 0, (2, 1) -> 1, ..., (1, 2) -> size_x ...
+    """
+    return (coord_y - 1) * size_x + (coord_x - 1)
+
+
+def get_mask_from_coordinates(coordinates: Iterable[Tuple[int, int]], size_x: int) -> int:
+    """
+    :return: the bitboard (integer) in which only the bits of the coordinates provided are set
+    """
+    mask = 0
+    for coord_x, coord_y in coordinates:
+        mask |= 1 << get_index_cell(coord_x, coord_y, size_x)
+    return mask
+
+
+class Placement(object):
+    """
+    A legal position of a ship on a board of a given size.
+    """
+    __slots__ = ('length', 'coord_start', 'coord_end', 'mask', 'mask_halo')
+
+    def __init__(self, coord_start: tuple, coord_end: tuple, size_x: int, size_y: int):
+        """
+        :param coord_start: upper-left coordinate of the ship
+        :param coord_end: lower-right coordinate of the ship
+        :param size_x: width of the board
+        :param size_y: height of the board
+        """
+        (x_start, y_start), (x_end, y_end) = coord_start, coord_end
+
+        self.length = max(x_end - x_start, y_end - y_start) + 1
+        self.coord_start = coord_start
+        self.coord_end = coord_end
+
+        self.mask = get_mask_from_coordinates(((x, y)
+                                               for x in range(x_start, x_end + 1)
+                                               for y in range(y_start, y_end + 1)), size_x)
+        self.mask_halo = get_mask_from_coordinates(((x, y)
+                                                    for x in range(max(x_start - 1, 1), min(x_end + 1, size_x) + 1)
+                                                    for y in range(max(y_start - 1, 1), min(y_end + 1, size_y) + 1)),
+                                                   size_x)
+
+    def __repr__(self):
+        return f"Placement(start={self.coord_start}, end={self.coord_end})"
+
+    def is_compatible_with(self, mask_blocked: int) -> bool:
+        """
+        :param mask_blocked: union of the halo masks of the ships already on the board
+        :return: True if and only if the ship can be placed there without being near another ship
+        """
+        return not self.mask & mask_blocked
+
+    def get_ship(self) -> Ship:
+        """
+        :return: a new Ship at that position
+        """
+        return Ship(coord_start=self.coord_start, coord_end=self.coord_end)
+
+
+class PlacementTable(object):
+    """
+    All the legal placements of the ships of each length on a board of a given size.
+    Tables are built once per board size, use get_placement_table to get them.
+    """
+
+    def __init__(self, size_x: int, size_y: int):
+        self.size_x = size_x
+        self.size_y = size_y
+
+        # length of ship -> list of all the legal placements of such a ship
+        self.dict_placements_per_length = {}
+
+    def get_placements(self, length: int) -> List[Placement]:
+        """
+        :return: the list of all the legal placements of a ship of that length, computed the first time it is needed.
+        A ship of length 1 has one placement per cell, the others have a horizontal and a vertical one per origin.
+        """
+        if length not in self.dict_placements_per_length:
+            list_placements = []
+
+            for y_start in range(1, self.size_y + 1):
+                for x_start in range(1, self.size_x + 2 - length):
+                    list_placements.append(Placement((x_start, y_start), (x_start + length - 1, y_start),
+                                                     self.size_x, self.size_y))
+
+            if length > 1:
+                for y_start in range(1, self.size_y + 2 - length):
+                    for x_start in range(1, self.size_x + 1):
+                        list_placements.append(Placement((x_start, y_start), (x_start, y_start + length - 1),
+                                                         self.size_x, self.size_y))
+
+            self.dict_placements_per_length[length] = list_placements
+
+        return self.dict_placements_per_length[length]
+
+    def get_placement_of_ship(self, ship: Ship) -> Placement:
+        """
+        :return: the placement at the same position as ship, looked up in the table in constant time
+        :raise ValueError if the ship is not entirely on the board
+        """
+        if not (1 <= ship.x_start and ship.x_end <= self.size_x and 1 <= ship.y_start and ship.y_end <= self.size_y):
+            raise ValueError(f"{ship} is not entirely on the board.")
+
+        length = ship.length()
+        number_placements_per_line = max(0, self.size_x + 1 - length)  ##  none if the ship is longer than a line
+
+        ## same order as in get_placements: horizontal placements line by line, then vertical ones
+        if ship.is_horizontal():
+            index_placement = (ship.y_start - 1) * number_placements_per_line + ship.x_start - 1
+        else:
+            index_placement = self.size_y * number_placements_per_line \
+                              + (ship.y_start - 1) * self.size_x + ship.x_start - 1
+
+        return self.get_placements(length)[index_placement]
+
+    def are_some_ships_near_each_other(self, list_ships: List[Ship]) -> bool:
+        """
+        Compares each ship to the union of the halos of the previous ones, so the cost is linear in the number of
+        ships.
+        :return: True if and only if at least 2 ships of list_ships are near each other (see Ship.is_near_ship)
+        :raise ValueError if a ship is not entirely on the board
+        """
+        mask_halos = 0
+        for ship in list_ships:
+            placement = self.get_placement_of_ship(ship)
+            if placement.mask & mask_halos:
+                return True
+            mask_halos |= placement.mask_halo
+        return False
+
+    def sample_fleet(self,
+                     dict_number_ships_per_length: Dict[int, int],
+                     rng=random) -> Tuple[Placement, ...]:
+        """
+        Randomly places all the ships of the fleet, biggest ships first. Each ship is placed uniformly among the
+        placements compatible with the ships already placed.
+
+        :param dict_number_ships_per_length: dict: length -> number of ships of that length
+        :param rng: random generator (random module or random.Random instance)
+        :return: a tuple with the placement of each ship
+        :raise ValueError if the fleet could not be placed
+        """
+        list_lengths = sorted((length
+                               for length, number_ships in dict_number_ships_per_length.items()
+                               for _ in range(number_ships)),
+                              reverse=True)
+
+        for _ in range(MAX_NUMBER_RESTARTS):
+            fleet = self._try_to_sample_fleet(list_lengths, rng)
+            if fleet is not None:
+                return fleet
+
+        raise ValueError(f"Could not place the ships {dict_number_ships_per_length} "
+                         f"on a board of size {self.size_x}x{self.size_y}.")
+
+    def _try_to_sample_fleet(self, list_lengths: List[int], rng) -> Tuple[Placement, ...]:
+        fleet = []
+        mask_blocked = 0
+
+        for length in list_lengths:
+            list_placements = self.get_placements(length)
+            placement = None
+
+            for _ in range(MAX_NUMBER_REJECTIONS):
+                placement_candidate = rng.choice(list_placements)
+                if placement_candidate.is_compatible_with(mask_blocked):
+                    placement = placement_candidate
+                    break
+
+            if placement is None:
+                list_placements_compatible = [placement_candidate for placement_candidate in list_placements
+                                              if placement_candidate.is_compatible_with(mask_blocked)]
+                if not list_placements_compatible:
+                    return None  # dead end, the fleet has to be placed again
+                placement = rng.choice(list_placements_compatible)
+
+            fleet.append(placement)
+            mask_blocked |= placement.mask_halo
+
+        return tuple(fleet)
+
+
+@lru_cache(maxsize=None)
+def get_placement_table(size_x: int, size_y: int) -> PlacementTable:
+    """
+    :return: the placement table of the boards of that size (the same object is returned for the same size)
+    """
+    return PlacementTable(size_x, size_y)
+
+
+def generate_fleets(dict_number_ships_per_length: Dict[int, int],
+                    size_x: int,
+                    size_y: int,
+                    number_fleets: int = None,
+                    rng=random) -> Iterator[Tuple[Placement, ...]]:
+    """
+    Stream of random valid fleets, for simulations.
+    A Board can be created from a fleet with Board([placement.get_ship() for placement in fleet]).
+
+    :param dict_number_ships_per_length: dict: length -> number of ships of that length
+    :param size_x: width of the board
+    :param size_y: height of the board
+    :param number_fleets: number of fleets generated, None for an infinite stream
+    :param rng: random generator (random module or random.Random instance)
+    :return: an iterator over the fleets, each fleet is a tuple with the placement of each ship
+    """
+    placement_table = get_placement_table(size_x, size_y)
+
+    number_fleets_generated = 0
+    while number_fleets is None or number_fleets_generated < number_fleets:
+        yield placement_table.sample_fleet(dict_number_ships_per_length, rng)
+        number_fleets_generated += 1
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+
+    table = get_placement_table(10, 10)
+    print(f"number of placements of a ship of length 5: {len(table.get_placements(5))}")
+
+    for fleet_sampled in generate_fleets({1: 1, 2: 1, 3: 1, 4: 1, 5: 1}, 10, 10, number_fleets=3):
+        print(fleet_sampled)
+
+    # the constant time lookup finds every placement of the table, on square and non-square boards
+    for size_x, size_y in ((10, 10), (3, 10), (10, 3), (1, 7), (7, 1), (5, 8)):
+        table = get_placement_table(size_x, size_y)
+        for length in range(1, max(size_x, size_y) + 1):
+            for placement in table.get_placements(length):
+                assert table.get_placement_of_ship(placement.get_ship()) is placement, (size_x, size_y, placement)
+    print("get_placement_of_ship agrees with get_placements")
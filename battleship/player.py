@@ -1,9 +1,15 @@
+import asyncio
 import random
 from typing import Tuple
 
 from battleship.board import Board, BoardAutomatic
+from battleship.config import GameConfig
 from battleship.ship import Ship
 from battleship.convert import get_tuple_coordinates_from_str, get_str_coordinates_from_tuple
+from battleship.density import PlacementDensity
+from battleship.profiling import PHASE_ATTACK, PHASE_BOARD, PHASE_LEARN, PHASE_RENDER, PHASE_SELECT, Profiler
+from battleship.solver import FleetSolver
+from battleship.targets import TargetPool, get_ship_sunk
 
 
 class Player(object):
@@ -21,6 +27,7 @@ class Player(object):
         Player.index_player += 1
 
         self.board = board
+        self.coord_last_attack = None
 
         if name_player is None:
             self.name_player = "player_" + str(self.index_player)
@@ -31,9 +38,13 @@ class Player(object):
         return self.name_player
 
     def attacks(self,
-                opponent) -> Tuple[bool, bool]:
+                opponent,
+                verbose: bool = True,
+                profiler: Profiler = None) -> Tuple[bool, bool]:
         """
         :param opponent: object of class Player representing the person to attack
+        :param verbose: if False, nothing is printed during the attack
+        :param profiler: if not None, the phases of the attack are timed (see battleship.profiling)
         :return: a tuple of bool variables (is_ship_hit, has_ship_sunk) where:
                     - is_ship_hit is True if and only if the attack was performed at a set of coordinates where an
                     opponent's ship is.
@@ -42,16 +53,61 @@ class Player(object):
 
         assert isinstance(opponent, Player)
 
+        if profiler is not None:
+            profiler.start(PHASE_ATTACK)
+
+        if verbose:
+            if profiler is not None:
+                profiler.start(PHASE_RENDER)
+            self._print_board_before_attack(opponent)
+            if profiler is not None:
+                profiler.stop()
+
+        if profiler is not None:
+            profiler.start(PHASE_SELECT)
+        coord_x, coord_y = self.coord_last_attack = self.select_coordinates_to_attack(opponent)
+        if profiler is not None:
+            profiler.stop()
+
+        if verbose:
+            if profiler is not None:
+                profiler.start(PHASE_RENDER)
+            self._print_attack(opponent, coord_x, coord_y)
+            if profiler is not None:
+                profiler.stop()
+
+        if profiler is not None:
+            profiler.start(PHASE_BOARD)
+        is_ship_hit, has_ship_sunk = opponent.is_attacked_at(coord_x, coord_y)
+        if profiler is not None:
+            profiler.stop()
+
+        if profiler is not None:
+            profiler.start(PHASE_LEARN)
+        self.update_after_attack(coord_x, coord_y, is_ship_hit, has_ship_sunk)
+        if profiler is not None:
+            profiler.stop()
+
+        if verbose:
+            if profiler is not None:
+                profiler.start(PHASE_RENDER)
+            self._print_outcome_attack(opponent, is_ship_hit, has_ship_sunk)
+            if profiler is not None:
+                profiler.stop()
+
+        if profiler is not None:
+            profiler.stop()
+        return is_ship_hit, has_ship_sunk
+
+    def _print_board_before_attack(self, opponent) -> None:
         print(f"Here is the current state of {opponent}'s board before {self}'s attack:\n")
         opponent.print_board_without_ships()
 
-        coord_x, coord_y = self.select_coordinates_to_attack(opponent)
-
+    def _print_attack(self, opponent, coord_x: int, coord_y: int) -> None:
         print(f"{self} attacks {opponent} "
               f"at position {get_str_coordinates_from_tuple(coord_x, coord_y)}")
 
-        is_ship_hit, has_ship_sunk = opponent.is_attacked_at(coord_x, coord_y)
-
+    def _print_outcome_attack(self, opponent, is_ship_hit: bool, has_ship_sunk: bool) -> None:
         if has_ship_sunk:
             print(f"\nA ship of {opponent} HAS SUNK. {self} can play another time.")
         elif is_ship_hit:
@@ -59,6 +115,16 @@ class Player(object):
         else:
             print("\nMissed".upper())
 
+    async def attacks_async(self,
+                            opponent) -> Tuple[bool, bool]:
+        """
+        Silent attack, waiting for the choice of the position with select_coordinates_to_attack_async.
+        :param opponent: object of class Player representing the person to attack
+        :return: a tuple of bool variables (is_ship_hit, has_ship_sunk), see Player.attacks
+        """
+        coord_x, coord_y = self.coord_last_attack = await self.select_coordinates_to_attack_async(opponent)
+        is_ship_hit, has_ship_sunk = opponent.is_attacked_at(coord_x, coord_y)
+        self.update_after_attack(coord_x, coord_y, is_ship_hit, has_ship_sunk)
         return is_ship_hit, has_ship_sunk
 
     def is_attacked_at(self,
@@ -83,11 +149,39 @@ class Player(object):
         """
         raise NotImplementedError
 
+    async def select_coordinates_to_attack_async(self, opponent) -> Tuple[int, int]:
+        """
+        Awaitable version of select_coordinates_to_attack, for the games played in an event loop.
+        By default, the choice is made inline by select_coordinates_to_attack, then the control is given back to the
+        event loop once, so that a game between bots does not prevent the other games from progressing.
+        Players waiting for an input (such as a remote user) override it.
+        :param opponent: object of class Player representing the player under attack
+        :return: a tuple of coordinates (coord_x, coord_y) at which the next attack will be performed
+        """
+        coordinates = self.select_coordinates_to_attack(opponent)
+        await asyncio.sleep(0)
+        return coordinates
+
+    def update_after_attack(self,
+                            coord_x: int,
+                            coord_y: int,
+                            is_ship_hit: bool,
+                            has_ship_sunk: bool) -> None:
+        """
+        Called after each attack of the player, with its outcome. Does nothing by default, strategies that learn
+        from the outcomes of their attacks override it.
+        :param coord_x: integer representing the projection of the attacked coordinate on the x-axis
+        :param coord_y: integer representing the projection of the attacked coordinate on the y-axis
+        :param is_ship_hit: True if and only if the attack hit a ship of the opponent
+        :param has_ship_sunk: True if and only if that attack made the ship sink
+        """
+        pass
+
     def has_lost(self) -> bool:
         """
         :return: True if and only if all the ships of the player have sunk
         """
-        return all(ship.has_sunk() for ship in self.board.list_ships)
+        return self.board.has_no_ships_left()
 
     def print_board_with_ships(self):
         self.board.print_board_with_ships_positions()
@@ -112,7 +206,7 @@ class PlayerUser(Player):
         while True:
             try:
                 coord_str = input('coordinates target = ')
-                coord_x, coord_y = get_tuple_coordinates_from_str(coord_str)
+                coord_x, coord_y = get_tuple_coordinates_from_str(coord_str, self.board.config)
                 return coord_x, coord_y
             except ValueError as value_error:
                 print(value_error)
@@ -124,14 +218,38 @@ class PlayerAutomatic(Player):
     """
 
 
-    def __init__(self, name_player: str = None):
-        board = BoardAutomatic()
+    def __init__(self,
+                 name_player: str = None,
+                 board: Board = None,
+                 config: GameConfig = None,
+                 weight_random_fallback: float = 1.,
+                 is_pruning_diagonals: bool = True,
+                 is_excluding_sunk_halos: bool = False,
+                 rng=random):
+        """
+        :param name_player: name of the player
+        :param board: board of the player, automatically (randomly) generated if None
+        :param config: config of the board automatically generated (ignored if board is provided)
+        :param weight_random_fallback: after hitting a ship without sinking it, the next attack is either a neighbour
+        of the hit not tried yet (weight 1 each) or a random coordinate not tried yet (this weight)
+        :param is_pruning_diagonals: if True, the diagonal neighbours of a hit are never attacked (no ship can be there)
+        :param is_excluding_sunk_halos: if True, the cells near a ship it sank are never attacked (no ship can be there)
+        :param rng: random generator of the board automatically generated and of the attacks (see battleship.rng)
+        """
+        if board is None:
+            board = BoardAutomatic(config, rng)
+
+        self.pool_coords_to_attack = TargetPool(board.config.size_x, board.config.size_y)
+        self.set_coords_hit = set()
 
-        self.list_coords_to_attack = [(i, j) for i in range(1, board.SIZE_X + 1) for j in range(1, board.SIZE_Y + 1)]
+        self.weight_random_fallback = weight_random_fallback
+        self.is_pruning_diagonals = is_pruning_diagonals
+        self.is_excluding_sunk_halos = is_excluding_sunk_halos
+        self.rng = rng
 
         self.first_go = True
 
-        self.coord_to_attack = random.choice(self.list_coords_to_attack)  ##  first shot random
+        self.coord_to_attack = self.pool_coords_to_attack.choice(rng)  ##  first shot random
 
 
         super().__init__(board, name_player)
@@ -167,26 +285,44 @@ class PlayerAutomatic(Player):
             self.first_go = False
             return self.coord_to_attack  ## if it's the first go return the random first coord
 
-        opponents_ships = opponent.board.list_ships
-
-        self.list_coords_to_attack.remove(self.coord_to_attack)
+        pool_coords_to_attack = self.pool_coords_to_attack
 
-        x, y = self.coord_to_attack
+        x, y = self.coord_to_attack  ##  the last attack, already removed from the pool by update_after_attack
 
         if self.did_we_just_hit_a_ship(x, y, opponent):
-            diag_coords = [(x + 1, y + 1), (x + 1, y - 1), (x - 1, y + 1), (x - 1, y - 1)]
-            self.list_coords_to_attack = [coord for coord in self.list_coords_to_attack if coord not in diag_coords]  ## remove diag coords as no ship can be there
             if self.did_we_just_sink_a_ship(x, y, opponent) == False:
-                while self.coord_to_attack not in self.list_coords_to_attack:
-                    self.coord_to_attack = random.choice([(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1), random.choice(self.list_coords_to_attack)])  ## if we just hit a ship but didn't sink it then try nearby coords that we have't tried, random chance to try a non-near coord in case we have tried all near coords
+                near_coords = [coord for coord in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)] if coord in pool_coords_to_attack]
+                if self.rng.random() * (len(near_coords) + self.weight_random_fallback) < len(near_coords):
+                    self.coord_to_attack = self.rng.choice(near_coords)  ## if we just hit a ship but didn't sink it then try nearby coords that we have't tried
+                else:
+                    self.coord_to_attack = pool_coords_to_attack.choice(self.rng)  ## random chance to try a non-near coord, always the case if we have tried all near coords
             else:
-                self.coord_to_attack = random.choice(self.list_coords_to_attack)  ##  if we just sunk a ship then try a random non-tried coord
+                self.coord_to_attack = pool_coords_to_attack.choice(self.rng)  ##  if we just sunk a ship then try a random non-tried coord
         else:
-            self.coord_to_attack = random.choice(self.list_coords_to_attack)  ##  if we didn't just hit a ship then choose a random non-tried coord
+            self.coord_to_attack = pool_coords_to_attack.choice(self.rng)  ##  if we didn't just hit a ship then choose a random non-tried coord
 
 
         return self.coord_to_attack
 
+    def update_after_attack(self,
+                            coord_x: int,
+                            coord_y: int,
+                            is_ship_hit: bool,
+                            has_ship_sunk: bool) -> None:
+        self.first_go = False
+        self.coord_to_attack = (coord_x, coord_y)
+
+        self.pool_coords_to_attack.discard(self.coord_to_attack)
+        if not is_ship_hit:
+            return
+        self.set_coords_hit.add((coord_x, coord_y))
+
+        if has_ship_sunk and self.is_excluding_sunk_halos:
+            self.pool_coords_to_attack.discard_near_ship(get_ship_sunk(coord_x, coord_y, self.set_coords_hit))  ## no ship can be near a sunk ship
+        if self.is_pruning_diagonals:
+            self.pool_coords_to_attack.discard_all([(coord_x + 1, coord_y + 1), (coord_x + 1, coord_y - 1),
+                                                    (coord_x - 1, coord_y + 1), (coord_x - 1, coord_y - 1)])  ## remove diag coords as no ship can be there
+
 
 '''
         ## This hacks the game. In a game between two AI players the first player will win.
@@ -199,12 +335,24 @@ class PlayerAutomatic(Player):
         return self.list_coords_to_attack.pop(0)
 '''
 class PlayerRandom(Player):
-    def __init__(self, name_player: str = None):
-        board = BoardAutomatic()
+    def __init__(self, name_player: str = None, board: Board = None, config: GameConfig = None, rng=random):
+        """
+        :param name_player: name of the player
+        :param board: board of the player, automatically (randomly) generated if None
+        :param config: config of the board automatically generated (ignored if board is provided)
+        :param rng: random generator of the board automatically generated and of the attacks (see battleship.rng)
+        """
+        if board is None:
+            board = BoardAutomatic(config, rng)
         self.set_positions_previously_attacked = set()
+        self.set_positions_hit = set()
         self.last_attack_coord = None
         self.list_ships_opponent_previously_sunk = []
 
+        ##  positions neither attacked yet nor near a ship previously sunk
+        self.pool_coords_to_attack = TargetPool(board.config.size_x, board.config.size_y)
+        self.rng = rng
+
         super().__init__(board, name_player)
 
     def select_coordinates_to_attack(self, opponent: Player) -> tuple:
@@ -215,31 +363,123 @@ class PlayerRandom(Player):
         return position_to_attack
 
     def select_random_coordinates_to_attack(self) -> tuple:
-        has_position_been_previously_attacked = True
-        is_position_near_previously_sunk_ship = True
-        coord_random = None
+        """
+        :return: a position uniformly drawn among the ones which have not been attacked yet and are not near a ship
+        previously sunk
+        :raise IndexError if there are no such positions left
+        """
+        return self.pool_coords_to_attack.pop_random(self.rng)
 
-        while has_position_been_previously_attacked or is_position_near_previously_sunk_ship:
-            coord_random = self._get_random_coordinates()
+    def add_ship_opponent_previously_sunk(self, ship_opponent: Ship) -> None:
+        """
+        The positions near that sunk ship of the opponent are not attacked anymore.
+        """
+        self.list_ships_opponent_previously_sunk.append(ship_opponent)
+        self.pool_coords_to_attack.discard_near_ship(ship_opponent)
+
+    def update_after_attack(self,
+                            coord_x: int,
+                            coord_y: int,
+                            is_ship_hit: bool,
+                            has_ship_sunk: bool) -> None:
+        self.set_positions_previously_attacked.add((coord_x, coord_y))
+        self.pool_coords_to_attack.discard((coord_x, coord_y))
+        if is_ship_hit:
+            self.set_positions_hit.add((coord_x, coord_y))
+        if has_ship_sunk:
+            self.add_ship_opponent_previously_sunk(get_ship_sunk(coord_x, coord_y, self.set_positions_hit))
+
+
+class PlayerProbabilistic(Player):
+    """
+    Player attacking the position most likely to contain a ship, given the outcomes of its previous attacks.
+    The probability density of the positions of the opponent's ships is updated incrementally after each attack
+    (see battleship.density).
+    """
+
+    def __init__(self, name_player: str = None, board: Board = None, config: GameConfig = None, rng=random):
+        """
+        :param name_player: name of the player
+        :param board: board of the player, automatically (randomly) generated if None.
+        The opponent's board is assumed to have the same config.
+        :param config: config of the board automatically generated (ignored if board is provided)
+        :param rng: random generator of the board automatically generated (see battleship.rng)
+        """
+        if board is None:
+            board = BoardAutomatic(config, rng)
+
+        self.density = PlacementDensity(board.config)
 
-            has_position_been_previously_attacked = coord_random in self.set_positions_previously_attacked
-            is_position_near_previously_sunk_ship = self._is_position_near_previously_sunk_ship(coord_random)
+        super().__init__(board, name_player)
+
+    def select_coordinates_to_attack(self, opponent: Player) -> tuple:
+        """
+        Overrides the abstract method of the parent class.
+        :param opponent: object of class Player representing the player under attack
+        :return: a tuple of coordinates (coord_x, coord_y) at which the next attack will be performed
+        """
+        return self.density.get_best_coordinates()
 
-        return coord_random
+    def update_after_attack(self,
+                            coord_x: int,
+                            coord_y: int,
+                            is_ship_hit: bool,
+                            has_ship_sunk: bool) -> None:
+        self.density.update(coord_x, coord_y, is_ship_hit, has_ship_sunk)
+
+
+class PlayerSolver(PlayerProbabilistic):
+    """
+    Player attacking the position with the highest posterior probability of containing a ship, computed by
+    enumerating all the fleets of the opponent consistent with the outcomes of its previous attacks (see
+    battleship.solver). The knowledge of the opponent's board (hits, misses, sunk ships and their lengths) is kept by
+    the density of the parent class.
+    """
+
+    def __init__(self,
+                 name_player: str = None,
+                 board: Board = None,
+                 config: GameConfig = None,
+                 duration_budget: float = 0.01,
+                 rng=random):
+        """
+        :param name_player: name of the player
+        :param board: board of the player, automatically (randomly) generated if None.
+        The opponent's board is assumed to have the same config.
+        :param config: config of the board automatically generated (ignored if board is provided)
+        :param duration_budget: time budget for choosing an attack, in seconds. Past a quarter of it, the exact
+        enumeration is abandoned and the probabilities are estimated by sampling fleets.
+        :param rng: random generator of the board automatically generated and of the sampling (see battleship.rng)
+        """
+        super().__init__(name_player, board, config, rng)
+
+        self.solver = FleetSolver(self.board.config, duration_budget, rng)
+
+    def select_coordinates_to_attack(self, opponent: Player) -> tuple:
+        """
+        Overrides the method of the parent class.
+        :param opponent: object of class Player representing the player under attack
+        :return: a tuple of coordinates (coord_x, coord_y) at which the next attack will be performed
+        """
+        density = self.density
+        mask_hits = density.get_mask_cells_hit_not_sunk()
+        list_lengths = [length
+                        for length, number_ships in density.dict_number_ships_remaining_per_length.items()
+                        for _ in range(number_ships)]
 
-    def _get_random_coordinates(self) -> tuple:
-        coord_random_x = random.randint(1, self.board.SIZE_X)
-        coord_random_y = random.randint(1, self.board.SIZE_Y)
+        result = self.solver.solve(density.mask_cells_known & ~mask_hits, mask_hits, list_lengths)
 
-        coord_random = (coord_random_x, coord_random_y)
+        list_numbers_fleets_per_cell = result.list_numbers_fleets_per_cell
+        index_best_cell = None
+        for index_cell, is_cell_known in enumerate(density.list_is_cell_known):
+            if not is_cell_known and (index_best_cell is None or list_numbers_fleets_per_cell[index_cell]
+                                      > list_numbers_fleets_per_cell[index_best_cell]):
+                index_best_cell = index_cell
 
-        return coord_random
+        if index_best_cell is None or not list_numbers_fleets_per_cell[index_best_cell]:
+            return density.get_best_coordinates()  # no fleet sampled in time
+        return density.get_coordinates(index_best_cell)
 
-    def _is_position_near_previously_sunk_ship(self, coord: tuple) -> bool:
-        for ship_opponent in self.list_ships_opponent_previously_sunk:  # type: Ship
-            if ship_opponent.has_sunk() and ship_opponent.is_near_coordinate(*coord):
-                return True
-        return False
 
 if __name__ == '__main__':
     # SANDBOX for you to play and test your functions
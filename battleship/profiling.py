@@ -0,0 +1,197 @@
+"""
+Optional instrumentation of the games: time spent in each phase of Game.play and Player.attacks.
+
+A Profiler is given to a Game (Game(..., profiler=profiler)). The phases measured are:
+- PHASE_GAME: a whole game, all the other phases are inside it
+- PHASE_TURN: the turn of a player, made of its attacks (a player plays again after hitting a ship)
+- PHASE_ATTACK: an attack of a player, made of the 3 following phases (and of PHASE_RENDER if the game is verbose)
+- PHASE_SELECT: the strategy choosing the cell to attack (Player.select_coordinates_to_attack)
+- PHASE_BOARD: the board of the opponent receiving the attack (Player.is_attacked_at)
+- PHASE_LEARN: the player learning from the outcome of its attack (Player.update_after_attack)
+- PHASE_RENDER: the printing of the boards and of the messages of a verbose game
+- PHASE_EVENTS: the delivery of the events to the sinks of the game (see battleship.events), which may write files
+
+For each phase, the profiler counts the calls, the total time, the time spent outside of the phases nested in it
+(self time) and the net number of memory blocks allocated (sys.getallocatedblocks, a cheap CPython counter).
+The results are printed as a table, and exported as a Chrome trace (to open in chrome://tracing or Perfetto) or as
+folded stacks (the input of flamegraph.pl and speedscope).
+
+Without a profiler, the only cost is a check that the profiler is None per attack and per turn.
+
+Usage:
+    python -m battleship.profiling --player-1 automatic --player-2 probabilistic --games 100 \
+        --trace trace.json --folded stacks.txt
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Tuple
+
+PHASE_GAME = 'game'
+PHASE_TURN = 'turn'
+PHASE_ATTACK = 'attack'
+PHASE_SELECT = 'select'
+PHASE_BOARD = 'board'
+PHASE_LEARN = 'learn'
+PHASE_RENDER = 'render'
+PHASE_EVENTS = 'events'
+
+
+class PhaseStatistics(NamedTuple):
+    name_phase: str
+    number_calls: int
+    duration_total: float  # in seconds
+    duration_self: float  # in seconds, without the phases nested in it
+    number_blocks_allocated: int  # net number of memory blocks allocated during the phase
+
+
+class Profiler(object):
+    """
+    Collects the timings of the phases started and stopped by the instrumented code.
+    The phases are nested: stop always ends the phase started last.
+    """
+
+    def __init__(self, is_recording_trace: bool = False, is_counting_allocations: bool = True):
+        """
+        :param is_recording_trace: if True, every phase is kept, so that it can be exported with write_chrome_trace.
+        It takes memory proportional to the number of phases, the summary and the folded stacks do not need it.
+        :param is_counting_allocations: if True, the memory blocks allocated during each phase are counted
+        """
+        self.is_recording_trace = is_recording_trace
+        self.is_counting_allocations = is_counting_allocations
+
+        self.time_origin = time.perf_counter_ns()
+
+        # stack of the phases started and not stopped yet:
+        # [name of the phase, index of the player, start in ns, blocks at the start, ns spent in nested phases]
+        self.list_phases_running = []  # type: List[list]
+
+        # name of a phase -> [number of calls, total ns, self ns, number of blocks allocated]
+        self.dict_totals_per_phase = defaultdict(lambda: [0, 0, 0, 0])  # type: Dict[str, List[int]]
+        # names of the phases from the outermost one -> self ns
+        self.dict_durations_self_per_stack = defaultdict(int)  # type: Dict[Tuple[str, ...], int]
+        # phases stopped, if the trace is recorded: (name of the phase, index of the player, start ns, duration ns)
+        self.list_spans = []  # type: List[Tuple[str, int, int, int]]
+
+    def start(self, name_phase: str, index_player: int = None) -> None:
+        """
+        :param name_phase: one of the PHASE_ constants, or any name for a custom phase
+        :param index_player: player the phase belongs to (1 or 2), 0 if it is not specific to a player.
+        If None, it is the one of the phase it is nested in.
+        """
+        if index_player is None:
+            index_player = self.list_phases_running[-1][1] if self.list_phases_running else 0
+        number_blocks = sys.getallocatedblocks() if self.is_counting_allocations else 0
+        self.list_phases_running.append([name_phase, index_player, time.perf_counter_ns(), number_blocks, 0])
+
+    def stop(self) -> None:
+        """
+        Ends the phase started last.
+        :raise IndexError if no phase is running
+        """
+        time_stop = time.perf_counter_ns()
+        number_blocks = sys.getallocatedblocks() if self.is_counting_allocations else 0
+
+        stack = tuple(phase[0] for phase in self.list_phases_running)
+        name_phase, index_player, time_start, number_blocks_start, duration_nested = self.list_phases_running.pop()
+        duration = time_stop - time_start
+
+        totals = self.dict_totals_per_phase[name_phase]
+        totals[0] += 1
+        totals[1] += duration
+        totals[2] += duration - duration_nested
+        totals[3] += number_blocks - number_blocks_start
+
+        self.dict_durations_self_per_stack[stack] += duration - duration_nested
+        if self.list_phases_running:
+            self.list_phases_running[-1][4] += duration
+
+        if self.is_recording_trace:
+            self.list_spans.append((name_phase, index_player, time_start - self.time_origin, duration))
+
+    def get_summary(self) -> List[PhaseStatistics]:
+        """
+        :return: the statistics of each phase, the phase with the most self time first
+        """
+        list_statistics = [PhaseStatistics(name_phase, number_calls, duration_total / 1e9, duration_self / 1e9,
+                                           number_blocks)
+                           for name_phase, (number_calls, duration_total, duration_self, number_blocks)
+                           in self.dict_totals_per_phase.items()]
+        return sorted(list_statistics, key=lambda statistics: statistics.duration_self, reverse=True)
+
+    def print_summary(self) -> None:
+        list_statistics = self.get_summary()
+        duration_self_all = sum(statistics.duration_self for statistics in list_statistics)
+
+        print(f"{'phase':<10} {'calls':>10} {'total (s)':>11} {'self (s)':>11} {'self %':>7} {'us / call':>10} "
+              f"{'blocks':>10}")
+        for statistics in list_statistics:
+            print(f"{statistics.name_phase:<10} {statistics.number_calls:>10d} {statistics.duration_total:>11.4f} "
+                  f"{statistics.duration_self:>11.4f} "
+                  f"{100 * statistics.duration_self / duration_self_all if duration_self_all else 0.:>6.1f}% "
+                  f"{1e6 * statistics.duration_total / statistics.number_calls:>10.2f} "
+                  f"{statistics.number_blocks_allocated:>10d}")
+
+    def write_chrome_trace(self, path: str) -> None:
+        """
+        Writes the phases recorded in the Chrome trace event format, each player in its own row.
+        :raise ValueError if the profiler was not recording the trace
+        """
+        if not self.is_recording_trace:
+            raise ValueError("The trace was not recorded, the profiler should be created with is_recording_trace.")
+
+        list_events = [{'name': name_phase, 'cat': 'battleship', 'ph': 'X', 'pid': 0, 'tid': index_player,
+                        'ts': time_start / 1e3, 'dur': duration / 1e3}
+                       for name_phase, index_player, time_start, duration in self.list_spans]
+
+        with open(path, 'w') as file_trace:
+            json.dump({'traceEvents': list_events, 'displayTimeUnit': 'ms'}, file_trace)
+
+    def write_folded_stacks(self, path: str) -> None:
+        """
+        Writes a line "phase;nested phase;... self_microseconds" per stack of phases, the input of flame graphs.
+        """
+        with open(path, 'w') as file_stacks:
+            for stack, duration_self in sorted(self.dict_durations_self_per_stack.items()):
+                file_stacks.write(f"{';'.join(stack)} {duration_self // 1000}\n")
+
+
+def main() -> None:
+    from battleship.game import Game
+    from battleship.player import PlayerAutomatic, PlayerProbabilistic, PlayerRandom, PlayerSolver
+    from battleship.rng import get_rng_game
+
+    dict_classes_players = {
+        'random': PlayerRandom,
+        'automatic': PlayerAutomatic,
+        'probabilistic': PlayerProbabilistic,
+        'solver': PlayerSolver,
+    }
+
+    parser = argparse.ArgumentParser(description="Profiles the phases of silent games between two strategies.")
+    parser.add_argument('--player-1', choices=sorted(dict_classes_players), default='automatic')
+    parser.add_argument('--player-2', choices=sorted(dict_classes_players), default='probabilistic')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trace', help="path of the Chrome trace written")
+    parser.add_argument('--folded', help="path of the folded stacks written")
+    arguments = parser.parse_args()
+
+    profiler = Profiler(is_recording_trace=arguments.trace is not None)
+    for index_game in range(arguments.games):
+        rng = get_rng_game(arguments.seed, index_game)
+        player_1 = dict_classes_players[arguments.player_1](name_player="player_1", rng=rng)
+        player_2 = dict_classes_players[arguments.player_2](name_player="player_2", rng=rng)
+        Game(player_1, player_2, verbose=False, rng=rng, profiler=profiler).play()
+
+    profiler.print_summary()
+    if arguments.trace is not None:
+        profiler.write_chrome_trace(arguments.trace)
+    if arguments.folded is not None:
+        profiler.write_folded_stacks(arguments.folded)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Cached and incremental rendering of the boards.
+
+The frame of a board (column letters, line numbers, separators) only depends on the size of the board, so it is
+built once per size. A BoardRenderer keeps the rendered board in a buffer and, at each render, only patches the
+cells that changed since the previous render (the shots received in the meantime). In ANSI diff mode, only the
+escape sequences redrawing these cells are produced, so a live game is redrawn in constant time per shot.
+"""
+from functools import lru_cache
+from typing import List
+
+from battleship.placement import get_index_cell
+
+OFFSET_UPPER_CASE_CHAR_CONVERSION = 64
+NUMBER_LETTERS = 26
+
+CHAR_EMPTY = ord(' ')
+CHAR_SHIP = ord('S')
+CHAR_HIT = ord('X')
+CHAR_SUNK = ord('$')
+CHAR_MISS = ord('O')
+
+ANSI_CLEAR_SCREEN = '\x1b[2J\x1b[H'
+
+
+@lru_cache(maxsize=None)
+def get_str_column(coord_x: int) -> str:
+    """
+    :return: the name of the column coord_x: 'A' for 1, ..., 'Z' for 26, then 'AA', 'AB', ..., 'AZ', 'BA'...
+    """
+    str_column = ''
+    while coord_x > 0:
+        coord_x, index_letter = divmod(coord_x - 1, NUMBER_LETTERS)
+        str_column = chr(index_letter + 1 + OFFSET_UPPER_CASE_CHAR_CONVERSION) + str_column
+    return str_column
+
+
+class BoardFrame(object):
+    """
+    Empty rendered board of a given size, with the position of each cell in it.
+    Use get_board_frame to get the frames.
+    """
+
+    def __init__(self, size_x: int, size_y: int):
+        array_first_line = [get_str_column(coord_x) for coord_x in range(1, size_x + 1)]
+        first_line = ' ' * 6 + ''.join(str_column.ljust(6) for str_column in array_first_line[:-1]) \
+            + array_first_line[-1] + ' \n'
+        line_dashes = '   ' + '-' * 6 * size_x + '-\n'
+
+        list_parts = [first_line, line_dashes]
+        length_template = len(first_line) + len(line_dashes)
+
+        # index of a cell -> position of its character in the template
+        self.list_positions_cells = [0] * (size_x * size_y)
+        # index of a cell -> (line, column) of its character on the terminal, starting at 0
+        self.list_lines_columns_cells = [(0, 0)] * (size_x * size_y)
+
+        for coord_y in range(1, size_y + 1):
+            number_spaces_before_line = 2 - len(str(coord_y))
+            prefix_line = f'{number_spaces_before_line * " "}{coord_y} |  '
+            line = prefix_line + '  |  '.join(' ' * size_x) + '  |\n'
+
+            for coord_x in range(1, size_x + 1):
+                index_cell = get_index_cell(coord_x, coord_y, size_x)
+                column = len(prefix_line) + 6 * (coord_x - 1)
+                self.list_positions_cells[index_cell] = length_template + column
+                self.list_lines_columns_cells[index_cell] = (2 * coord_y, column)
+
+            list_parts += [line, line_dashes]
+            length_template += len(line) + len(line_dashes)
+
+        self.template = ''.join(list_parts).encode('ascii')
+
+
+@lru_cache(maxsize=None)
+def get_board_frame(size_x: int, size_y: int) -> BoardFrame:
+    """
+    :return: the frame of the boards of that size (the same object is returned for the same size)
+    """
+    return BoardFrame(size_x, size_y)
+
+
+class BoardRenderer(object):
+    """
+    Renders a board, patching at each render only the cells attacked since the previous render.
+    """
+
+    def __init__(self, board, with_ships_positions: bool = True):
+        """
+        :param board: Board to render
+        :param with_ships_positions: if False, the positions of the ships which have not been hit are hidden
+        """
+        self.board = board
+        self.with_ships_positions = with_ships_positions
+        self.size_x = board.config.size_x
+        self.size_y = board.config.size_y
+        self.frame = get_board_frame(board.config.size_x, board.config.size_y)
+
+        self.buffer = bytearray(self.frame.template)
+        self.list_cells_changed = []  # type: List[int]
+
+        # index of a cell -> ship at that cell, the ships never move
+        self.dict_ships_per_cell = {get_index_cell(coord_x, coord_y, self.size_x): ship
+                                    for ship in board.list_ships
+                                    for coord_x, coord_y in ship.set_all_coordinates}
+
+        self._draw_all_cells()
+        self.number_shots_rendered = len(board.list_coordinates_previous_shots)
+
+    def _set_cell(self, index_cell: int, char: int) -> None:
+        position = self.frame.list_positions_cells[index_cell]
+        if self.buffer[position] != char:
+            self.buffer[position] = char
+            self.list_cells_changed.append(index_cell)
+
+    def _draw_ship(self, ship) -> None:
+        if ship.has_sunk():
+            for coord_x, coord_y in ship.set_all_coordinates:
+                self._set_cell(get_index_cell(coord_x, coord_y, self.size_x), CHAR_SUNK)
+            return
+
+        if self.with_ships_positions:
+            for coord_x, coord_y in ship.set_all_coordinates:
+                self._set_cell(get_index_cell(coord_x, coord_y, self.size_x), CHAR_SHIP)
+
+        for coord_x, coord_y in ship.set_coordinates_damages:
+            self._set_cell(get_index_cell(coord_x, coord_y, self.size_x), CHAR_HIT)
+
+    def _is_on_board(self, coord_x: int, coord_y: int) -> bool:
+        return 1 <= coord_x <= self.size_x and 1 <= coord_y <= self.size_y
+
+    def _draw_all_cells(self) -> None:
+        for coord_x, coord_y in self.board.set_coordinates_previous_shots:
+            if not self._is_on_board(coord_x, coord_y):
+                continue  # the shots outside of the board are not drawn
+            self._set_cell(get_index_cell(coord_x, coord_y, self.size_x), CHAR_MISS)
+
+        for ship in self.board.list_ships:
+            self._draw_ship(ship)
+
+    def _draw_new_shots(self) -> None:
+        list_coordinates_previous_shots = self.board.list_coordinates_previous_shots
+
+        for coord_x, coord_y in list_coordinates_previous_shots[self.number_shots_rendered:]:
+            if not self._is_on_board(coord_x, coord_y):
+                continue
+            index_cell = get_index_cell(coord_x, coord_y, self.size_x)
+            ship = self.dict_ships_per_cell.get(index_cell)
+
+            if ship is None:
+                self._set_cell(index_cell, CHAR_MISS)
+            elif ship.has_sunk():
+                self._draw_ship(ship)
+            else:
+                self._set_cell(index_cell, CHAR_HIT)
+
+        self.number_shots_rendered = len(list_coordinates_previous_shots)
+
+    def render(self) -> str:
+        """
+        :return: the board as a string, such as the ones printed by Board.print_board_with_ships_positions
+        """
+        self._draw_new_shots()
+        self.list_cells_changed.clear()
+        return self.buffer.decode('ascii')
+
+    def render_ansi_full(self, line_origin: int = 1, column_origin: int = 1) -> str:
+        """
+        :param line_origin: line of the terminal where the board is drawn (starting at 1)
+        :param column_origin: column of the terminal where the board is drawn (starting at 1)
+        :return: escape sequences clearing the terminal and drawing the whole board at (line_origin, column_origin)
+        """
+        board_str = self.render()
+        return ANSI_CLEAR_SCREEN + ''.join(f'\x1b[{line_origin + index_line};{column_origin}H{line}'
+                                           for index_line, line in enumerate(board_str.splitlines()))
+
+    def render_ansi_diff(self, line_origin: int = 1, column_origin: int = 1) -> str:
+        """
+        To be used after render_ansi_full, with the same origin.
+        :return: escape sequences redrawing only the cells which changed since the previous render
+        """
+        self._draw_new_shots()
+
+        list_sequences = []
+        for index_cell in self.list_cells_changed:
+            line, column = self.frame.list_lines_columns_cells[index_cell]
+            char = chr(self.buffer[self.frame.list_positions_cells[index_cell]])
+            list_sequences.append(f'\x1b[{line_origin + line};{column_origin + column}H{char}')
+        self.list_cells_changed.clear()
+
+        return ''.join(list_sequences)
@@ -0,0 +1,241 @@
+"""
+Compact binary replay logs of games.
+
+A log starts with the 4 bytes MAGIC_REPLAY, followed by the records of the games, one after the other.
+Each record is made of:
+- a header (see STRUCT_HEADER_GAME, little-endian): size_x, size_y, flags, number of shots
+- the shots, 2 bytes each (unsigned little-endian integers), in the order they were fired:
+    - bits 0 to 12: index of the cell attacked (see battleship.placement.get_index_cell)
+    - bit 13: set if the shot was fired by the second player
+    - bit 14: set if a ship was hit
+    - bit 15: set if a ship sank
+The flags of the header tell which player started (bit 0 set for the second player) and which player won
+(bit 1 set for the second player).
+
+ReplaySink writes a log from the events of games, ReplayReader memory-maps a log and iterates over its games lazily.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterator, NamedTuple
+
+from battleship.events import EventSink, GameStartEvent, ShotEvent, WinEvent
+from battleship.placement import get_index_cell
+
+MAGIC_REPLAY = b'BSR1'
+
+STRUCT_HEADER_GAME = struct.Struct('<HHBI')
+
+MAX_NUMBER_CELLS = 1 << 13
+
+BIT_PLAYER_2 = 1 << 13
+BIT_SHIP_HIT = 1 << 14
+BIT_SHIP_SUNK = 1 << 15
+MASK_INDEX_CELL = BIT_PLAYER_2 - 1
+
+FLAG_PLAYER_2_STARTING = 1
+FLAG_PLAYER_2_WINNER = 2
+
+SIZE_BUFFER_WRITE = 1 << 20
+
+
+def encode_shot(index_cell: int, index_player: int, is_ship_hit: bool, has_ship_sunk: bool) -> int:
+    """
+    :return: the shot packed in an integer of 16 bits
+    """
+    return index_cell \
+        | (BIT_PLAYER_2 if index_player == 2 else 0) \
+        | (BIT_SHIP_HIT if is_ship_hit else 0) \
+        | (BIT_SHIP_SUNK if has_ship_sunk else 0)
+
+
+class ReplayShot(NamedTuple):
+    index_player: int
+    coord_x: int
+    coord_y: int
+    is_ship_hit: bool
+    has_ship_sunk: bool
+
+
+class ReplaySink(EventSink):
+    """
+    Sink appending the games it receives to a binary replay log.
+    The shots of a game are kept in memory until the end of the game, then the whole record is written at once in
+    a large write buffer.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path of the log, created if it does not exist, the games are appended to it otherwise
+        :raise ValueError if the file exists and is not a replay log
+        """
+        self.file = open(path, 'ab', buffering=SIZE_BUFFER_WRITE)
+        if self.file.tell() == 0:
+            self.file.write(MAGIC_REPLAY)
+        else:
+            with open(path, 'rb') as file_existing:
+                is_replay_log = file_existing.read(len(MAGIC_REPLAY)) == MAGIC_REPLAY
+            if not is_replay_log:
+                self.file.close()
+                raise ValueError(f"{path} is not a replay log.")
+
+        self.size_x = None
+        self.size_y = None
+        self.flags = 0
+        self.array_shots = array('H')
+
+    def handle(self, event: NamedTuple) -> None:
+        if isinstance(event, ShotEvent):
+            index_cell = get_index_cell(event.coord_x, event.coord_y, self.size_x)
+            self.array_shots.append(encode_shot(index_cell, event.index_player,
+                                                event.is_ship_hit, event.has_ship_sunk))
+
+        elif isinstance(event, GameStartEvent):
+            if event.config.number_cells > MAX_NUMBER_CELLS:
+                raise ValueError(f"The replay logs only support boards of at most {MAX_NUMBER_CELLS} cells.")
+
+            self.size_x, self.size_y = event.config.size_x, event.config.size_y
+            self.flags = FLAG_PLAYER_2_STARTING if event.index_player_starting == 2 else 0
+            self.array_shots = array('H')
+
+        elif isinstance(event, WinEvent):
+            if event.index_player == 2:
+                self.flags |= FLAG_PLAYER_2_WINNER
+
+            if sys.byteorder == 'big':
+                self.array_shots.byteswap()
+
+            self.file.write(STRUCT_HEADER_GAME.pack(self.size_x, self.size_y, self.flags, len(self.array_shots)))
+            self.file.write(self.array_shots.tobytes())
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayGame(object):
+    """
+    A game of a replay log, its shots are read from the memory-mapped log only when they are iterated over.
+    The players are identified by their index, as in battleship.events.
+    """
+
+    def __init__(self, size_x: int, size_y: int, flags: int, memoryview_shots: memoryview):
+        self.size_x = size_x
+        self.size_y = size_y
+        self.index_player_starting = 2 if flags & FLAG_PLAYER_2_STARTING else 1
+        self.index_winner = 2 if flags & FLAG_PLAYER_2_WINNER else 1
+        self.memoryview_shots = memoryview_shots
+
+    def __len__(self):
+        return len(self.memoryview_shots)
+
+    def __repr__(self):
+        return f"ReplayGame(size=({self.size_x},{self.size_y}), number_shots={len(self)}, " \
+               f"winner={self.index_winner})"
+
+    def get_raw_shots(self) -> memoryview:
+        """
+        :return: the shots packed as integers of 16 bits (see the description of the format), without copy
+        """
+        return self.memoryview_shots
+
+    def iter_shots(self) -> Iterator[ReplayShot]:
+        """
+        :return: an iterator over the decoded shots of the game
+        """
+        for shot in self.memoryview_shots:
+            index_cell = shot & MASK_INDEX_CELL
+            yield ReplayShot(2 if shot & BIT_PLAYER_2 else 1,
+                             index_cell % self.size_x + 1,
+                             index_cell // self.size_x + 1,
+                             bool(shot & BIT_SHIP_HIT),
+                             bool(shot & BIT_SHIP_SUNK))
+
+
+class ReplayReader(object):
+    """
+    Reads a replay log without loading it: the file is memory-mapped and the games are decoded one at a time.
+    """
+
+    def __init__(self, path: str):
+        """
+        :raise ValueError if the file is not a replay log
+        """
+        self.file = open(path, 'rb')
+        if os.fstat(self.file.fileno()).st_size < len(MAGIC_REPLAY):
+            self.file.close()
+            raise ValueError(f"{path} is not a replay log.")
+        self.path = path
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.memoryview = memoryview(self.mmap)
+
+        if self.memoryview[:len(MAGIC_REPLAY)] != MAGIC_REPLAY:
+            self.close()
+            raise ValueError(f"{path} is not a replay log.")
+
+    def __iter__(self) -> Iterator[ReplayGame]:
+        """
+        :raise ValueError when it reaches a record cut off by an interrupted writer, after the complete games
+        """
+        offset = len(MAGIC_REPLAY)
+        size_file = len(self.memoryview)
+
+        while offset < size_file:
+            if offset + STRUCT_HEADER_GAME.size > size_file:
+                raise ValueError(f"The last game of {self.path} is truncated.")
+            size_x, size_y, flags, number_shots = STRUCT_HEADER_GAME.unpack_from(self.memoryview, offset)
+            offset += STRUCT_HEADER_GAME.size
+
+            if offset + 2 * number_shots > size_file:
+                raise ValueError(f"The last game of {self.path} is truncated.")
+
+            bytes_shots = self.memoryview[offset:offset + 2 * number_shots]
+            offset += 2 * number_shots
+
+            if sys.byteorder == 'big':
+                array_shots = array('H', bytes_shots)
+                array_shots.byteswap()
+                memoryview_shots = memoryview(array_shots)
+            else:
+                memoryview_shots = bytes_shots.cast('H')
+
+            yield ReplayGame(size_x, size_y, flags, memoryview_shots)
+
+    def close(self) -> None:
+        """
+        Closes the log. The shots of the games still referenced elsewhere remain readable, the mapping is then
+        released once the last of these games is garbage collected.
+        """
+        self.memoryview.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+    from battleship.game import Game
+    from battleship.player import PlayerAutomatic, PlayerRandom
+
+    with ReplaySink('replay_sandbox.bsr') as replay_sink:
+        for _ in range(10):
+            Game(PlayerAutomatic(), PlayerRandom(), verbose=False, list_sinks=[replay_sink]).play()
+
+    with ReplayReader('replay_sandbox.bsr') as replay_reader:
+        for replay_game in replay_reader:
+            print(replay_game, next(replay_game.iter_shots()))
@@ -0,0 +1,105 @@
+"""
+Random generators injected in the components of the game (boards, players, games).
+
+All the components accept an rng argument: any object with the methods of random.Random used by the game (random,
+choice, randint, shuffle, sample). By default, it is the random module itself, so seeding the random module keeps
+working. To get reproducible games whatever the process playing them, each game gets its own generator, built from
+the seed of the tournament and the index of the game only (see get_rng_game):
+- KIND_RNG_PYTHON: a random.Random, the games are the same as with random.seed(get_seed_game(seed, index_game))
+- KIND_RNG_NUMPY: a NumpyRandom, drawing from a NumPy Generator whose stream is spawned from the seed of the
+  tournament for each game (numpy is then needed).
+A given generator does not give the same games as before it was injected: PlayerRandom and PlayerAutomatic draw
+their attacks from a battleship.targets.TargetPool, whose order depends on the cells removed before, and PlayerRandom
+skips the cells near the ships it sank. So the seeded games of the matchups including either player (such as the
+default one of run_tournament) changed.
+"""
+import random
+from typing import List, MutableSequence, Sequence
+
+KIND_RNG_PYTHON = 'python'
+KIND_RNG_NUMPY = 'numpy'
+
+# number of random floats drawn at once by a NumpyRandom
+SIZE_BUFFER_NUMPY = 1024
+
+
+def get_seed_game(seed: int, index_game: int) -> str:
+    """
+    :return: the seed used for the game number index_game of a tournament seeded with seed.
+    It only depends on (seed, index_game), so a game is reproducible whatever the worker that plays it.
+    """
+    return f"{seed}:{index_game}"
+
+
+class NumpyRandom(object):
+    """
+    Subset of the interface of random.Random used by the game, drawing from a NumPy Generator.
+    The floats are drawn in batches of SIZE_BUFFER_NUMPY and served one at a time, and all the other draws are made
+    from them, so a call costs about as much as a list access.
+    """
+
+    def __init__(self, generator, size_buffer: int = SIZE_BUFFER_NUMPY):
+        """
+        :param generator: numpy.random.Generator
+        :param size_buffer: number of floats drawn at once
+        """
+        self.generator = generator
+        self.size_buffer = size_buffer
+        self.list_floats = []  # type: List[float]
+
+    def random(self) -> float:
+        """
+        :return: a float uniformly drawn in [0, 1)
+        """
+        if not self.list_floats:
+            self.list_floats = self.generator.random(self.size_buffer).tolist()
+        return self.list_floats.pop()
+
+    def randint(self, a: int, b: int) -> int:
+        """
+        :return: an integer uniformly drawn in [a, b]
+        """
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, sequence: Sequence):
+        """
+        :return: an element uniformly drawn from the non-empty sequence
+        """
+        return sequence[int(self.random() * len(sequence))]
+
+    def shuffle(self, sequence: MutableSequence) -> None:
+        """
+        Shuffles the sequence in place (Fisher-Yates).
+        """
+        for index in range(len(sequence) - 1, 0, -1):
+            index_other = int(self.random() * (index + 1))
+            sequence[index], sequence[index_other] = sequence[index_other], sequence[index]
+
+    def sample(self, population: Sequence, k: int) -> list:
+        """
+        :return: a list of k distinct elements drawn from the population
+        """
+        list_population = list(population)
+        for index in range(k):
+            index_other = index + int(self.random() * (len(list_population) - index))
+            list_population[index], list_population[index_other] = \
+                list_population[index_other], list_population[index]
+        return list_population[:k]
+
+
+def get_rng_game(seed: int, index_game: int, kind_rng: str = KIND_RNG_PYTHON):
+    """
+    :param seed: seed of the tournament (or of the sweep, of the benchmark...)
+    :param index_game: index of the game in the tournament
+    :param kind_rng: KIND_RNG_PYTHON or KIND_RNG_NUMPY
+    :return: the generator of that game, it only depends on the arguments
+    :raise ValueError if the kind of generator is unknown
+    """
+    if kind_rng == KIND_RNG_PYTHON:
+        return random.Random(get_seed_game(seed, index_game))
+
+    if kind_rng == KIND_RNG_NUMPY:
+        import numpy as np
+        return NumpyRandom(np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index_game,))))
+
+    raise ValueError(f"Unknown kind of random generator: {kind_rng}")
@@ -0,0 +1,169 @@
+"""
+asyncio server hosting many concurrent games between remote users and bots, over TCP or a Unix socket.
+
+Line protocol (one message per line, coordinates written as in the game, e.g. 'B7'):
+- server -> client:
+    WELCOME <size_x> <size_y>          at the connection, a game against a bot starts right after
+    START you|bot                      who plays first
+    TURN                               the client has to send the coordinates of its next attack
+    SHOT you|bot <coordinates> MISS|HIT|SUNK
+    ERROR <message>                    the coordinates sent are not valid, another TURN follows
+    WIN you|bot                        end of the game, the server then closes the connection
+- client -> server:
+    <coordinates>                      answer to TURN
+
+Usage:
+    python -m battleship.server --port 8765 --bot probabilistic
+"""
+import argparse
+import asyncio
+from typing import NamedTuple, Tuple
+
+from battleship.board import Board, BoardAutomatic
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.convert import get_str_coordinates_from_tuple, get_tuple_coordinates_from_str
+from battleship.events import EventSink, GameStartEvent, ShotEvent, WinEvent
+from battleship.game import Game
+from battleship.player import Player, PlayerAutomatic, PlayerProbabilistic, PlayerRandom
+
+DICT_CLASSES_BOTS = {
+    'random': PlayerRandom,
+    'automatic': PlayerAutomatic,
+    'probabilistic': PlayerProbabilistic,
+}
+
+INDEX_PLAYER_REMOTE = 1  # the remote user is always the first player of the game of its session
+
+
+class PlayerRemote(Player):
+    """
+    Player whose moves are sent through a connection to the server.
+    """
+
+    def __init__(self,
+                 reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter,
+                 board: Board,
+                 name_player: str = None):
+        self.reader = reader
+        self.writer = writer
+
+        super().__init__(board, name_player)
+
+    def select_coordinates_to_attack(self, opponent: Player) -> Tuple[int, int]:
+        raise NotImplementedError("A remote player can only play asynchronously.")
+
+    async def select_coordinates_to_attack_async(self, opponent: Player) -> Tuple[int, int]:
+        """
+        Overrides the method of the parent class: asks the client for coordinates until it sends valid ones.
+        :raise ConnectionError if the client disconnects
+        """
+        while True:
+            self.writer.write(b"TURN\n")
+            await self.writer.drain()
+
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError(f"{self} disconnected.")
+
+            try:
+                return get_tuple_coordinates_from_str(line.decode(errors='replace'), self.board.config)
+            except ValueError as value_error:
+                self.writer.write(f"ERROR {value_error}\n".encode())
+
+
+class SessionSink(EventSink):
+    """
+    Sink sending the events of the game of a session to its client.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+
+    @staticmethod
+    def _get_name_player(index_player: int) -> str:
+        return 'you' if index_player == INDEX_PLAYER_REMOTE else 'bot'
+
+    def handle(self, event: NamedTuple) -> None:
+        if isinstance(event, ShotEvent):
+            outcome = 'SUNK' if event.has_ship_sunk else 'HIT' if event.is_ship_hit else 'MISS'
+            self.writer.write(f"SHOT {self._get_name_player(event.index_player)} "
+                              f"{get_str_coordinates_from_tuple(event.coord_x, event.coord_y)} {outcome}\n".encode())
+        elif isinstance(event, GameStartEvent):
+            self.writer.write(f"START {self._get_name_player(event.index_player_starting)}\n".encode())
+        elif isinstance(event, WinEvent):
+            self.writer.write(f"WIN {self._get_name_player(event.index_player)}\n".encode())
+
+
+class GameServer(object):
+    """
+    Hosts one game per connection, between the remote user and a bot. All the games run in the same event loop:
+    the users' moves are awaited, the bots' moves are computed inline.
+    """
+
+    def __init__(self, class_bot=PlayerProbabilistic, config: GameConfig = DEFAULT_CONFIG):
+        """
+        :param class_bot: class of the bots, constructible from a config without a board (e.g. PlayerProbabilistic)
+        :param config: config of the games
+        """
+        self.class_bot = class_bot
+        self.config = config
+
+        self.number_sessions_active = 0
+        self.number_sessions_completed = 0
+
+    async def handle_session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Plays a game with the client of the connection, then closes it.
+        """
+        self.number_sessions_active += 1
+        try:
+            writer.write(f"WELCOME {self.config.size_x} {self.config.size_y}\n".encode())
+
+            player_remote = PlayerRemote(reader, writer, BoardAutomatic(self.config), name_player='you')
+            player_bot = self.class_bot(name_player='bot', config=self.config)
+
+            game = Game(player_remote, player_bot, verbose=False, list_sinks=[SessionSink(writer)])
+            await game.play_async()
+            await writer.drain()
+
+            self.number_sessions_completed += 1
+        except ConnectionError:
+            pass
+        finally:
+            self.number_sessions_active -= 1
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, path_unix_socket: str = None):
+        """
+        Starts listening, on the Unix socket path_unix_socket if it is given, on (host, port) otherwise.
+        :return: the asyncio server
+        """
+        if path_unix_socket is not None:
+            return await asyncio.start_unix_server(self.handle_session, path=path_unix_socket)
+        return await asyncio.start_server(self.handle_session, host=host, port=port)
+
+
+async def serve_forever(server: GameServer, host: str, port: int, path_unix_socket: str = None) -> None:
+    asyncio_server = await server.start(host, port, path_unix_socket)
+    async with asyncio_server:
+        await asyncio_server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Battleship server, hosting games between remote users and bots.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="path of a Unix socket to listen on instead of TCP")
+    parser.add_argument('--bot', choices=sorted(DICT_CLASSES_BOTS), default='probabilistic')
+    arguments = parser.parse_args()
+
+    server = GameServer(DICT_CLASSES_BOTS[arguments.bot])
+    try:
+        asyncio.run(serve_forever(server, arguments.host, arguments.port, arguments.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+"""
+Store of the boards and results of many games in shared memory, for the pools of processes.
+
+The driver writes the fleets of both players of every game in a BoardStore, the workers attach to it by its name and
+play the games of their range of indices against the fleets read from it. They write the outcome of each game back in
+the store: the winner, the number of shots of each player, and the mask of the shots received by each board (see
+battleship.placement.get_index_cell). Only the name of the store and the ranges of games cross the process boundary,
+and the driver reads the results straight out of the shared buffer.
+
+The fleets are chosen by the driver, not drawn from the random generator of each game as in
+battleship.tournament.run_tournament: the games of a store are not the games of a tournament with the same seed, only
+their distribution is the same when the fleets are randomly placed.
+
+Layout of the buffer (little-endian, each section starts at a multiple of 8 bytes):
+- the 4 bytes MAGIC_STORE
+- a header (see STRUCT_HEADER_STORE): size_x, size_y, number of games, number of lengths of ships
+- for each length of ship: (length, number of ships of that length), see STRUCT_LENGTH_SHIPS
+- the fleets: for each game, for each player, for each ship (biggest first), the indices of the cells of its two ends
+- the results: for each game, (index of the winner, 0 if the game was not played, shots of player 1, of player 2)
+- the shots: for each game, for each player, the mask of the cells of its board which were shot at
+"""
+import argparse
+import random
+import struct
+import time
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, List, Tuple, Type
+
+from battleship.board import Board
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.game import Game
+from battleship.placement import Placement, get_index_cell, get_mask_from_coordinates, generate_fleets
+from battleship.player import Player, PlayerAutomatic, PlayerRandom
+from battleship.rng import KIND_RNG_NUMPY, KIND_RNG_PYTHON, get_rng_game
+from battleship.ship import Ship
+from battleship.tournament import TournamentResults
+
+MAGIC_STORE = b'BSM1'
+
+STRUCT_HEADER_STORE = struct.Struct('<4sHHIH')
+STRUCT_LENGTH_SHIPS = struct.Struct('<HH')
+
+SIZE_ITEM = 4  # bytes of the items of the fleets and of the results
+NUMBER_ITEMS_RESULT = 3
+ALIGNMENT_SECTIONS = 8
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT_SECTIONS) * ALIGNMENT_SECTIONS
+
+
+class BoardStore(object):
+    """
+    Fleets and results of number_games games, in a block of shared memory.
+    Use BoardStore.create in the driver and BoardStore.attach in the workers.
+    """
+
+    def __init__(self, shared_memory: SharedMemory, config: GameConfig, number_games: int):
+        self.shared_memory = shared_memory
+        self.config = config
+        self.number_games = number_games
+        self.number_ships = len(config.get_list_lengths_ships())
+        self.number_bytes_mask = -(-config.number_cells // 8)
+
+        offset_fleets, offset_results, offset_shots, offset_end = self._get_offsets_sections(config, number_games)
+
+        # views on the buffer, nothing is copied
+        buffer = shared_memory.buf
+        self.view_fleets = buffer[offset_fleets:offset_results].cast('I')
+        self.view_results = buffer[offset_results:offset_shots].cast('I')
+        self.view_shots = buffer[offset_shots:offset_end]
+
+    @staticmethod
+    def _get_offsets_sections(config: GameConfig, number_games: int) -> Tuple[int, int, int, int]:
+        """
+        :return: the offsets of the fleets, of the results, of the shots and of the end of the buffer of a store
+        """
+        number_ships = len(config.get_list_lengths_ships())
+        offset_fleets = _align(STRUCT_HEADER_STORE.size
+                               + STRUCT_LENGTH_SHIPS.size * len(config.tuple_number_ships_per_length))
+        offset_results = _align(offset_fleets + number_games * 2 * number_ships * 2 * SIZE_ITEM)
+        offset_shots = _align(offset_results + number_games * NUMBER_ITEMS_RESULT * SIZE_ITEM)
+        offset_end = offset_shots + number_games * 2 * -(-config.number_cells // 8)
+        return offset_fleets, offset_results, offset_shots, offset_end
+
+    @classmethod
+    def create(cls, config: GameConfig = None, number_games: int = 1) -> 'BoardStore':
+        """
+        Allocates a new block of shared memory. The games are not played yet, and their fleets are empty.
+        The driver should unlink the store once all the processes are done with it.
+        """
+        if config is None:
+            config = DEFAULT_CONFIG
+        shared_memory = SharedMemory(create=True, size=cls._get_offsets_sections(config, number_games)[-1])
+
+        offset = STRUCT_HEADER_STORE.size
+        STRUCT_HEADER_STORE.pack_into(shared_memory.buf, 0, MAGIC_STORE, config.size_x, config.size_y, number_games,
+                                      len(config.tuple_number_ships_per_length))
+        for length, number_ships in config.tuple_number_ships_per_length:
+            STRUCT_LENGTH_SHIPS.pack_into(shared_memory.buf, offset, length, number_ships)
+            offset += STRUCT_LENGTH_SHIPS.size
+
+        return cls(shared_memory, config, number_games)
+
+    @classmethod
+    def attach(cls, name: str) -> 'BoardStore':
+        """
+        :param name: name of a store created by another process (see BoardStore.name)
+        :raise ValueError if the block of shared memory is not a store
+        """
+        shared_memory = SharedMemory(name=name)
+        magic, size_x, size_y, number_games, number_lengths = STRUCT_HEADER_STORE.unpack_from(shared_memory.buf, 0)
+        if magic != MAGIC_STORE:
+            shared_memory.close()
+            raise ValueError(f"The shared memory {name} is not a board store.")
+
+        offset_lengths = STRUCT_HEADER_STORE.size
+        dict_number_ships_per_length = dict(STRUCT_LENGTH_SHIPS.iter_unpack(
+            shared_memory.buf[offset_lengths:offset_lengths + number_lengths * STRUCT_LENGTH_SHIPS.size]))
+
+        return cls(shared_memory, GameConfig(size_x, size_y, dict_number_ships_per_length), number_games)
+
+    @property
+    def name(self) -> str:
+        return self.shared_memory.name
+
+    def close(self) -> None:
+        """
+        Detaches this process from the store, the views cannot be used anymore.
+        """
+        self.view_fleets.release()
+        self.view_results.release()
+        self.view_shots.release()
+        self.shared_memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the block of shared memory, once all the processes have closed it.
+        """
+        self.shared_memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def set_fleet(self, index_game: int, index_player: int, fleet: Iterable[Placement]) -> None:
+        """
+        :param index_player: 1 or 2
+        :param fleet: placement of each ship, biggest first (e.g. a fleet of battleship.placement.generate_fleets)
+        """
+        offset = ((index_game * 2) + index_player - 1) * self.number_ships * 2
+        size_x = self.config.size_x
+        for placement in fleet:
+            self.view_fleets[offset] = get_index_cell(*placement.coord_start, size_x)
+            self.view_fleets[offset + 1] = get_index_cell(*placement.coord_end, size_x)
+            offset += 2
+
+    def fill_random_fleets(self, rng=random) -> None:
+        """
+        Sets both fleets of every game, with ships randomly placed.
+        The fleets are drawn from rng, not from the generators of the games (see battleship.rng.get_rng_game), so
+        they are not the fleets of run_tournament with the same seed.
+        """
+        iterator_fleets = generate_fleets(self.config.dict_number_ships_per_length, self.config.size_x,
+                                          self.config.size_y, 2 * self.number_games, rng)
+        for index_game in range(self.number_games):
+            for index_player in (1, 2):
+                self.set_fleet(index_game, index_player, next(iterator_fleets))
+
+    def get_list_ships(self, index_game: int, index_player: int) -> List[Ship]:
+        """
+        :return: new ships of the fleet of the player in the game
+        """
+        offset = ((index_game * 2) + index_player - 1) * self.number_ships * 2
+        size_x = self.config.size_x
+        list_ships = []
+        for offset_ship in range(offset, offset + self.number_ships * 2, 2):
+            y_start, x_start = divmod(self.view_fleets[offset_ship], size_x)
+            y_end, x_end = divmod(self.view_fleets[offset_ship + 1], size_x)
+            list_ships.append(Ship(coord_start=(x_start + 1, y_start + 1), coord_end=(x_end + 1, y_end + 1)))
+        return list_ships
+
+    def set_result(self,
+                   index_game: int,
+                   index_winner: int,
+                   number_shots_player_1: int,
+                   number_shots_player_2: int) -> None:
+        offset = index_game * NUMBER_ITEMS_RESULT
+        self.view_results[offset] = index_winner
+        self.view_results[offset + 1] = number_shots_player_1
+        self.view_results[offset + 2] = number_shots_player_2
+
+    def get_result(self, index_game: int) -> Tuple[int, int, int]:
+        """
+        :return: a tuple (index of the winner, 0 if the game was not played, shots of player 1, shots of player 2)
+        """
+        offset = index_game * NUMBER_ITEMS_RESULT
+        return tuple(self.view_results[offset:offset + NUMBER_ITEMS_RESULT])
+
+    def set_mask_shots(self, index_game: int, index_player: int, mask_shots: int) -> None:
+        """
+        :param mask_shots: mask of the cells of the board of the player which were shot at
+        """
+        offset = ((index_game * 2) + index_player - 1) * self.number_bytes_mask
+        self.view_shots[offset:offset + self.number_bytes_mask] = mask_shots.to_bytes(self.number_bytes_mask,
+                                                                                      'little')
+
+    def get_mask_shots(self, index_game: int, index_player: int) -> int:
+        offset = ((index_game * 2) + index_player - 1) * self.number_bytes_mask
+        return int.from_bytes(self.view_shots[offset:offset + self.number_bytes_mask], 'little')
+
+    def get_tournament_results(self) -> TournamentResults:
+        """
+        :return: the results of the games played (see battleship.tournament)
+        """
+        results = TournamentResults()
+        view_results = self.view_results
+        for offset in range(0, self.number_games * NUMBER_ITEMS_RESULT, NUMBER_ITEMS_RESULT):
+            index_winner = view_results[offset]
+            if index_winner:
+                results.add_game(index_winner == 1, view_results[offset + index_winner])
+        return results
+
+
+def play_game_from_store(store: BoardStore,
+                         index_game: int,
+                         rng,
+                         class_player_1: Type[Player],
+                         class_player_2: Type[Player]) -> None:
+    """
+    Plays a silent game between the fleets of the game in the store, and writes its outcome in the store.
+    :param rng: random generator of the game (see battleship.rng)
+    :param class_player_1: class of the first player, it should be constructible from a board, a config and a
+    random generator (e.g. PlayerAutomatic)
+    """
+    config = store.config
+    player_1 = class_player_1(name_player="player_1", board=Board(store.get_list_ships(index_game, 1), config),
+                              config=config, rng=rng)
+    player_2 = class_player_2(name_player="player_2", board=Board(store.get_list_ships(index_game, 2), config),
+                              config=config, rng=rng)
+
+    game = Game(player_1, player_2, verbose=False, rng=rng)
+    winner = game.play()
+
+    store.set_result(index_game, game.get_index_player(winner), game.dict_number_shots_per_player[player_1],
+                     game.dict_number_shots_per_player[player_2])
+    for index_player, player in ((1, player_1), (2, player_2)):
+        store.set_mask_shots(index_game, index_player,
+                             get_mask_from_coordinates(player.board.set_coordinates_previous_shots, config.size_x))
+
+
+# store of a worker, attached by _initialize_worker
+_store_worker = None  # type: BoardStore
+
+
+def _initialize_worker(name_store: str) -> None:
+    global _store_worker
+    _store_worker = BoardStore.attach(name_store)
+
+
+def _play_range(arguments: tuple) -> int:
+    index_first_game, index_last_game, class_player_1, class_player_2, seed, kind_rng = arguments
+    for index_game in range(index_first_game, index_last_game):
+        play_game_from_store(_store_worker, index_game, get_rng_game(seed, index_game, kind_rng),
+                             class_player_1, class_player_2)
+    return index_last_game - index_first_game
+
+
+def play_games_in_store(store: BoardStore,
+                        class_player_1: Type[Player] = PlayerAutomatic,
+                        class_player_2: Type[Player] = PlayerRandom,
+                        seed: int = 0,
+                        number_workers: int = None,
+                        size_chunk: int = 1000,
+                        kind_rng: str = KIND_RNG_PYTHON) -> TournamentResults:
+    """
+    Plays all the games of the store over a pool of processes attached to it.
+
+    :param store: store whose fleets are set
+    :param class_player_1: class of the first player (must be importable, so that it can be sent to the workers)
+    :param class_player_2: class of the second player
+    :param seed: seed of the attacks. The results only depend on it and on the fleets, not on the number of workers.
+    They are not the results of run_tournament with the same seed, whose fleets are drawn from the generators of the
+    games.
+    :param number_workers: number of processes. None uses all the cores, 1 plays everything in this process.
+    :param size_chunk: number of games played by a worker per task
+    :param kind_rng: kind of the random generator of each game (see battleship.rng)
+    :return: the aggregated results of all the games, read from the store
+    """
+    global _store_worker
+    list_arguments = [(index_first_game, min(index_first_game + size_chunk, store.number_games),
+                       class_player_1, class_player_2, seed, kind_rng)
+                      for index_first_game in range(0, store.number_games, size_chunk)]
+
+    if number_workers == 1:
+        _store_worker = store
+        try:
+            for arguments in list_arguments:
+                _play_range(arguments)
+        finally:
+            _store_worker = None
+    else:
+        with Pool(processes=number_workers, initializer=_initialize_worker, initargs=(store.name,)) as pool:
+            for _ in pool.imap_unordered(_play_range, list_arguments):
+                pass
+
+    return store.get_tournament_results()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Plays games between random fleets stored in shared memory.")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk', type=int, default=1000, help="number of games per task")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rng', choices=[KIND_RNG_PYTHON, KIND_RNG_NUMPY], default=KIND_RNG_PYTHON,
+                        help="kind of the random generator of each game")
+    arguments = parser.parse_args()
+
+    store = BoardStore.create(DEFAULT_CONFIG, arguments.games)
+    try:
+        store.fill_random_fleets(random.Random(arguments.seed))
+        time_start = time.perf_counter()
+        results = play_games_in_store(store, seed=arguments.seed, number_workers=arguments.workers,
+                                      size_chunk=arguments.chunk, kind_rng=arguments.rng)
+        duration = time.perf_counter() - time_start
+        print(f"{results}  ({arguments.games / duration:.0f} games/s)")
+    finally:
+        store.close()
+        store.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
 class Ship(object):
     """
-    Representing the ships that are placed on the board
+    Representing the ships that are placed on the board.
+    A ship only stores its 4 coordinates and its damages, as a small bitmask (bit i is set if the ship is damaged at
+    its i-th position from its start): the sets of coordinates are built only when they are asked for.
     """
+    __slots__ = ('x_start', 'y_start', 'x_end', 'y_end', 'bits_damages')
 
     def __init__(self,
                  coord_start: tuple,
@@ -22,8 +25,23 @@ class Ship(object):
         if not self.is_horizontal() and not self.is_vertical():
             raise ValueError("The ship_1 needs to have either a horizontal or a vertical orientation.")
 
-        self.set_coordinates_damages = set()
-        self.set_all_coordinates = self.get_all_coordinates()
+        self.bits_damages = 0
+
+    @property
+    def set_all_coordinates(self) -> set:
+        """
+        :return: a new set containing all the coordinates of the ship
+        """
+        return self.get_all_coordinates()
+
+    @property
+    def set_coordinates_damages(self) -> set:
+        """
+        :return: a new set containing the coordinates at which the ship is damaged
+        """
+        if self.is_vertical():
+            return {(self.x_start, self.y_start + i) for i in range(self.length()) if self.bits_damages >> i & 1}
+        return {(self.x_start + i, self.y_start) for i in range(self.length()) if self.bits_damages >> i & 1}
 
     def __len__(self):
         return self.length()
@@ -32,10 +50,18 @@ class Ship(object):
         return f"Ship(start=({self.x_start},{self.y_start}), end=({self.x_end},{self.y_end}))"
 
     @classmethod
-    def get_ship_from_str_coordinates(cls, coord_str_start: str, coord_str_end: str) -> 'Ship':
+    def get_ship_from_str_coordinates(cls, coord_str_start: str, coord_str_end: str, config=None) -> 'Ship':
+        """
+        :param config: GameConfig of the board the ship is on, DEFAULT_CONFIG if None
+        """
+        from battleship.config import DEFAULT_CONFIG
         from battleship.convert import get_tuple_coordinates_from_str
-        return cls(coord_start=get_tuple_coordinates_from_str(coord_str_start),
-                   coord_end=get_tuple_coordinates_from_str(coord_str_end))
+
+        if config is None:
+            config = DEFAULT_CONFIG
+
+        return cls(coord_start=get_tuple_coordinates_from_str(coord_str_start, config),
+                   coord_end=get_tuple_coordinates_from_str(coord_str_end, config))
 
     def is_vertical(self) -> bool:
         """
@@ -68,7 +94,7 @@ class Ship(object):
         :param coord_y: integer representing the projection of a coordinate on the y-axis
         :return: True if and only if the ship if (coord_x, coord_y) is one of the coordinates of the ship
         """
-        return (coord_x, coord_y) in self.get_all_coordinates()  ##  bool if the coord to check is in the set of all coords
+        return self.x_start <= coord_x <= self.x_end and self.y_start <= coord_y <= self.y_end  ##  the ship is a rectangle
 
     def gets_damage_at(self,
                        coord_damage_x: int,
@@ -80,8 +106,8 @@ class Ship(object):
         :param coord_damage_y: integer representing the projection of a coordinate on the y-axis
         """
         if self.is_on_coordinate(coord_damage_x, coord_damage_y):  ##  if the ship is on the attacked coords
-            self.set_coordinates_damages.add((coord_damage_x, coord_damage_y))
-            ##  add the coords to the set of damaged coords
+            self.bits_damages |= 1 << (coord_damage_x - self.x_start + coord_damage_y - self.y_start)
+            ##  set the bit of the position of the coords along the ship
 
 
     def is_damaged_at(self,
@@ -93,19 +119,20 @@ class Ship(object):
         :param coord_y: integer representing the projection of a coordinate on the y-axis
         :return True if and only if the ship is damaged at (coord_x, coord_y)
         """
-        return (coord_x, coord_y) in self.set_coordinates_damages  ##  checks if coords in set of damaged coords
+        return self.is_on_coordinate(coord_x, coord_y) \
+            and bool(self.bits_damages >> (coord_x - self.x_start + coord_y - self.y_start) & 1)
 
     def number_damages(self) -> int:
         """
         :return: The total number of coordinates at which the ship is damaged
         """
-        return len(self.set_coordinates_damages)  ##  length of set
+        return bin(self.bits_damages).count('1')  ##  number of bits set
 
     def has_sunk(self) -> bool:
         """
         :return: True if and only if ship is damaged at all its positions
         """
-        return self.number_damages() == self.length()
+        return self.bits_damages == (1 << self.length()) - 1  ##  all the bits of the positions of the ship are set
 
     def get_all_coordinates(self) -> set:
         """
@@ -153,8 +180,10 @@ class Ship(object):
         :return: False if and only if there is a coordinate of other_ship that is near this ship.
         """
 
-        return any(self.is_near_coordinate(other_ship_coord[0], other_ship_coord[1]) for other_ship_coord in other_ship.get_all_coordinates())
-        ## checks if any coordinates of other_ship are near coordinates of ship
+        return self.x_start - 1 <= other_ship.x_end and other_ship.x_start <= self.x_end + 1 \
+               and self.y_start - 1 <= other_ship.y_end and other_ship.y_start <= self.y_end + 1
+        ## both ships are rectangles: other_ship is near this ship if and only if it intersects the rectangle made
+        ## of this ship and the positions near it
 
 if __name__ == '__main__':
     # SANDBOX for you to play and test your functions
@@ -0,0 +1,386 @@
+"""
+Immutable snapshots of the state of a game, for the strategies exploring many continuations of a game.
+
+A GameState holds the fleets of both boards, the shots each board received (in order) and the player whose turn it
+is. It is never modified: apply_shot returns a new state, which shares everything but a few integers with the state
+it comes from. So forking a state is free (the same state can be continued in many ways), and a new state costs a
+small constant memory:
+- the fleets (positions of the ships, bitboards of the ships) are shared by all the states of a game
+- the damages are the bitboards of the shots received, ships being sunk when all their cells were shot
+- the shots received by each board are kept in a persistent linked list (a new shot is a node pointing to the
+  previous shots), so the order of the shots is known without copying them
+
+A state is serialized with to_bytes and deserialized with GameState.from_bytes (little-endian):
+- the 4 bytes MAGIC_STATE
+- a header (see STRUCT_HEADER_STATE): size_x, size_y, index of the player starting, index of the player whose turn
+  it is
+- for each board: the number of ships, the ships (see STRUCT_SHIP: x_start, y_start, x_end, y_end), the number of
+  shots received, the shots (indices of the cells attacked, see battleship.placement.get_index_cell, 2 bytes each)
+
+A game is resumed from a state with Game.from_state.
+"""
+import struct
+from collections import Counter
+from typing import Iterator, List, Tuple
+
+from battleship.board import Board
+from battleship.config import GameConfig
+from battleship.placement import get_index_cell, get_mask_from_coordinates
+from battleship.ship import Ship
+
+MAGIC_STATE = b'BSS1'
+
+STRUCT_HEADER_STATE = struct.Struct('<HHBB')
+STRUCT_SHIP = struct.Struct('<HHHH')
+STRUCT_NUMBER = struct.Struct('<I')
+
+NO_SHIP = -1
+
+TUPLE_INDICES_PLAYERS = (1, 2)
+
+
+class Fleet(object):
+    """
+    Positions of the ships of a board, shared by all the states of a game.
+    """
+    __slots__ = ('config', 'tuple_coordinates_ships', 'tuple_masks_ships', 'mask_occupancy', 'tuple_ships_per_cell')
+
+    def __init__(self, list_coordinates_ships: List[Tuple[int, int, int, int]], config: GameConfig):
+        """
+        :param list_coordinates_ships: list of the tuples (x_start, y_start, x_end, y_end) of the ships
+        :param config: config of the board
+        """
+        self.config = config
+        self.tuple_coordinates_ships = tuple(list_coordinates_ships)
+        self.tuple_masks_ships = tuple(get_mask_from_coordinates(((coord_x, coord_y)
+                                                                  for coord_x in range(x_start, x_end + 1)
+                                                                  for coord_y in range(y_start, y_end + 1)),
+                                                                 config.size_x)
+                                       for x_start, y_start, x_end, y_end in self.tuple_coordinates_ships)
+
+        self.mask_occupancy = 0
+        for mask_ship in self.tuple_masks_ships:
+            self.mask_occupancy |= mask_ship
+
+        # index of a cell -> index of the ship at that cell, NO_SHIP if there is none
+        list_ships_per_cell = [NO_SHIP] * (config.size_x * config.size_y)
+        for index_ship, (x_start, y_start, x_end, y_end) in enumerate(self.tuple_coordinates_ships):
+            for coord_x in range(x_start, x_end + 1):
+                for coord_y in range(y_start, y_end + 1):
+                    list_ships_per_cell[get_index_cell(coord_x, coord_y, config.size_x)] = index_ship
+        self.tuple_ships_per_cell = tuple(list_ships_per_cell)
+
+    @classmethod
+    def get_fleet_from_board(cls, board: Board) -> 'Fleet':
+        return cls([(ship.x_start, ship.y_start, ship.x_end, ship.y_end) for ship in board.list_ships], board.config)
+
+    def get_list_ships(self) -> List[Ship]:
+        """
+        :return: new Ship objects, without damages, at the positions of the ships of the fleet
+        """
+        return [Ship(coord_start=(x_start, y_start), coord_end=(x_end, y_end))
+                for x_start, y_start, x_end, y_end in self.tuple_coordinates_ships]
+
+
+def _iterate_shots(shots: tuple) -> Iterator[int]:
+    """
+    :param shots: persistent list of the shots: (index of the cell of the last shot, previous shots) or None
+    :return: iterator over the indices of the cells shot, the first shot first
+    """
+    list_indices_cells = []
+    while shots is not None:
+        index_cell, shots = shots
+        list_indices_cells.append(index_cell)
+    return reversed(list_indices_cells)
+
+
+class GameState(object):
+    """
+    Immutable state of a game between two players, identified by their index (1 or 2) as in Game.
+    The board of a player is the board receiving the attacks of the other player.
+    """
+    __slots__ = ('fleet_1', 'fleet_2', 'mask_shots_1', 'mask_shots_2', 'shots_1', 'shots_2', 'number_shots_1',
+                 'number_shots_2', 'index_player_starting', 'index_player_turn')
+
+    def __init__(self,
+                 fleet_1: Fleet,
+                 fleet_2: Fleet,
+                 index_player_starting: int,
+                 index_player_turn: int = None,
+                 mask_shots_1: int = 0,
+                 mask_shots_2: int = 0,
+                 shots_1: tuple = None,
+                 shots_2: tuple = None,
+                 number_shots_1: int = 0,
+                 number_shots_2: int = 0):
+        """
+        :param fleet_1: ships of the board of the first player
+        :param fleet_2: ships of the board of the second player
+        :param index_player_starting: player who started the game
+        :param index_player_turn: player who attacks next, index_player_starting if None
+        :param mask_shots_1: bitboard of the cells of the board of the first player which received a shot
+        :param mask_shots_2: same for the board of the second player
+        :param shots_1: persistent list of the shots received by the board of the first player:
+        (index of the cell of the last shot, previous shots), None if there are none
+        :param shots_2: same for the board of the second player
+        :param number_shots_1: number of shots received by the board of the first player (fired by the second one)
+        :param number_shots_2: same for the board of the second player
+        """
+        object.__setattr__(self, 'fleet_1', fleet_1)
+        object.__setattr__(self, 'fleet_2', fleet_2)
+        object.__setattr__(self, 'mask_shots_1', mask_shots_1)
+        object.__setattr__(self, 'mask_shots_2', mask_shots_2)
+        object.__setattr__(self, 'shots_1', shots_1)
+        object.__setattr__(self, 'shots_2', shots_2)
+        object.__setattr__(self, 'number_shots_1', number_shots_1)
+        object.__setattr__(self, 'number_shots_2', number_shots_2)
+        object.__setattr__(self, 'index_player_starting', index_player_starting)
+        object.__setattr__(self, 'index_player_turn',
+                           index_player_turn if index_player_turn is not None else index_player_starting)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("A GameState cannot be modified, it may be shared by several forks of a game.")
+
+    def __reduce__(self):
+        return GameState, (self.fleet_1, self.fleet_2, self.index_player_starting, self.index_player_turn,
+                           self.mask_shots_1, self.mask_shots_2, self.shots_1, self.shots_2,
+                           self.number_shots_1, self.number_shots_2)
+
+    def __repr__(self):
+        return f"GameState(index_player_turn={self.index_player_turn}, " \
+               f"number_shots={self.get_number_shots_fired(1)}/{self.get_number_shots_fired(2)})"
+
+    @classmethod
+    def from_game(cls, game) -> 'GameState':
+        """
+        :param game: Game started, whose boards are Board objects (or subclasses)
+        :return: the state of the game, between two attacks
+        :raise ValueError if the game has not started, or if a shot was fired outside of a board
+        """
+        if game.player_turn is None:
+            raise ValueError("The game has not started yet, it has no state.")
+
+        state = cls(Fleet.get_fleet_from_board(game.player_1.board),
+                    Fleet.get_fleet_from_board(game.player_2.board),
+                    game.get_index_player(game.player_starting),
+                    game.get_index_player(game.player_turn))
+
+        for index_player, player in zip(TUPLE_INDICES_PLAYERS, (game.player_1, game.player_2)):
+            for coord_x, coord_y in player.board.list_coordinates_previous_shots:
+                state = state._get_state_after_shot(index_player, coord_x, coord_y, state.index_player_turn)[0]
+        return state
+
+    def get_fleet(self, index_player: int) -> Fleet:
+        return self.fleet_1 if index_player == 1 else self.fleet_2
+
+    def get_mask_shots_received(self, index_player: int) -> int:
+        """
+        :return: the bitboard of the cells of the board of the player which received a shot
+        """
+        return self.mask_shots_1 if index_player == 1 else self.mask_shots_2
+
+    def get_number_shots_fired(self, index_player: int) -> int:
+        return self.number_shots_2 if index_player == 1 else self.number_shots_1
+
+    def has_lost(self, index_player: int) -> bool:
+        """
+        :return: True if and only if all the ships of the player have sunk
+        """
+        mask_occupancy = self.get_fleet(index_player).mask_occupancy
+        return self.get_mask_shots_received(index_player) & mask_occupancy == mask_occupancy
+
+    def is_over(self) -> bool:
+        return self.has_lost(1) or self.has_lost(2)
+
+    def get_index_winner(self) -> int:
+        """
+        :return: the index of the player who won the game, None if the game is not over yet
+        """
+        if self.has_lost(1):
+            return 2
+        if self.has_lost(2):
+            return 1
+        return None
+
+    def apply_shot(self, coord_x: int, coord_y: int) -> Tuple['GameState', bool, bool]:
+        """
+        The player whose turn it is attacks the board of the other player. It plays again if it hit a ship.
+        :param coord_x: integer representing the projection of a coordinate on the x-axis
+        :param coord_y: integer representing the projection of a coordinate on the y-axis
+        :return: a tuple (new state, is_ship_hit, has_ship_sunk), see Board.is_attacked_at
+        :raise ValueError if the game is over, or if the coordinates are outside of the board
+        """
+        if self.is_over():
+            raise ValueError("The game is over, no more shots can be fired.")
+
+        index_player_attacked = 3 - self.index_player_turn
+        fleet = self.get_fleet(index_player_attacked)
+        if not (1 <= coord_x <= fleet.config.size_x and 1 <= coord_y <= fleet.config.size_y):
+            raise ValueError(f"The shot at {(coord_x, coord_y)} is outside of the board.")
+
+        is_ship_hit = fleet.tuple_ships_per_cell[get_index_cell(coord_x, coord_y, fleet.config.size_x)] != NO_SHIP
+        return self._get_state_after_shot(index_player_attacked, coord_x, coord_y,
+                                          self.index_player_turn if is_ship_hit else index_player_attacked)
+
+    def _get_state_after_shot(self,
+                              index_player_attacked: int,
+                              coord_x: int,
+                              coord_y: int,
+                              index_player_turn: int) -> Tuple['GameState', bool, bool]:
+        """
+        :param index_player_turn: player whose turn it is in the new state
+        :return: a tuple (new state, is_ship_hit, has_ship_sunk)
+        """
+        fleet = self.get_fleet(index_player_attacked)
+        if not (1 <= coord_x <= fleet.config.size_x and 1 <= coord_y <= fleet.config.size_y):
+            raise ValueError(f"The shot at {(coord_x, coord_y)} is outside of the board.")
+
+        index_cell = get_index_cell(coord_x, coord_y, fleet.config.size_x)
+
+        if index_player_attacked == 1:
+            mask_shots = self.mask_shots_1 | 1 << index_cell
+            state = GameState(self.fleet_1, self.fleet_2, self.index_player_starting, index_player_turn,
+                              mask_shots, self.mask_shots_2, (index_cell, self.shots_1), self.shots_2,
+                              self.number_shots_1 + 1, self.number_shots_2)
+        else:
+            mask_shots = self.mask_shots_2 | 1 << index_cell
+            state = GameState(self.fleet_1, self.fleet_2, self.index_player_starting, index_player_turn,
+                              self.mask_shots_1, mask_shots, self.shots_1, (index_cell, self.shots_2),
+                              self.number_shots_1, self.number_shots_2 + 1)
+
+        index_ship = fleet.tuple_ships_per_cell[index_cell]
+        if index_ship == NO_SHIP:
+            return state, False, False
+
+        mask_ship = fleet.tuple_masks_ships[index_ship]
+        return state, True, mask_shots & mask_ship == mask_ship
+
+    def get_list_shots_received(self, index_player: int) -> List[Tuple[int, int, bool, bool]]:
+        """
+        :return: the list of the shots received by the board of the player, the first one first, as tuples
+        (coord_x, coord_y, is_ship_hit, has_ship_sunk) (see Board.is_attacked_at)
+        """
+        fleet = self.get_fleet(index_player)
+        size_x = fleet.config.size_x
+
+        list_shots = []
+        mask_shots = 0
+        for index_cell in _iterate_shots(self.shots_1 if index_player == 1 else self.shots_2):
+            mask_shots |= 1 << index_cell
+            index_ship = fleet.tuple_ships_per_cell[index_cell]
+            mask_ship = fleet.tuple_masks_ships[index_ship] if index_ship != NO_SHIP else 0
+            list_shots.append((index_cell % size_x + 1, index_cell // size_x + 1, index_ship != NO_SHIP,
+                               index_ship != NO_SHIP and mask_shots & mask_ship == mask_ship))
+        return list_shots
+
+    def get_list_shots_in_order(self) -> List[Tuple[int, int, int, bool, bool]]:
+        """
+        The snapshot keeps the shots of each player apart: the order in which the players fired them is rebuilt with
+        the rules of the game, a player attacking until it misses, starting with the player who started the game.
+        :return: the list of all the shots of the game, the first one first, as tuples
+        (index of the player attacking, coord_x, coord_y, is_ship_hit, has_ship_sunk)
+        """
+        dict_shots_remaining_per_player = {index_player: iter(self.get_list_shots_received(3 - index_player))
+                                           for index_player in TUPLE_INDICES_PLAYERS}
+        number_shots_remaining = self.number_shots_1 + self.number_shots_2
+
+        list_shots = []
+        index_player = self.index_player_starting
+        while number_shots_remaining:
+            shot = next(dict_shots_remaining_per_player[index_player], None)
+            if shot is None:
+                index_player = 3 - index_player  # the other player fired all the shots left
+                continue
+
+            coord_x, coord_y, is_ship_hit, has_ship_sunk = shot
+            list_shots.append((index_player, coord_x, coord_y, is_ship_hit, has_ship_sunk))
+            number_shots_remaining -= 1
+            if not is_ship_hit:
+                index_player = 3 - index_player
+        return list_shots
+
+    def get_board(self, index_player: int, class_board=Board) -> Board:
+        """
+        :param class_board: Board, or a subclass with the same constructor (e.g. BoardBitboard)
+        :return: a new board of the player, which received the shots of the state
+        """
+        fleet = self.get_fleet(index_player)
+        board = class_board(fleet.get_list_ships(), fleet.config)
+        for coord_x, coord_y, _, _ in self.get_list_shots_received(index_player):
+            board.is_attacked_at(coord_x, coord_y)
+        return board
+
+    def to_bytes(self) -> bytes:
+        config = self.fleet_1.config
+        list_parts = [MAGIC_STATE,
+                      STRUCT_HEADER_STATE.pack(config.size_x, config.size_y, self.index_player_starting,
+                                               self.index_player_turn)]
+
+        for index_player in TUPLE_INDICES_PLAYERS:
+            fleet = self.get_fleet(index_player)
+            list_parts.append(STRUCT_NUMBER.pack(len(fleet.tuple_coordinates_ships)))
+            list_parts.extend(STRUCT_SHIP.pack(*coordinates_ship) for coordinates_ship in fleet.tuple_coordinates_ships)
+
+            list_indices_cells = list(_iterate_shots(self.shots_1 if index_player == 1 else self.shots_2))
+            list_parts.append(STRUCT_NUMBER.pack(len(list_indices_cells)))
+            list_parts.append(struct.pack(f'<{len(list_indices_cells)}H', *list_indices_cells))
+
+        return b''.join(list_parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'GameState':
+        """
+        :raise ValueError if the data is not a serialized state
+        """
+        if data[:len(MAGIC_STATE)] != MAGIC_STATE:
+            raise ValueError("The data is not a serialized game state.")
+
+        offset = len(MAGIC_STATE)
+        size_x, size_y, index_player_starting, index_player_turn = STRUCT_HEADER_STATE.unpack_from(data, offset)
+        offset += STRUCT_HEADER_STATE.size
+
+        list_coordinates_fleets = []
+        list_shots_fleets = []
+        for _ in TUPLE_INDICES_PLAYERS:
+            number_ships, = STRUCT_NUMBER.unpack_from(data, offset)
+            offset += STRUCT_NUMBER.size
+            list_coordinates_fleets.append([STRUCT_SHIP.unpack_from(data, offset + index_ship * STRUCT_SHIP.size)
+                                            for index_ship in range(number_ships)])
+            offset += number_ships * STRUCT_SHIP.size
+
+            number_shots, = STRUCT_NUMBER.unpack_from(data, offset)
+            offset += STRUCT_NUMBER.size
+            list_shots_fleets.append(struct.unpack_from(f'<{number_shots}H', data, offset))
+            offset += 2 * number_shots
+
+        counter_lengths = Counter(max(x_end - x_start, y_end - y_start) + 1
+                                  for x_start, y_start, x_end, y_end in list_coordinates_fleets[0])
+        config = GameConfig(size_x, size_y, dict(counter_lengths))
+
+        state = cls(Fleet(list_coordinates_fleets[0], config), Fleet(list_coordinates_fleets[1], config),
+                    index_player_starting, index_player_turn)
+        for index_player, tuple_shots in zip(TUPLE_INDICES_PLAYERS, list_shots_fleets):
+            for index_cell in tuple_shots:
+                state = state._get_state_after_shot(index_player, index_cell % size_x + 1, index_cell // size_x + 1,
+                                                    index_player_turn)[0]
+        return state
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+    from battleship.aggregate import GameStatistics
+    from battleship.board import BoardAutomatic
+    from battleship.game import Game
+    from battleship.player import PlayerAutomatic, PlayerRandom
+
+    state = GameState(Fleet.get_fleet_from_board(BoardAutomatic()), Fleet.get_fleet_from_board(BoardAutomatic()), 1)
+    for coord_x, coord_y in ((1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6)):
+        state = state.apply_shot(coord_x, coord_y)[0]
+    print(state)
+
+    # the sinks of a resumed game receive the shots of the snapshot before the new ones
+    game_statistics = GameStatistics()
+    game = Game.from_state(GameState.from_bytes(state.to_bytes()), PlayerAutomatic(), PlayerRandom(),
+                           verbose=False, list_sinks=[game_statistics])
+    print(game.play())
+    game_statistics.print_report()
@@ -0,0 +1,260 @@
+"""
+Exact posterior probability of the positions of the opponent's ships, by enumerating the fleets consistent with
+what is known about the opponent's board.
+
+A fleet is consistent if none of its ships is on a cell known to be empty (misses, sunk ships and their
+neighbourhood, diagonals of hits), no two of its ships are near each other (see Ship.is_near_ship), every hit which
+did not sink a ship is covered, and no ship is entirely made of hits (it would have sunk).
+
+The ships remaining are placed one after the other, biggest first, by backtracking over the placement bitboards
+(see battleship.placement). A partial fleet is summed up by the bitboard of the cells blocked for the next ships and
+the bitboard of the hits not covered yet, and the number of ways to complete it is memoized on these sub-boards:
+different partial fleets leaving the same sub-board are only counted once. The number of fleets covering each cell
+is then obtained with a forward pass over the memoized sub-boards.
+
+Early in a game, the number of sub-boards explodes. When the time budget of the exact count is exhausted, the
+posterior is estimated instead by sampling consistent fleets, until the end of the time budget.
+"""
+import random
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+from battleship.config import GameConfig
+from battleship.density import get_placement_index
+from battleship.placement import Placement, get_placement_table
+
+# share of the time budget given to the exact count, the rest being left to the sampling. The forward pass computing
+# the number of fleets per cell, after the count, takes about as long as the count itself.
+FRACTION_BUDGET_EXACT = 0.25
+
+# number of random placements tried for a ship before listing all the placements still possible
+MAX_NUMBER_REJECTIONS = 20
+
+
+class TimeBudgetExceeded(Exception):
+    pass
+
+
+class SolverResult(NamedTuple):
+    list_numbers_fleets_per_cell: List[int]  # index of a cell -> number of fleets (or of samples) covering it
+    number_fleets: int  # number of consistent fleets (or of samples)
+    is_exact: bool  # False if the numbers come from sampling
+
+
+class FleetSolver(object):
+    """
+    Counts the fleets consistent with the knowledge of an opponent's board.
+    Cells are identified by their index, see battleship.placement.get_index_cell.
+    """
+
+    def __init__(self, config: GameConfig, duration_budget: float = 0.01, rng=random):
+        """
+        :param config: config of the opponent's board
+        :param duration_budget: time budget of a call to solve, in seconds. It can be exceeded by the duration of the
+        forward pass of an exact count finished just in time, or of the last sample.
+        :param rng: random generator used by the sampling (random module or random.Random instance)
+        """
+        self.config = config
+        self.duration_budget = duration_budget
+        self.rng = rng
+
+        placement_table = get_placement_table(config.size_x, config.size_y)
+        placement_index = get_placement_index(config)
+
+        # all the placements of all the lengths, with the same indices as in the PlacementIndex of the config
+        self.list_placements = []  # type: List[Placement]
+        for length, _ in config.tuple_number_ships_per_length:
+            self.list_placements += placement_table.get_placements(length)
+        self.list_cells_placements = placement_index.list_cells_placements
+        self.list_placements_per_cell = placement_index.list_placements_per_cell
+        self.dict_range_placements_per_length = placement_index.dict_range_placements_per_length
+
+        # state of the current call to solve
+        self.list_lengths = []  # type: List[int]
+        self.list_sums_lengths_remaining = []  # type: List[int]
+        self.mask_hits = 0
+        self.dict_numbers_completions = {}  # type: Dict[Tuple[int, int, int, int], int]
+        self.time_deadline = 0.
+
+    def solve(self, mask_empty: int, mask_hits: int, list_lengths: List[int]) -> SolverResult:
+        """
+        :param mask_empty: bitboard of the cells known not to be occupied by the remaining ships
+        :param mask_hits: bitboard of the cells where a ship has been hit but has not sunk
+        :param list_lengths: lengths of the ships which have not sunk yet
+        :return: the number of consistent fleets covering each cell, exact if it could be computed within the first
+        part of the time budget, estimated by sampling otherwise
+        """
+        time_start = time.perf_counter()
+
+        try:
+            self.time_deadline = time_start + FRACTION_BUDGET_EXACT * self.duration_budget
+            return self._count_exactly(mask_empty, mask_hits, list_lengths)
+        except TimeBudgetExceeded:
+            self.dict_numbers_completions = {}
+
+        self.time_deadline = time_start + self.duration_budget
+        return self._sample(mask_empty, mask_hits, list_lengths)
+
+    def _count_exactly(self, mask_empty: int, mask_hits: int, list_lengths: List[int]) -> SolverResult:
+        self.list_lengths = sorted(list_lengths, reverse=True)
+        self.list_sums_lengths_remaining = [sum(self.list_lengths[index_ship:])
+                                            for index_ship in range(len(self.list_lengths) + 1)]
+        self.mask_hits = mask_hits
+        self.dict_numbers_completions = {}
+
+        sub_board_initial = (0, 0, mask_empty, mask_hits)
+        number_fleets = self._count_completions(sub_board_initial)
+
+        # forward pass: number of partial fleets leading to each sub-board, layer by layer
+        list_numbers_fleets_per_cell = [0] * self.config.number_cells
+        dict_numbers_prefixes = {sub_board_initial: 1}
+        for _ in self.list_lengths:
+            dict_numbers_prefixes_next = {}
+            for sub_board, number_prefixes in dict_numbers_prefixes.items():
+                for index_placement, sub_board_next in self._iter_placements(sub_board):
+                    number_completions = self._count_completions(sub_board_next)
+                    if not number_completions:
+                        continue
+
+                    number_fleets_through = number_prefixes * number_completions
+                    for index_cell in self.list_cells_placements[index_placement]:
+                        list_numbers_fleets_per_cell[index_cell] += number_fleets_through
+                    dict_numbers_prefixes_next[sub_board_next] = \
+                        dict_numbers_prefixes_next.get(sub_board_next, 0) + number_prefixes
+            dict_numbers_prefixes = dict_numbers_prefixes_next
+
+        self.dict_numbers_completions = {}
+        return SolverResult(list_numbers_fleets_per_cell, number_fleets, True)
+
+    def _iter_placements(self, sub_board: Tuple[int, int, int, int]):
+        """
+        :return: an iterator over the tuples (index of a placement of the next ship, sub-board after placing it)
+        """
+        index_ship, index_placement_min, mask_blocked, mask_hits_uncovered = sub_board
+
+        length = self.list_lengths[index_ship]
+        # ships of the same length are placed in increasing order of placement, so that a fleet is counted once
+        is_next_ship_same_length = index_ship + 1 < len(self.list_lengths) \
+            and self.list_lengths[index_ship + 1] == length
+
+        range_placements = self.dict_range_placements_per_length[length]
+        for index_placement in range(max(index_placement_min, range_placements.start), range_placements.stop):
+            placement = self.list_placements[index_placement]
+            if placement.mask & mask_blocked or not placement.mask & ~self.mask_hits:
+                continue
+
+            yield index_placement, (index_ship + 1,
+                                    index_placement + 1 if is_next_ship_same_length else 0,
+                                    mask_blocked | placement.mask_halo,
+                                    mask_hits_uncovered & ~placement.mask)
+
+    def _count_completions(self, sub_board: Tuple[int, int, int, int]) -> int:
+        """
+        :return: the number of ways to place the remaining ships on the sub-board
+        :raise TimeBudgetExceeded if the deadline has passed
+        """
+        number_completions = self.dict_numbers_completions.get(sub_board)
+        if number_completions is not None:
+            return number_completions
+
+        index_ship, _, mask_blocked, mask_hits_uncovered = sub_board
+
+        if mask_hits_uncovered & mask_blocked \
+                or bin(mask_hits_uncovered).count('1') > self.list_sums_lengths_remaining[index_ship]:
+            number_completions = 0  # some hits cannot be covered anymore
+        elif index_ship == len(self.list_lengths):
+            number_completions = 1
+        else:
+            # reading the clock is cheap compared to going through the placements of the ship
+            if time.perf_counter() > self.time_deadline:
+                raise TimeBudgetExceeded
+
+            number_completions = sum(self._count_completions(sub_board_next)
+                                     for _, sub_board_next in self._iter_placements(sub_board))
+
+        self.dict_numbers_completions[sub_board] = number_completions
+        return number_completions
+
+    def _sample(self, mask_empty: int, mask_hits: int, list_lengths: List[int]) -> SolverResult:
+        list_numbers_fleets_per_cell = [0] * self.config.number_cells
+        number_fleets = 0
+
+        while True:
+            fleet = self._try_to_sample_fleet(mask_empty, mask_hits, list_lengths)
+            if fleet is not None:
+                number_fleets += 1
+                for index_placement in fleet:
+                    for index_cell in self.list_cells_placements[index_placement]:
+                        list_numbers_fleets_per_cell[index_cell] += 1
+
+            if time.perf_counter() > self.time_deadline:
+                return SolverResult(list_numbers_fleets_per_cell, number_fleets, False)
+
+    def _try_to_sample_fleet(self, mask_empty: int, mask_hits: int, list_lengths: List[int]) -> List[int]:
+        """
+        Places first a ship through each hit not covered yet, then the other ships, biggest first, each ship being
+        placed uniformly among its possible placements. The fleets are only approximately uniform.
+        :return: the indices of the placements of the fleet, None if it ended in a dead end
+        """
+        list_lengths_remaining = sorted(list_lengths, reverse=True)
+        fleet = []
+        mask_blocked = mask_empty
+        mask_hits_uncovered = mask_hits
+
+        while mask_hits_uncovered:
+            index_cell_hit = (mask_hits_uncovered & -mask_hits_uncovered).bit_length() - 1
+            list_placements_possible = [index_placement
+                                        for index_placement in self.list_placements_per_cell[index_cell_hit]
+                                        if self.list_placements[index_placement].length in list_lengths_remaining
+                                        and self._is_placement_possible(index_placement, mask_blocked, mask_hits)]
+            if not list_placements_possible:
+                return None
+
+            index_placement = self.rng.choice(list_placements_possible)
+            placement = self.list_placements[index_placement]
+            list_lengths_remaining.remove(placement.length)
+            fleet.append(index_placement)
+            mask_blocked |= placement.mask_halo
+            mask_hits_uncovered &= ~placement.mask
+
+            if mask_hits_uncovered & mask_blocked:
+                return None
+
+        for length in list_lengths_remaining:
+            range_placements = self.dict_range_placements_per_length[length]
+            index_placement = None
+
+            for _ in range(MAX_NUMBER_REJECTIONS):
+                index_candidate = self.rng.choice(range_placements)
+                if self._is_placement_possible(index_candidate, mask_blocked, mask_hits):
+                    index_placement = index_candidate
+                    break
+
+            if index_placement is None:
+                list_placements_possible = [index_candidate for index_candidate in range_placements
+                                            if self._is_placement_possible(index_candidate, mask_blocked, mask_hits)]
+                if not list_placements_possible:
+                    return None
+                index_placement = self.rng.choice(list_placements_possible)
+
+            fleet.append(index_placement)
+            mask_blocked |= self.list_placements[index_placement].mask_halo
+
+        return fleet
+
+    def _is_placement_possible(self, index_placement: int, mask_blocked: int, mask_hits: int) -> bool:
+        mask = self.list_placements[index_placement].mask
+        return not mask & mask_blocked and bool(mask & ~mask_hits)
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+    from battleship.placement import get_index_cell
+
+    config_sandbox = GameConfig(6, 6, {1: 1, 2: 1, 3: 1})
+    solver = FleetSolver(config_sandbox, duration_budget=1.)
+    result = solver.solve(mask_empty=1 << get_index_cell(3, 3, 6),
+                          mask_hits=1 << get_index_cell(1, 1, 6),
+                          list_lengths=config_sandbox.get_list_lengths_ships())
+    print(f"{result.number_fleets} fleets (exact: {result.is_exact})")
+    print(result.list_numbers_fleets_per_cell)
@@ -0,0 +1,285 @@
+"""
+Parameter sweep of a Player strategy: each point of a grid of parameters is evaluated by the mean number of shots the
+player needs to sink all the ships of an opponent, over seeded games played in a pool of processes.
+
+Usage:
+    python -m battleship.sweep --player automatic --output sweep.csv \
+        --grid weight_random_fallback=0,0.5,1,2 --grid is_pruning_diagonals=true,false
+
+The values of the grid are parsed as JSON. The games are played in batches. After each round of batches, the points
+whose confidence interval on the mean shots-to-win lies entirely above the one of the current best point are not
+sampled anymore. All the points play the same seeded games (the game number i has the same boards for every point),
+so the comparisons are not blurred by the luck of the draws.
+
+Each batch is appended to the output CSV as soon as it is played (one row per batch, one column per parameter). If
+the sweep is interrupted, running it again with the same output file resumes it: the batches already in the file are
+not played again.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+from itertools import product
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Tuple, Type
+
+from battleship.board import Board
+from battleship.config import GameConfig
+from battleship.player import Player, PlayerAutomatic, PlayerProbabilistic, PlayerRandom
+from battleship.rng import KIND_RNG_NUMPY, KIND_RNG_PYTHON, get_rng_game
+from battleship.ship import Ship
+
+DICT_CLASSES_PLAYERS = {
+    'random': PlayerRandom,
+    'automatic': PlayerAutomatic,
+    'probabilistic': PlayerProbabilistic,
+}
+
+LIST_NAMES_COLUMNS_BATCH = ['index_batch', 'number_games', 'sum_shots', 'sum_squares_shots']
+
+
+def get_grid_points(dict_grid: Dict[str, list]) -> List[Dict[str, object]]:
+    """
+    :param dict_grid: dict: name of a parameter -> list of its values
+    :return: the list of all the combinations of values, each one as a dict: name of a parameter -> value
+    """
+    list_names = sorted(dict_grid)
+    return [dict(zip(list_names, values)) for values in product(*(dict_grid[name] for name in list_names))]
+
+
+def get_key_point(parameters: Dict[str, object]) -> str:
+    return json.dumps(parameters, sort_keys=True)
+
+
+def play_solo_game(rng,
+                   class_player: Type[Player],
+                   parameters: Dict[str, object],
+                   config: GameConfig = None,
+                   list_ships_opponent: List[Ship] = None) -> int:
+    """
+    The player attacks the board of a passive opponent until all its ships have sunk.
+    :param rng: random generator of the game (see battleship.rng)
+    :param list_ships_opponent: new ships of the board of the opponent, randomly placed if None
+    :return: the number of shots fired by the player
+    """
+    player = class_player(config=config, rng=rng, **parameters)
+    board_opponent = Board(list_ships_opponent, config) if list_ships_opponent is not None else None
+    opponent = PlayerRandom(board=board_opponent, config=config, rng=rng)
+
+    number_shots = 0
+    while not opponent.has_lost():
+        player.attacks(opponent, verbose=False)
+        number_shots += 1
+
+    return number_shots
+
+
+class PointStatistics(object):
+    """
+    Statistics of the number of shots to win of a point of the grid, over the batches played so far.
+    """
+
+    def __init__(self, parameters: Dict[str, object]):
+        self.parameters = parameters
+        self.set_indices_batches = set()
+        self.number_games = 0
+        self.sum_shots = 0
+        self.sum_squares_shots = 0
+        self.is_stopped_early = False
+
+    def add_batch(self, index_batch: int, number_games: int, sum_shots: int, sum_squares_shots: int) -> None:
+        self.set_indices_batches.add(index_batch)
+        self.number_games += number_games
+        self.sum_shots += sum_shots
+        self.sum_squares_shots += sum_squares_shots
+
+    def mean(self) -> float:
+        return self.sum_shots / self.number_games if self.number_games else float('nan')
+
+    def get_half_width_interval(self, z_score: float) -> float:
+        """
+        :return: half of the width of the confidence interval on the mean (normal approximation)
+        """
+        if self.number_games < 2:
+            return float('inf')
+        variance = (self.sum_squares_shots - self.sum_shots ** 2 / self.number_games) / (self.number_games - 1)
+        return z_score * math.sqrt(max(variance, 0.) / self.number_games)
+
+
+def _play_batch(arguments: tuple) -> Tuple[int, int, int, int, int]:
+    index_point, index_batch, parameters, seed, size_batch, class_player, config, kind_rng = arguments
+
+    sum_shots = 0
+    sum_squares_shots = 0
+    for index_game in range(index_batch * size_batch, (index_batch + 1) * size_batch):
+        number_shots = play_solo_game(get_rng_game(seed, index_game, kind_rng), class_player, parameters, config)
+        sum_shots += number_shots
+        sum_squares_shots += number_shots ** 2
+
+    return index_point, index_batch, size_batch, sum_shots, sum_squares_shots
+
+
+def _read_batches(path_output: str, list_names_parameters: List[str]) -> Iterator[Tuple[str, list]]:
+    """
+    :return: an iterator over the tuples (key of the point, values of the batch columns) of the rows of the output
+    :raise ValueError if the columns of the file do not match the parameters of the sweep
+    """
+    with open(path_output, newline='') as file_output:
+        reader = csv.reader(file_output)
+        header = next(reader, None)
+        if header is None:
+            return
+        if header != list_names_parameters + LIST_NAMES_COLUMNS_BATCH:
+            raise ValueError(f"The columns of {path_output} do not match the parameters of the sweep: {header}")
+
+        number_parameters = len(list_names_parameters)
+        for row in reader:
+            parameters = {name: json.loads(value) for name, value in zip(list_names_parameters, row)}
+            yield get_key_point(parameters), [int(value) for value in row[number_parameters:]]
+
+
+def _remove_incomplete_row(path_output: str) -> None:
+    """
+    Removes the end of the last row of the file if the sweep was interrupted while it was written.
+    """
+    with open(path_output, 'rb+') as file_output:
+        content = file_output.read()
+        if content and not content.endswith(b'\n'):
+            file_output.truncate(content.rfind(b'\n') + 1)
+
+
+def run_sweep(class_player: Type[Player],
+              dict_grid: Dict[str, list],
+              path_output: str,
+              seed: int = 0,
+              size_batch: int = 100,
+              min_number_games: int = 300,
+              max_number_games: int = 3000,
+              z_score: float = 1.96,
+              number_workers: int = None,
+              config: GameConfig = None,
+              kind_rng: str = KIND_RNG_PYTHON) -> List[PointStatistics]:
+    """
+    :param class_player: class of the player, constructible from a config and the parameters of the grid
+    :param dict_grid: dict: name of a parameter of class_player -> list of its values
+    :param path_output: path of the CSV file where the batches are appended, the sweep resumes from it if it exists
+    :param seed: seed of the sweep, it gives the boards of each game
+    :param size_batch: number of games played in a row by a worker
+    :param min_number_games: number of games played by each point before it can be stopped early
+    :param max_number_games: maximum number of games played by each point
+    :param z_score: of the confidence intervals (1.96 for 95%)
+    :param number_workers: number of processes. None uses all the cores, 1 plays everything in this process.
+    :param config: config of the boards, DEFAULT_CONFIG if None
+    :param kind_rng: kind of the random generator of each game (see battleship.rng)
+    :return: the statistics of each point of the grid, best (lowest mean shots-to-win) first
+    """
+    list_names_parameters = sorted(dict_grid)
+    list_points = [PointStatistics(parameters) for parameters in get_grid_points(dict_grid)]
+    dict_points_per_key = {get_key_point(point.parameters): point for point in list_points}
+
+    if os.path.exists(path_output):
+        _remove_incomplete_row(path_output)
+        for key_point, values_batch in _read_batches(path_output, list_names_parameters):
+            if key_point in dict_points_per_key:
+                dict_points_per_key[key_point].add_batch(*values_batch)
+    else:
+        with open(path_output, 'w', newline='') as file_output:
+            csv.writer(file_output).writerow(list_names_parameters + LIST_NAMES_COLUMNS_BATCH)
+
+    number_batches_max = math.ceil(max_number_games / size_batch)
+    pool = Pool(processes=number_workers) if number_workers != 1 else None
+
+    try:
+        with open(path_output, 'a', newline='') as file_output:
+            writer = csv.writer(file_output)
+
+            while True:
+                _stop_points_separated_from_best(list_points, min_number_games, z_score)
+
+                # next round: one batch not played yet per point still sampled
+                list_arguments = []
+                for index_point, point in enumerate(list_points):
+                    if point.is_stopped_early:
+                        continue
+                    index_batch = next((index_batch for index_batch in range(number_batches_max)
+                                        if index_batch not in point.set_indices_batches), None)
+                    if index_batch is not None:
+                        list_arguments.append((index_point, index_batch, point.parameters, seed, size_batch,
+                                               class_player, config, kind_rng))
+                if not list_arguments:
+                    break
+
+                iterator_results = pool.imap_unordered(_play_batch, list_arguments) if pool is not None \
+                    else map(_play_batch, list_arguments)
+                for index_point, *values_batch in iterator_results:
+                    point = list_points[index_point]
+                    point.add_batch(*values_batch)
+                    writer.writerow([json.dumps(point.parameters[name]) for name in list_names_parameters]
+                                    + values_batch)
+                    file_output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return sorted(list_points, key=lambda point: point.mean())
+
+
+def _stop_points_separated_from_best(list_points: List[PointStatistics],
+                                     min_number_games: int,
+                                     z_score: float) -> None:
+    list_points_eligible = [point for point in list_points if point.number_games >= min_number_games]
+    if not list_points_eligible:
+        return
+
+    point_best = min(list_points_eligible, key=lambda point: point.mean())
+    upper_bound_best = point_best.mean() + point_best.get_half_width_interval(z_score)
+
+    for point in list_points_eligible:
+        if point.mean() - point.get_half_width_interval(z_score) > upper_bound_best:
+            point.is_stopped_early = True
+
+
+def print_sweep_results(list_points: List[PointStatistics], z_score: float = 1.96) -> None:
+    for point in list_points:
+        print(f"{get_key_point(point.parameters)}  mean shots to win: {point.mean():7.2f} "
+              f"+/- {point.get_half_width_interval(z_score):5.2f}  games: {point.number_games:6d}"
+              f"{'  (stopped early)' if point.is_stopped_early else ''}")
+
+
+def _parse_grid(list_arguments_grid: List[str]) -> Dict[str, list]:
+    dict_grid = {}
+    for argument_grid in list_arguments_grid:
+        name, _, values = argument_grid.partition('=')
+        if not values:
+            raise ValueError(f"A parameter of the grid should be given as name=value_1,value_2,...: {argument_grid}")
+        dict_grid[name.strip()] = [json.loads(value) for value in values.split(',')]
+    return dict_grid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parameter sweep of a battleship strategy, with early stopping.")
+    parser.add_argument('--player', choices=sorted(DICT_CLASSES_PLAYERS), default='automatic')
+    parser.add_argument('--grid', action='append', required=True,
+                        help="parameter of the player and its values, as name=value_1,value_2,... (can be repeated)")
+    parser.add_argument('--output', required=True, help="CSV file of the batches, the sweep resumes from it if it "
+                                                        "exists")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch', type=int, default=100, help="number of games per batch")
+    parser.add_argument('--min-games', type=int, default=300)
+    parser.add_argument('--max-games', type=int, default=3000)
+    parser.add_argument('--z-score', type=float, default=1.96)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rng', choices=[KIND_RNG_PYTHON, KIND_RNG_NUMPY], default=KIND_RNG_PYTHON,
+                        help="kind of the random generator of each game")
+    arguments = parser.parse_args()
+
+    list_points = run_sweep(DICT_CLASSES_PLAYERS[arguments.player], _parse_grid(arguments.grid), arguments.output,
+                            arguments.seed, arguments.batch, arguments.min_games, arguments.max_games,
+                            arguments.z_score, arguments.workers, kind_rng=arguments.rng)
+    print_sweep_results(list_points, arguments.z_score)
+
+
+if __name__ == '__main__':
+    main()
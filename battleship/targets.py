@@ -0,0 +1,106 @@
+"""
+Pool of the cells a player may still attack, for the strategies choosing their attacks at random.
+
+The cells are kept in a list, and a dict gives the position of each cell in that list. A cell is removed by moving
+the last cell of the list in its place (swap-remove), so drawing a cell, removing one, testing if one is in the pool
+and excluding the halo of a sunk ship all take a constant time per cell, whatever the number of cells left.
+"""
+import random
+from typing import Dict, Iterable, List, Set, Tuple
+
+from battleship.ship import Ship
+
+
+def get_ship_sunk(coord_x: int, coord_y: int, set_coords_hit: Set[Tuple[int, int]]) -> Ship:
+    """
+    :param coord_x: integer representing the projection on the x-axis of the attack which made the ship sink
+    :param coord_y: integer representing the projection on the y-axis of that attack
+    :param set_coords_hit: coordinates of all the hits on the opponent's board so far, that attack included
+    :return: the ship sunk, made of the cells hit in line with that attack (the ships are never next to each other)
+    """
+    list_ends = []
+    for step_x, step_y in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        coord_end_x, coord_end_y = coord_x, coord_y
+        while (coord_end_x + step_x, coord_end_y + step_y) in set_coords_hit:
+            coord_end_x, coord_end_y = coord_end_x + step_x, coord_end_y + step_y
+        list_ends.append((coord_end_x, coord_end_y))
+
+    end_right, end_left, end_down, end_up = list_ends
+    if end_right != end_left:
+        return Ship(coord_start=end_left, coord_end=end_right)
+    return Ship(coord_start=end_up, coord_end=end_down)
+
+
+class TargetPool(object):
+    """
+    Set of coordinates (coord_x, coord_y) supporting uniform random draws.
+    The order of the cells in the pool changes with the removals, so the draws of a seeded generator depend on the
+    sequence of removals, not only on the cells left.
+    """
+
+    def __init__(self, size_x: int, size_y: int):
+        """
+        :param size_x: width of the board, all its cells are in the pool at first
+        :param size_y: height of the board
+        """
+        self.size_x = size_x
+        self.size_y = size_y
+
+        self.list_coords = [(coord_x, coord_y)
+                            for coord_x in range(1, size_x + 1)
+                            for coord_y in range(1, size_y + 1)]  # type: List[Tuple[int, int]]
+        # coordinates -> index of the coordinates in list_coords
+        self.dict_indices_per_coord = {coord: index
+                                       for index, coord in enumerate(self.list_coords)}  # type: Dict[tuple, int]
+
+    def __len__(self):
+        return len(self.list_coords)
+
+    def __contains__(self, coord: Tuple[int, int]) -> bool:
+        return coord in self.dict_indices_per_coord
+
+    def choice(self, rng=random) -> Tuple[int, int]:
+        """
+        :param rng: random generator (see battleship.rng)
+        :return: coordinates uniformly drawn from the pool, which are left in it
+        :raise IndexError if the pool is empty
+        """
+        return rng.choice(self.list_coords)
+
+    def pop_random(self, rng=random) -> Tuple[int, int]:
+        """
+        :param rng: random generator (see battleship.rng)
+        :return: coordinates uniformly drawn from the pool, which are removed from it
+        :raise IndexError if the pool is empty
+        """
+        coord = self.choice(rng)
+        self.discard(coord)
+        return coord
+
+    def discard(self, coord: Tuple[int, int]) -> None:
+        """
+        Removes the coordinates from the pool, if they are in it.
+        """
+        index = self.dict_indices_per_coord.pop(coord, None)
+        if index is None:
+            return
+
+        coord_last = self.list_coords.pop()
+        if index < len(self.list_coords):
+            self.list_coords[index] = coord_last
+            self.dict_indices_per_coord[coord_last] = index
+
+    def discard_all(self, coordinates: Iterable[Tuple[int, int]]) -> None:
+        """
+        Removes all the coordinates from the pool, ignoring the ones which are not in it.
+        """
+        for coord in coordinates:
+            self.discard(coord)
+
+    def discard_near_ship(self, ship: Ship) -> None:
+        """
+        Removes the cells of the ship and all the cells near it (corners included): no other ship can be there.
+        """
+        self.discard_all((coord_x, coord_y)
+                         for coord_x in range(max(ship.x_start - 1, 1), min(ship.x_end + 1, self.size_x) + 1)
+                         for coord_y in range(max(ship.y_start - 1, 1), min(ship.y_end + 1, self.size_y) + 1))
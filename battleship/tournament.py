@@ -0,0 +1,177 @@
+import random
+from collections import Counter
+from multiprocessing import Pool
+from typing import Iterator, List, Tuple, Type
+
+from battleship.aggregate import GameStatistics
+from battleship.config import GameConfig
+from battleship.events import EventSink
+from battleship.game import Game
+from battleship.player import Player, PlayerAutomatic, PlayerRandom
+from battleship.rng import KIND_RNG_PYTHON, get_rng_game
+
+
+class TournamentResults(object):
+    """
+    Aggregated results of a tournament between two classes of players.
+    Results coming from different chunks of games can be merged, the order of the merges does not matter.
+    """
+
+    def __init__(self, statistics: GameStatistics = None):
+        """
+        :param statistics: detailed statistics of the games, aggregated along with the results if not None
+        """
+        self.number_games = 0
+        self.number_wins_player_1 = 0
+        self.number_wins_player_2 = 0
+
+        # histograms: number of shots fired by the winner -> number of games won with that many shots
+        self.histogram_shots_to_win_player_1 = Counter()
+        self.histogram_shots_to_win_player_2 = Counter()
+
+        self.statistics = statistics
+
+    def __repr__(self):
+        return f"TournamentResults(number_games={self.number_games}, " \
+               f"win_rate_player_1={self.win_rate_player_1():.4f}, " \
+               f"win_rate_player_2={self.win_rate_player_2():.4f})"
+
+    def add_game(self, is_player_1_winner: bool, number_shots_winner: int) -> None:
+        """
+        :param is_player_1_winner: True if and only if the first player won the game
+        :param number_shots_winner: number of shots the winner fired during the game
+        """
+        self.number_games += 1
+        if is_player_1_winner:
+            self.number_wins_player_1 += 1
+            self.histogram_shots_to_win_player_1[number_shots_winner] += 1
+        else:
+            self.number_wins_player_2 += 1
+            self.histogram_shots_to_win_player_2[number_shots_winner] += 1
+
+    def merge(self, other: 'TournamentResults') -> None:
+        """
+        Adds the results of other to the results of this object.
+        :param other: results of another chunk of games
+        """
+        self.number_games += other.number_games
+        self.number_wins_player_1 += other.number_wins_player_1
+        self.number_wins_player_2 += other.number_wins_player_2
+        self.histogram_shots_to_win_player_1.update(other.histogram_shots_to_win_player_1)
+        self.histogram_shots_to_win_player_2.update(other.histogram_shots_to_win_player_2)
+        if self.statistics is not None and other.statistics is not None:
+            self.statistics.merge(other.statistics)
+
+    def win_rate_player_1(self) -> float:
+        return self.number_wins_player_1 / self.number_games if self.number_games else 0.
+
+    def win_rate_player_2(self) -> float:
+        return self.number_wins_player_2 / self.number_games if self.number_games else 0.
+
+
+def play_game_with_rng(rng,
+                       class_player_1: Type[Player],
+                       class_player_2: Type[Player],
+                       config: GameConfig = None,
+                       list_sinks: List[EventSink] = None) -> Tuple[bool, int]:
+    """
+    Plays a silent game between two automatic players, all the random draws of the game being made by rng.
+    :param rng: random generator of the game (see battleship.rng)
+    :param class_player_1: class of the first player, it should be constructible from a config and a random
+    generator without a board (e.g. PlayerAutomatic)
+    :param class_player_2: class of the second player
+    :param config: config of the boards of both players, DEFAULT_CONFIG if None
+    :param list_sinks: sinks receiving the events of the game (see battleship.events)
+    :return: a tuple (is_player_1_winner, number_shots_winner)
+    """
+    player_1 = class_player_1(name_player="player_1", config=config, rng=rng)
+    player_2 = class_player_2(name_player="player_2", config=config, rng=rng)
+
+    game = Game(player_1, player_2, verbose=False, list_sinks=list_sinks, rng=rng)
+    winner = game.play()
+
+    return winner is player_1, game.dict_number_shots_per_player[winner]
+
+
+def play_seeded_game(seed_game,
+                     class_player_1: Type[Player],
+                     class_player_2: Type[Player],
+                     config: GameConfig = None) -> Tuple[bool, int]:
+    """
+    Plays a silent game between two automatic players, with a random generator seeded with seed_game.
+    :param seed_game: seed of the game (see get_seed_game)
+    :return: a tuple (is_player_1_winner, number_shots_winner), see play_game_with_rng
+    """
+    return play_game_with_rng(random.Random(seed_game), class_player_1, class_player_2, config)
+
+
+def _play_chunk(arguments: tuple) -> TournamentResults:
+    seed, index_first_game, index_last_game, class_player_1, class_player_2, config, kind_rng, \
+        is_collecting_statistics = arguments
+
+    results = TournamentResults(GameStatistics(config) if is_collecting_statistics else None)
+    list_sinks = [results.statistics] if is_collecting_statistics else None
+    for index_game in range(index_first_game, index_last_game):
+        results.add_game(*play_game_with_rng(get_rng_game(seed, index_game, kind_rng),
+                                             class_player_1, class_player_2, config, list_sinks))
+
+    return results
+
+
+def _get_chunks(number_games: int, size_chunk: int) -> Iterator[Tuple[int, int]]:
+    for index_first_game in range(0, number_games, size_chunk):
+        yield index_first_game, min(index_first_game + size_chunk, number_games)
+
+
+def run_tournament(number_games: int,
+                   class_player_1: Type[Player] = PlayerAutomatic,
+                   class_player_2: Type[Player] = PlayerRandom,
+                   seed: int = 0,
+                   number_workers: int = None,
+                   size_chunk: int = 1000,
+                   config: GameConfig = None,
+                   kind_rng: str = KIND_RNG_PYTHON,
+                   is_collecting_statistics: bool = False) -> TournamentResults:
+    """
+    Plays number_games silent games between class_player_1 and class_player_2 over a pool of processes.
+    Each chunk of games is played and aggregated inside a worker, so only the aggregated results are sent back.
+
+    :param number_games: total number of games to play
+    :param class_player_1: class of the first player (must be importable, so that it can be sent to the workers)
+    :param class_player_2: class of the second player
+    :param seed: seed of the tournament. The results only depend on it, not on the number of workers.
+    :param number_workers: number of processes. None uses all the cores, 1 plays everything in this process.
+    :param size_chunk: number of games played by a worker per task
+    :param config: config of the boards of both players, DEFAULT_CONFIG if None
+    :param kind_rng: kind of the random generator of each game (see battleship.rng)
+    :param is_collecting_statistics: if True, the results hold the detailed statistics of the games, aggregated in
+    each worker then merged (see battleship.aggregate)
+    :return: the aggregated results of all the games
+    """
+    if size_chunk < 1:
+        raise ValueError("The size of the chunks should be a positive integer.")
+
+    list_arguments = [(seed, index_first_game, index_last_game, class_player_1, class_player_2, config, kind_rng,
+                       is_collecting_statistics)
+                      for index_first_game, index_last_game in _get_chunks(number_games, size_chunk)]
+
+    results = TournamentResults(GameStatistics(config) if is_collecting_statistics else None)
+
+    if number_workers == 1:
+        for arguments in list_arguments:
+            results.merge(_play_chunk(arguments))
+        return results
+
+    with Pool(processes=number_workers) as pool:
+        for results_chunk in pool.imap_unordered(_play_chunk, list_arguments):
+            results.merge(results_chunk)
+
+    return results
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+
+    tournament_results = run_tournament(number_games=2000, seed=42, size_chunk=100)
+    print(tournament_results)
+    print(sorted(tournament_results.histogram_shots_to_win_player_1.items()))
@@ -0,0 +1,245 @@
+"""
+Transposition cache: the attacks chosen by a strategy, reused whenever it knows the same about the opponent's board.
+
+A strategy whose choice only depends on the outcomes of its previous attacks (see battleship.opening_book) reaches
+the same knowledge states over and over across games: the same cells missed, hit, and where ships sank. The cache
+maps these states to the cell the strategy chose, so an expensive strategy (e.g. PlayerSolver) only computes each
+decision once in a long simulation.
+
+A state is identified by a Zobrist hash: the XOR of a random 64-bit key per (cell, outcome) known, updated with one
+XOR per attack. The hash is kept for the state seen through each symmetry of the board (the 8 symmetries of a square
+board, the 4 of a rectangular one), and the smallest of these hashes is the key of the state in the cache, so
+states equivalent by symmetry share their entry: the cell stored is mapped through the symmetry. The decision read
+from the cache is then the one the strategy made in an equivalent state, which may be another of its best cells
+when it breaks ties in a way which is not symmetric (use is_using_symmetries=False to always get its own choice).
+
+The cache has a maximum number of entries, the least recently used ones are evicted first.
+"""
+import random
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from battleship.config import GameConfig
+from battleship.opening_book import TUPLE_OUTCOMES, get_outcome
+from battleship.placement import get_index_cell
+from battleship.player import PlayerProbabilistic, PlayerSolver
+
+NUMBER_BITS_KEYS = 64
+
+
+def get_maps_symmetries(config: GameConfig, is_using_symmetries: bool = True) -> List[Tuple[int, ...]]:
+    """
+    :return: for each symmetry of the board (the identity first), the tuple: index of a cell -> index of its image
+    (see battleship.placement.get_index_cell)
+    """
+    size_x, size_y = config.size_x, config.size_y
+    if not is_using_symmetries:
+        tuple_transforms = ((False, False, False),)
+    else:
+        # (is_transposed, is_mirrored_x, is_mirrored_y), the transposition only keeps a square board on itself
+        tuple_transforms = tuple((is_transposed, is_mirrored_x, is_mirrored_y)
+                                 for is_transposed in ((False, True) if size_x == size_y else (False,))
+                                 for is_mirrored_x in (False, True)
+                                 for is_mirrored_y in (False, True))
+
+    list_maps = []
+    for is_transposed, is_mirrored_x, is_mirrored_y in tuple_transforms:
+        list_images = []
+        for index_cell in range(config.number_cells):
+            y, x = divmod(index_cell, size_x)
+            if is_transposed:
+                x, y = y, x
+            if is_mirrored_x:
+                x = size_x - 1 - x
+            if is_mirrored_y:
+                y = size_y - 1 - y
+            list_images.append(y * size_x + x)
+        list_maps.append(tuple(list_images))
+    return list_maps
+
+
+class TranspositionCache(object):
+    """
+    Cells chosen by a strategy per knowledge state, for the boards of a config.
+    A cache should only be shared by players of the same strategy (with the same parameters).
+    """
+
+    def __init__(self,
+                 config: GameConfig,
+                 max_number_entries: int = 100000,
+                 is_using_symmetries: bool = True,
+                 seed: int = 0):
+        """
+        :param config: config of the opponent's boards
+        :param max_number_entries: number of states kept, the least recently used ones are evicted first
+        :param is_using_symmetries: if False, only identical states share an entry
+        :param seed: seed of the Zobrist keys
+        """
+        self.config = config
+        self.max_number_entries = max_number_entries
+
+        self.list_maps_symmetries = get_maps_symmetries(config, is_using_symmetries)
+        self.list_maps_inverse = []
+        for map_symmetry in self.list_maps_symmetries:
+            map_inverse = [0] * config.number_cells
+            for index_cell, index_image in enumerate(map_symmetry):
+                map_inverse[index_image] = index_cell
+            self.list_maps_inverse.append(tuple(map_inverse))
+
+        # for each symmetry: index of a cell * number of outcomes + outcome -> key of the image of that cell
+        rng = random.Random(seed)
+        number_outcomes = len(TUPLE_OUTCOMES)
+        list_keys = [rng.getrandbits(NUMBER_BITS_KEYS) for _ in range(config.number_cells * number_outcomes)]
+        self.list_tables_keys = [tuple(list_keys[map_symmetry[index_cell] * number_outcomes + outcome]
+                                       for index_cell in range(config.number_cells)
+                                       for outcome in range(number_outcomes))
+                                 for map_symmetry in self.list_maps_symmetries]
+
+        # (smallest hash, number of cells known) -> index of the cell chosen, seen through the symmetry of that hash
+        self.dict_cells_per_state = OrderedDict()
+
+        self.number_hits = 0
+        self.number_misses = 0
+        self.number_evictions = 0
+
+    def __repr__(self):
+        return f"TranspositionCache(number_entries={len(self.dict_cells_per_state)}, " \
+               f"hit_rate={self.get_hit_rate():.4f}, number_evictions={self.number_evictions})"
+
+    def __len__(self):
+        return len(self.dict_cells_per_state)
+
+    def get_hit_rate(self) -> float:
+        """
+        :return: the fraction of the lookups which found the state in the cache, 0 if there were none
+        """
+        number_lookups = self.number_hits + self.number_misses
+        return self.number_hits / number_lookups if number_lookups else 0.
+
+    def get_hashes_initial(self) -> List[int]:
+        """
+        :return: the hash of each symmetry of the state where nothing is known, updated in place by update_hashes
+        """
+        return [0] * len(self.list_maps_symmetries)
+
+    def update_hashes(self, list_hashes: List[int], index_cell: int, outcome: int) -> None:
+        """
+        Adds the outcome of an attack on a cell to the hashes of a state.
+        :param outcome: see battleship.opening_book.get_outcome
+        """
+        index_key = index_cell * len(TUPLE_OUTCOMES) + outcome
+        for index_symmetry, table_keys in enumerate(self.list_tables_keys):
+            list_hashes[index_symmetry] ^= table_keys[index_key]
+
+    def get_index_cell(self, list_hashes: List[int], number_cells_known: int) -> Optional[int]:
+        """
+        :return: the index of the cell chosen in that state (or in a state equivalent by symmetry), None if the state
+        is not in the cache
+        """
+        index_symmetry = min(range(len(list_hashes)), key=list_hashes.__getitem__)
+        key_state = list_hashes[index_symmetry], number_cells_known
+
+        index_image = self.dict_cells_per_state.get(key_state)
+        if index_image is None:
+            self.number_misses += 1
+            return None
+
+        self.number_hits += 1
+        self.dict_cells_per_state.move_to_end(key_state)
+        return self.list_maps_inverse[index_symmetry][index_image]
+
+    def set_index_cell(self, list_hashes: List[int], number_cells_known: int, index_cell: int) -> None:
+        """
+        Remembers the cell chosen in that state, evicting the least recently used state if the cache is full.
+        """
+        index_symmetry = min(range(len(list_hashes)), key=list_hashes.__getitem__)
+        self.dict_cells_per_state[list_hashes[index_symmetry], number_cells_known] = \
+            self.list_maps_symmetries[index_symmetry][index_cell]
+
+        if len(self.dict_cells_per_state) > self.max_number_entries:
+            self.dict_cells_per_state.popitem(last=False)
+            self.number_evictions += 1
+
+    def clear(self) -> None:
+        self.dict_cells_per_state.clear()
+        self.number_hits = 0
+        self.number_misses = 0
+        self.number_evictions = 0
+
+
+class TranspositionCacheMixin(object):
+    """
+    Mixin making a player read its attacks from a transposition cache, and choose them itself only in the states
+    which are not in it. It goes before the class of the player, e.g.
+    class PlayerSolverCached(TranspositionCacheMixin, PlayerSolver).
+    The strategy should only learn through update_after_attack, and always choose the same cell in the same state.
+    """
+
+    def __init__(self, *args, transposition_cache: TranspositionCache = None, **kwargs):
+        """
+        :param transposition_cache: cache shared by the players of the same strategy, for the config of the board of
+        the player
+        :raise ValueError if the cache is for another config
+        """
+        super().__init__(*args, **kwargs)
+
+        if transposition_cache is not None and transposition_cache.config != self.board.config:
+            raise ValueError(f"The transposition cache is for {transposition_cache.config}, not {self.board.config}.")
+
+        self.transposition_cache = transposition_cache
+        self.list_hashes_knowledge = transposition_cache.get_hashes_initial() \
+            if transposition_cache is not None else None
+        self.number_cells_known = 0
+
+    def select_coordinates_to_attack(self, opponent) -> Tuple[int, int]:
+        cache = self.transposition_cache
+        if cache is None:
+            return super().select_coordinates_to_attack(opponent)
+
+        size_x = self.board.config.size_x
+        index_cell = cache.get_index_cell(self.list_hashes_knowledge, self.number_cells_known)
+        if index_cell is None:
+            coord_x, coord_y = super().select_coordinates_to_attack(opponent)
+            cache.set_index_cell(self.list_hashes_knowledge, self.number_cells_known,
+                                 get_index_cell(coord_x, coord_y, size_x))
+            return coord_x, coord_y
+
+        return index_cell % size_x + 1, index_cell // size_x + 1
+
+    def update_after_attack(self,
+                            coord_x: int,
+                            coord_y: int,
+                            is_ship_hit: bool,
+                            has_ship_sunk: bool) -> None:
+        if self.transposition_cache is not None:
+            self.transposition_cache.update_hashes(self.list_hashes_knowledge,
+                                                   get_index_cell(coord_x, coord_y, self.board.config.size_x),
+                                                   get_outcome(is_ship_hit, has_ship_sunk))
+            self.number_cells_known += 1
+        super().update_after_attack(coord_x, coord_y, is_ship_hit, has_ship_sunk)
+
+
+class PlayerProbabilisticCached(TranspositionCacheMixin, PlayerProbabilistic):
+    pass
+
+
+class PlayerSolverCached(TranspositionCacheMixin, PlayerSolver):
+    pass
+
+
+if __name__ == '__main__':
+    # SANDBOX for you to play and test your functions
+    import time
+
+    from battleship.config import DEFAULT_CONFIG
+    from battleship.player import PlayerRandom
+
+    cache = TranspositionCache(DEFAULT_CONFIG)
+    time_start = time.perf_counter()
+    for index_game in range(200):
+        rng = random.Random(index_game)
+        player = PlayerProbabilisticCached(config=DEFAULT_CONFIG, rng=rng, transposition_cache=cache)
+        opponent = PlayerRandom(config=DEFAULT_CONFIG, rng=rng)
+        while not opponent.has_lost():
+            player.attacks(opponent, verbose=False)
+    print(cache, f"{time.perf_counter() - time_start:.2f}s")
@@ -0,0 +1,296 @@
+"""
+Bulk validation of fleets submitted by users, without building a Board for each of them.
+
+A fleet is a line of text with the ships separated by spaces, each ship given by its two ends (e.g. 'A1-A3'), or by
+its only cell for a ship of length 1 (e.g. 'C5'):
+    A1-A3 C5-F5 J1-J2 H8 E10-A10
+
+Unlike Board, which raises on the first problem, every violation of a fleet is reported:
+- KIND_SYNTAX: a ship which cannot be read
+- KIND_NOT_STRAIGHT: a ship neither horizontal nor vertical
+- KIND_OUT_OF_BOUNDS: a ship not entirely on the board
+- KIND_COUNTS: a number of ships of a length different from the config
+- KIND_OVERLAP: two ships sharing a cell
+- KIND_TOUCHING: two ships next to each other (corners included), see Ship.is_near_ship
+
+The ships are looked up in the placement tables (see battleship.placement) and cached by their text, so checking a
+fleet takes a few dict lookups and bitwise operations per ship: the pairs of ships are only compared when the fleet
+is invalid. Streams of fleets are validated in batches over a pool of processes.
+
+Usage:
+    python -m battleship.validate fleets.txt --output violations.txt
+"""
+import argparse
+import sys
+from collections import Counter
+from itertools import combinations, islice
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+from battleship.config import GameConfig, DEFAULT_CONFIG
+from battleship.convert import parse_coordinates
+from battleship.placement import get_placement_table
+from battleship.ship import Ship
+
+KIND_SYNTAX = 'syntax'
+KIND_NOT_STRAIGHT = 'not_straight'
+KIND_OUT_OF_BOUNDS = 'out_of_bounds'
+KIND_COUNTS = 'counts'
+KIND_OVERLAP = 'overlap'
+KIND_TOUCHING = 'touching'
+
+# number of texts of ships kept in the cache of a validator, it is emptied when it is full
+MAX_SIZE_CACHE_SHIPS = 100000
+
+
+class FleetViolation(NamedTuple):
+    kind: str  # one of the KIND_ constants
+    message: str
+
+
+class _ParsedShip(object):
+    """
+    What the validator knows about the text of a ship, whatever the fleet it belongs to.
+    """
+    __slots__ = ('text', 'length', 'mask', 'mask_halo', 'violation')
+
+    def __init__(self, text: str, length: int = None, mask: int = None, mask_halo: int = None,
+                 violation: FleetViolation = None):
+        self.text = text
+        self.length = length  # None if the ship cannot be read
+        self.mask = mask  # None if the ship is not entirely on the board
+        self.mask_halo = mask_halo
+        self.violation = violation
+
+
+class FleetValidator(object):
+    """
+    Validates the fleets of the boards of a config.
+    """
+
+    def __init__(self, config: GameConfig = None):
+        """
+        :param config: size of the board and number of ships per length, DEFAULT_CONFIG if None
+        """
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.placement_table = get_placement_table(self.config.size_x, self.config.size_y)
+        self.list_lengths_expected = sorted(length
+                                            for length, number_ships in self.config.tuple_number_ships_per_length
+                                            for _ in range(number_ships))
+
+        # text of a ship -> what is known about it
+        self.dict_ships_per_text = {}
+
+    def validate(self, str_fleet: str) -> List[FleetViolation]:
+        """
+        :param str_fleet: ships separated by spaces, such as 'A1-A3 C5-F5 J1-J2 H8 E10-A10'
+        :return: the list of all the violations of the fleet, empty if it is valid
+        """
+        list_violations = []
+        list_ships = []  # ships entirely on the board
+        list_lengths = []
+        mask_halos = 0
+        are_some_ships_near = False
+
+        for text_ship in str_fleet.split():
+            parsed_ship = self.dict_ships_per_text.get(text_ship)
+            if parsed_ship is None:
+                parsed_ship = self._parse_ship(text_ship)
+
+            if parsed_ship.violation is not None:
+                list_violations.append(parsed_ship.violation)
+            if parsed_ship.length is not None:
+                list_lengths.append(parsed_ship.length)
+            if parsed_ship.mask is not None:
+                if parsed_ship.mask & mask_halos:
+                    are_some_ships_near = True
+                mask_halos |= parsed_ship.mask_halo
+                list_ships.append(parsed_ship)
+
+        list_lengths.sort()
+        if list_lengths != self.list_lengths_expected:
+            list_violations.extend(self._get_violations_counts(list_lengths))
+
+        if are_some_ships_near:
+            list_violations.extend(self._get_violations_pairs(list_ships))
+
+        return list_violations
+
+    def _parse_ship(self, text_ship: str) -> _ParsedShip:
+        if len(self.dict_ships_per_text) >= MAX_SIZE_CACHE_SHIPS:
+            self.dict_ships_per_text.clear()
+
+        coord_str_start, separator, coord_str_end = text_ship.partition('-')
+        try:
+            coord_start = parse_coordinates(coord_str_start)
+            coord_end = parse_coordinates(coord_str_end) if separator else coord_start  # no '-': ship of length 1
+        except ValueError as value_error:
+            parsed_ship = _ParsedShip(text_ship, violation=FleetViolation(KIND_SYNTAX, f"{text_ship}: {value_error}"))
+        else:
+            try:
+                ship = Ship(coord_start, coord_end)
+            except ValueError:
+                parsed_ship = _ParsedShip(text_ship, violation=FleetViolation(
+                    KIND_NOT_STRAIGHT, f"{text_ship} is neither horizontal nor vertical"))
+            else:
+                try:
+                    placement = self.placement_table.get_placement_of_ship(ship)
+                except ValueError:
+                    parsed_ship = _ParsedShip(text_ship, ship.length(), violation=FleetViolation(
+                        KIND_OUT_OF_BOUNDS, f"{text_ship} is not entirely on the board"))
+                else:
+                    parsed_ship = _ParsedShip(text_ship, placement.length, placement.mask, placement.mask_halo)
+
+        self.dict_ships_per_text[text_ship] = parsed_ship
+        return parsed_ship
+
+    def _get_violations_counts(self, list_lengths: List[int]) -> List[FleetViolation]:
+        counter_lengths = Counter(list_lengths)
+        counter_lengths_expected = Counter(self.list_lengths_expected)
+
+        return [FleetViolation(KIND_COUNTS, f"{counter_lengths[length]} ships of length {length}, "
+                                            f"{counter_lengths_expected[length]} expected")
+                for length in sorted(counter_lengths.keys() | counter_lengths_expected.keys())
+                if counter_lengths[length] != counter_lengths_expected[length]]
+
+    @staticmethod
+    def _get_violations_pairs(list_ships: List[_ParsedShip]) -> List[FleetViolation]:
+        list_violations = []
+        for ship, other_ship in combinations(list_ships, 2):
+            if ship.mask & other_ship.mask:
+                list_violations.append(FleetViolation(KIND_OVERLAP, f"{ship.text} and {other_ship.text} overlap"))
+            elif ship.mask & other_ship.mask_halo:
+                list_violations.append(FleetViolation(KIND_TOUCHING, f"{ship.text} and {other_ship.text} touch"))
+        return list_violations
+
+
+class ValidationSummary(object):
+    """
+    Counts of the fleets validated and of their violations.
+    """
+
+    def __init__(self):
+        self.number_fleets = 0
+        self.number_fleets_invalid = 0
+        self.counter_kinds_violations = Counter()
+
+    def __repr__(self):
+        return f"ValidationSummary(number_fleets={self.number_fleets}, " \
+               f"number_fleets_invalid={self.number_fleets_invalid}, " \
+               f"violations={dict(self.counter_kinds_violations)})"
+
+    def add_fleet(self, list_violations: List[FleetViolation]) -> None:
+        self.number_fleets += 1
+        if list_violations:
+            self.number_fleets_invalid += 1
+            self.counter_kinds_violations.update(violation.kind for violation in list_violations)
+
+
+# validator of a worker, created by _initialize_worker
+_validator_worker = None  # type: FleetValidator
+
+
+def _initialize_worker(config: GameConfig) -> None:
+    global _validator_worker
+    _validator_worker = FleetValidator(config)
+
+
+def _validate_batch(arguments: Tuple[int, List[str]]) -> Tuple[int, List[Tuple[int, List[FleetViolation]]]]:
+    """
+    :return: a tuple (number of fleets of the batch, list of the tuples (index of the fleet, violations) of the
+    invalid fleets)
+    """
+    index_first_fleet, list_str_fleets = arguments
+    validate = _validator_worker.validate
+
+    list_invalid_fleets = []
+    for index_fleet, str_fleet in enumerate(list_str_fleets, index_first_fleet):
+        list_violations = validate(str_fleet)
+        if list_violations:
+            list_invalid_fleets.append((index_fleet, list_violations))
+
+    return len(list_str_fleets), list_invalid_fleets
+
+
+def _get_batches(iterable_str_fleets: Iterable[str], size_batch: int) -> Iterator[Tuple[int, List[str]]]:
+    iterator_str_fleets = iter(iterable_str_fleets)
+    index_first_fleet = 0
+    while True:
+        list_str_fleets = list(islice(iterator_str_fleets, size_batch))
+        if not list_str_fleets:
+            return
+        yield index_first_fleet, list_str_fleets
+        index_first_fleet += len(list_str_fleets)
+
+
+def validate_fleets(iterable_str_fleets: Iterable[str],
+                    config: GameConfig = None,
+                    summary: ValidationSummary = None,
+                    size_batch: int = 10000,
+                    number_workers: int = None) -> Iterator[Tuple[int, List[FleetViolation]]]:
+    """
+    Validates a stream of fleets (e.g. the lines of a file), in batches over a pool of processes. The fleets are
+    read lazily, a few batches ahead of the results.
+
+    :param iterable_str_fleets: fleets, one per string (see FleetValidator.validate)
+    :param config: config of the boards, DEFAULT_CONFIG if None
+    :param summary: if not None, it counts all the fleets validated and their violations
+    :param size_batch: number of fleets validated by a worker per task
+    :param number_workers: number of processes. None uses all the cores, 1 validates everything in this process.
+    :return: an iterator over the tuples (index of the fleet in the stream, violations of the fleet) of the invalid
+    fleets, in the order of the stream
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+    iterator_batches = _get_batches(iterable_str_fleets, size_batch)
+
+    if number_workers == 1:
+        _initialize_worker(config)
+        iterator_results = map(_validate_batch, iterator_batches)
+        yield from _get_invalid_fleets(iterator_results, summary)
+        return
+
+    with Pool(processes=number_workers, initializer=_initialize_worker, initargs=(config,)) as pool:
+        yield from _get_invalid_fleets(pool.imap(_validate_batch, iterator_batches), summary)
+
+
+def _get_invalid_fleets(iterator_results: Iterator[Tuple[int, List[Tuple[int, List[FleetViolation]]]]],
+                        summary: ValidationSummary) -> Iterator[Tuple[int, List[FleetViolation]]]:
+    for number_fleets, list_invalid_fleets in iterator_results:
+        if summary is not None:
+            summary.number_fleets += number_fleets - len(list_invalid_fleets)
+            for _, list_violations in list_invalid_fleets:
+                summary.add_fleet(list_violations)
+        yield from list_invalid_fleets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validates fleets, one per line (e.g. 'A1-A3 C5-F5 J1-J2 H8 "
+                                                 "E10-A10'), and reports all the violations of each fleet.")
+    parser.add_argument('path_fleets', help="file of the fleets, - for the standard input")
+    parser.add_argument('--output', help="file of the violations (standard output by default): one line per "
+                                         "invalid fleet, with its line number")
+    parser.add_argument('--batch', type=int, default=10000, help="number of fleets per batch")
+    parser.add_argument('--workers', type=int, default=None)
+    arguments = parser.parse_args()
+
+    summary = ValidationSummary()
+    file_fleets = sys.stdin if arguments.path_fleets == '-' else open(arguments.path_fleets)
+    file_output = sys.stdout if arguments.output is None else open(arguments.output, 'w')
+    try:
+        for index_fleet, list_violations in validate_fleets(file_fleets, summary=summary, size_batch=arguments.batch,
+                                                            number_workers=arguments.workers):
+            file_output.write(f"{index_fleet + 1}\t"
+                              + "; ".join(f"{violation.kind}: {violation.message}" for violation in list_violations)
+                              + "\n")
+    finally:
+        if file_fleets is not sys.stdin:
+            file_fleets.close()
+        if file_output is not sys.stdout:
+            file_output.close()
+
+    print(summary, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()